@@ -1,6 +1,10 @@
+from functools import reduce
+from operator import or_
 from typing import ClassVar
+from uuid import UUID
 
 from django.conf import settings
+from django.db import connection, transaction
 from django.db.models import Count
 from django_filters import CharFilter, UUIDFilter
 from django_filters.rest_framework import BaseInFilter, BooleanFilter, FilterSet
@@ -9,8 +13,14 @@ from rest_framework import serializers
 from rest_framework.filters import SearchFilter
 
 from authentication.models import User
-from consultations.models import DemographicOption, Response
-from embeddings import embed_text
+from consultations.models import (
+    DemographicOption,
+    Response,
+    ResponseAnnotation,
+    half_precision_embedding,
+)
+from consultations.services.response_index import ResponseBitmapIndex, get_response_index
+from embeddings import embed_query
 
 logger = settings.LOGGER
 
@@ -107,39 +117,201 @@ def apply_search_filter(queryset, query_params):
     if search_mode == "keyword":
         return queryset.filter(free_text__icontains=search_value)
     elif search_mode == "semantic":
-        embedded_query = embed_text(search_value)
+        embedded_query = embed_query(search_value)
+        recall = query_params.get("searchRecall") or DEFAULT_SEARCH_RECALL
+        return order_by_semantic_distance(queryset, embedded_query, recall)
+
+    return queryset
+
+
+# hnsw.ef_search per recall level: a larger candidate list raises recall at the cost
+# of latency. "exact" bypasses the index for an exact scan of the filtered responses.
+SEARCH_RECALL_EF_SEARCH = {"fast": 40, "balanced": 100, "high": 400}
+SEARCH_RECALL_CHOICES = [*SEARCH_RECALL_EF_SEARCH, "exact"]
+DEFAULT_SEARCH_RECALL = "balanced"
+
+
+def _set_hnsw_search_options(ef_search: int) -> None:
+    """
+    Configure the HNSW scan with SET LOCAL, so the options end with the current
+    transaction and never leak onto a pooled connection. The search must be evaluated
+    inside the same transaction.atomic() block; outside one the options lapse at once
+    and the server defaults apply. Iterative scans keep fetching candidates until
+    enough rows survive the question/filter predicates, so filtered searches still
+    fill a page.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('hnsw.ef_search', %s, true), "
+            "set_config('hnsw.iterative_scan', 'strict_order', true)",
+            [str(ef_search)],
+        )
+
+
+def order_by_semantic_distance(queryset, embedded_query, recall=DEFAULT_SEARCH_RECALL):
+    """
+    Annotate and order responses by cosine distance to an embedded query.
+
+    Approximate recall levels use the half-precision HNSW index on Response.embedding,
+    so the distance expression must match the indexed expression exactly. An index scan
+    never returns responses without an embedding and stops after hnsw.max_scan_tuples
+    candidates, so callers that page through every result complete short pages from
+    exact_semantic_ordering.
+    """
+    if recall == "exact":
         distance = CosineDistance("embedding", embedded_query)
-        return queryset.annotate(distance=distance).order_by("distance")
+    else:
+        _set_hnsw_search_options(
+            SEARCH_RECALL_EF_SEARCH.get(recall, SEARCH_RECALL_EF_SEARCH[DEFAULT_SEARCH_RECALL])
+        )
+        distance = CosineDistance(half_precision_embedding(), embedded_query)
+    # id breaks ties so semantic pages can use a stable (distance, id) keyset cursor
+    return queryset.annotate(distance=distance).order_by("distance", "id")
+
+
+def exact_semantic_ordering(queryset):
+    """
+    Re-order a queryset from order_by_semantic_distance by the same distance, written
+    so the planner cannot answer it from the HNSW index. This sorts every response in
+    scope, including those without an embedding (a NULL distance, sorted last).
+    """
+    distance = queryset.query.annotations["distance"]
+    return queryset.annotate(distance=distance + 0.0).order_by("distance", "id")
+
+
+# Filters scoped to the requesting user, applied outside ResponseFilter so the
+# aggregation endpoints resolve them the same way as the bitmap index
+USER_FILTER_PARAMS = ("is_flagged", "unseenResponsesOnly")
+
+
+def apply_user_filters(queryset, query_params, user):
+    """Apply is_flagged and unseenResponsesOnly for the user. Ignored when anonymous."""
+    if user is None or not user.is_authenticated:
+        return queryset
+
+    is_flagged = _parse_bool(query_params.get("is_flagged"))
+    if is_flagged is not None:
+        flagged = ResponseAnnotation.objects.filter(flagged_by=user).values("response_id")
+        queryset = (
+            queryset.filter(id__in=flagged) if is_flagged else queryset.exclude(id__in=flagged)
+        )
+
+    unseen_only = _split_param(query_params.get("unseenResponsesOnly"))
+    if unseen_only and unseen_only[0].lower() == "true":
+        queryset = queryset.exclude(read_by=user)
 
     return queryset
 
 
-def get_filtered_responses(query_params, consultation_id, question_id=None):
+def get_filtered_responses(query_params, consultation_id, question_id=None, user=None):
     """
     Single entry point for filtering responses. Used by all aggregation endpoints
     (question counts, themes, demographics) and the responses list.
-    Applies filter params AND search.
+    Applies filter params, the user's flagged/unseen filters AND search.
     """
     queryset = Response.objects.filter(question__consultation_id=consultation_id)
     if question_id:
         queryset = queryset.filter(question_id=question_id)
 
-    filterset = ResponseFilter(query_params, queryset=queryset)
+    params = query_params.copy()
+    for param in USER_FILTER_PARAMS:
+        params.pop(param, None)
+    filterset = ResponseFilter(params, queryset=queryset)
     queryset = filterset.qs
 
+    queryset = apply_user_filters(queryset, query_params, user)
     queryset = apply_search_filter(queryset, query_params)
 
     return queryset
 
 
-def get_filtered_response_ids(query_params, consultation_id, question_id=None):
+def _split_param(value) -> list[str]:
+    return [v for v in (value or "").split(",") if v]
+
+
+def _parse_uuid(value) -> UUID | None:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
+
+
+def _parse_bool(value) -> bool | None:
+    """Parse a boolean query param the way django-filter's BooleanFilter does."""
+    return {"true": True, "1": True, "false": False, "0": False}.get(str(value).lower())
+
+
+def _union(bitmaps) -> int:
+    return reduce(or_, bitmaps, 0)
+
+
+def get_filtered_response_bitmap(
+    query_params, question_id, user=None
+) -> tuple[ResponseBitmapIndex, int] | None:
+    """
+    Resolve ResponseFilter params for a single question against its bitmap index,
+    with the same semantics as ResponseFilter: OR within sentiments, demographic groups
+    and multi-choice answers, AND across themes and across demographic groups.
+
+    Returns the index with the matching bitmap, or None when the params need the
+    database (search), in which case callers fall back to get_filtered_responses.
+    """
+    if query_params.get("searchValue"):
+        return None
+
+    index = get_response_index(question_id)
+    bitmap = index.all
+
+    if sentiments := _split_param(query_params.get("sentimentFilters")):
+        bitmap &= _union(index.sentiments.get(s, 0) for s in sentiments)
+
+    evidence_rich = _parse_bool(query_params.get("evidenceRich"))
+    if evidence_rich is not None:
+        bitmap &= index.evidence_rich.get(evidence_rich, 0)
+
+    for theme_id in _split_param(query_params.get("themeFilters")):
+        bitmap &= index.themes.get(_parse_uuid(theme_id), 0)
+
+    if demographics := _split_param(query_params.get("demographics")):
+        groups: dict[str | None, list[int]] = {}
+        for option_id in map(_parse_uuid, demographics):
+            field_name = index.demographic_fields.get(option_id)
+            groups.setdefault(field_name, []).append(index.demographics.get(option_id, 0))
+        for group in groups.values():
+            bitmap &= _union(group)
+
+    if answers := _split_param(query_params.get("multiple_choice_answer")):
+        bitmap &= _union(index.multiple_choice_answers.get(_parse_uuid(a), 0) for a in answers)
+
+    if user is not None and user.is_authenticated:
+        is_flagged = _parse_bool(query_params.get("is_flagged"))
+        if is_flagged is not None:
+            flagged = index.flagged_by(user)
+            bitmap &= flagged if is_flagged else ~flagged
+
+        unseen_only = _split_param(query_params.get("unseenResponsesOnly"))
+        if unseen_only and unseen_only[0].lower() == "true":
+            bitmap &= ~index.read_by(user)
+
+    return index, bitmap
+
+
+def get_filtered_response_ids(query_params, consultation_id, question_id=None, user=None):
     """
     Like get_filtered_responses but materialises the IDs upfront.
     Use this for aggregation queries (counts, themes, demographics) where the filtered
-    set is used as a subquery multiple times.
+    set is used as a subquery multiple times. Resolved from the bitmap index when
+    scoped to a question without search.
     """
-    queryset = get_filtered_responses(query_params, consultation_id, question_id)
-    return list(queryset.values_list("id", flat=True))
+    if question_id and (resolved := get_filtered_response_bitmap(query_params, question_id, user)):
+        index, bitmap = resolved
+        return index.ids(bitmap)
+
+    # Semantic search options are SET LOCAL, so the search is evaluated in a transaction
+    with transaction.atomic():
+        queryset = get_filtered_responses(query_params, consultation_id, question_id, user)
+        # Unordered, as counts don't need the semantic ranking and an HNSW scan could drop rows
+        return list(queryset.order_by().values_list("id", flat=True))
 
 
 class UserFilter(FilterSet):
@@ -167,8 +339,15 @@ class UserFilter(FilterSet):
 
 
 class ResponseSearchSerializer(serializers.Serializer):
-    searchMode = serializers.ChoiceField(choices=["keyword"], required=False, default="keyword")
+    searchMode = serializers.ChoiceField(
+        choices=["keyword", "semantic"], required=False, default="keyword"
+    )
     searchValue = serializers.CharField(required=False)
+    searchRecall = serializers.ChoiceField(
+        choices=SEARCH_RECALL_CHOICES, required=False, default=DEFAULT_SEARCH_RECALL
+    )
+    # Hold the ranked semantic results server-side so later pages are a fixed slice
+    searchSnapshot = serializers.BooleanField(required=False, default=False)
 
 
 class ResponseSearchFilter(SearchFilter):
@@ -185,9 +364,10 @@ class ResponseSearchFilter(SearchFilter):
         if search_mode == "keyword":
             return queryset.filter(free_text__icontains=search_value)
         elif search_mode == "semantic":
-            embedded_query = embed_text(search_value)
+            embedded_query = embed_query(search_value)
             # distance: exact match = 0, exact opposite = 2
-            distance = CosineDistance("embedding", embedded_query)
-            return queryset.annotate(distance=distance).order_by("distance")
+            return order_by_semantic_distance(
+                queryset, embedded_query, serializer.validated_data["searchRecall"]
+            )
         else:
             return queryset
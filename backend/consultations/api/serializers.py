@@ -11,11 +11,13 @@ from consultations.models import (
     Consultation,
     MultiChoiceAnswer,
     Question,
+    QuestionSentimentCount,
     Respondent,
     Response,
     ResponseAnnotationTheme,
     SelectedTheme,
 )
+from consultations.services.response_index import update_response_in_index
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -141,6 +143,11 @@ class QuestionThemeSerializer(serializers.ModelSerializer):
         fields: ClassVar[list] = ["id", "name", "description", "count"]
 
 
+class QuestionSentimentSerializer(serializers.Serializer):
+    sentiment = serializers.CharField()
+    count = serializers.IntegerField()
+
+
 class ThemeAggregationsSerializer(serializers.Serializer):
     theme_aggregations = serializers.DictField(child=serializers.IntegerField())
 
@@ -299,9 +306,18 @@ class ResponseSerializer(serializers.ModelSerializer):
                 )
 
             if "sentiment" in annotation:
+                previous_sentiment = instance.annotation.sentiment
                 instance.annotation.sentiment = annotation["sentiment"]
+                if previous_sentiment != instance.annotation.sentiment:
+                    QuestionSentimentCount.adjust_response_count(
+                        instance.question_id, previous_sentiment, -1
+                    )
+                    QuestionSentimentCount.adjust_response_count(
+                        instance.question_id, instance.annotation.sentiment, 1
+                    )
 
             instance.annotation.save()
+            update_response_in_index(instance.question_id, instance.id)
 
         instance.refresh_from_db()
         return instance
@@ -14,7 +14,7 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from authentication.models import User
-from consultations.api.filters import get_filtered_responses
+from consultations.api.filters import get_filtered_response_bitmap, get_filtered_responses
 from consultations.api.permissions import (
     CanSeeConsultation,
 )
@@ -30,6 +30,7 @@ from consultations.models import (
     Consultation,
     DemographicOption,
     Question,
+    QuestionDemographicCount,
     Respondent,
     ResponseAnnotation,
     ResponseAnnotationTheme,
@@ -194,20 +195,42 @@ class ConsultationViewSet(ModelViewSet):
             "searchValue",
         ]
         question_id = request.query_params.get("question_id")
-        has_filters = question_id or any(request.query_params.get(p) for p in filter_params)
+        has_filters = any(request.query_params.get(p) for p in filter_params)
 
-        if has_filters:
-            filtered_responses = get_filtered_responses(
-                request.query_params, pk, question_id=question_id
-            )
-            filtered_respondent_ids = filtered_responses.values("respondent_id").distinct()
-            through_table = Respondent.demographics.through
-            counts = dict(
-                through_table.objects.filter(respondent_id__in=filtered_respondent_ids)
-                .values_list("demographicoption_id")
-                .annotate(c=Count("id"))
-                .values_list("demographicoption_id", "c")
-            )
+        resolved = (
+            has_filters
+            and question_id
+            and get_filtered_response_bitmap(request.query_params, question_id, request.user)
+        )
+
+        if has_filters or question_id:
+            if resolved:
+                index, bitmap = resolved
+                counts = {
+                    option_id: index.count(bitmap & option_bitmap)
+                    for option_id, option_bitmap in index.demographics.items()
+                }
+            elif has_filters:
+                # Evaluated in a transaction, which the SET LOCAL semantic search options need
+                with transaction.atomic():
+                    filtered_responses = get_filtered_responses(
+                        request.query_params, pk, question_id=question_id, user=request.user
+                    )
+                    filtered_respondent_ids = filtered_responses.values("respondent_id").distinct()
+                    through_table = Respondent.demographics.through
+                    counts = dict(
+                        through_table.objects.filter(respondent_id__in=filtered_respondent_ids)
+                        .values_list("demographicoption_id")
+                        .annotate(c=Count("id"))
+                        .values_list("demographicoption_id", "c")
+                    )
+            else:
+                # Unfiltered question scope is served from the denormalised counts
+                counts = dict(
+                    QuestionDemographicCount.objects.filter(
+                        question_id=question_id, question__consultation_id=pk
+                    ).values_list("demographic_option_id", "response_count")
+                )
             data = [
                 {
                     "id": opt["id"],
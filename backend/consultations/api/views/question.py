@@ -1,6 +1,7 @@
 from typing import ClassVar
 
-from django.db.models import Count, OuterRef, Q, Subquery, Value
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Value
 from django.db.models.functions import Coalesce
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
@@ -9,11 +10,16 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from consultations import models
-from consultations.api.filters import get_filtered_response_ids, get_filtered_responses
+from consultations.api.filters import (
+    get_filtered_response_bitmap,
+    get_filtered_response_ids,
+    get_filtered_responses,
+)
 from consultations.api.permissions import (
     CanSeeConsultation,
 )
 from consultations.api.serializers import (
+    QuestionSentimentSerializer,
     QuestionSerializer,
     QuestionThemeSerializer,
 )
@@ -79,12 +85,33 @@ class QuestionViewSet(ModelViewSet):
         ]
         has_filters = any(request.query_params.get(p) for p in filter_params)
 
-        if has_filters:
+        resolved = has_filters and get_filtered_response_bitmap(
+            request.query_params, question.id, request.user
+        )
+
+        if resolved:
+            # Counts straight from the bitmap index: each filtered set is a popcount
+            index, bitmap = resolved
+            question.total_response_count = index.count(bitmap)
+            question.free_text_response_count = index.count(bitmap & index.free_text)
+            question.multi_choice_response_count = index.count(bitmap & index.multiple_choice)
+
+            if question.has_multiple_choice:
+                multichoice_answers = list(
+                    models.MultiChoiceAnswer.objects.filter(question=question)
+                )
+                for answer in multichoice_answers:
+                    answer.prefetched_response_count = index.count(
+                        bitmap & index.multiple_choice_answers.get(answer.id, 0)
+                    )
+                question._prefetched_objects_cache["multichoiceanswer_set"] = multichoice_answers
+
+        elif has_filters:
             consultation_pk = self.kwargs["consultation_pk"]
             pk = kwargs["pk"]
 
             filtered_ids = get_filtered_response_ids(
-                request.query_params, consultation_pk, question_id=pk
+                request.query_params, consultation_pk, question_id=pk, user=request.user
             )
 
             filtered_responses = models.Response.objects.filter(id__in=filtered_ids)
@@ -130,25 +157,95 @@ class QuestionViewSet(ModelViewSet):
         ]
         has_filters = any(request.query_params.get(p) for p in filter_params)
 
-        if has_filters:
-            filtered_responses = get_filtered_responses(
-                request.query_params, consultation_pk, question_id=pk
-            )
-            themes = themes.annotate(
-                count=Count(
-                    "responseannotation",
-                    filter=Q(responseannotation__response__in=filtered_responses),
-                    distinct=True,
+        resolved = has_filters and get_filtered_response_bitmap(
+            request.query_params, question.id, request.user
+        )
+
+        if resolved:
+            index, bitmap = resolved
+            themes = list(themes)
+            for theme in themes:
+                theme.count = index.count(bitmap & index.themes.get(theme.id, 0))
+        elif has_filters:
+            # Evaluated in a transaction, which the SET LOCAL semantic search options need
+            with transaction.atomic():
+                filtered_responses = get_filtered_responses(
+                    request.query_params, consultation_pk, question_id=pk, user=request.user
+                )
+                themes = list(
+                    themes.annotate(
+                        count=Count(
+                            "responseannotation",
+                            filter=Q(responseannotation__response__in=filtered_responses),
+                            distinct=True,
+                        )
+                    )
                 )
-            )
         else:
-            themes = themes.annotate(
-                count=Count("responseannotation", distinct=True)
-            )
+            themes = themes.annotate(count=F("response_count"))
 
         serializer = QuestionThemeSerializer(themes, many=True)
         return Response({"themes": serializer.data})
 
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="sentiments",
+        permission_classes=[IsAuthenticated, CanSeeConsultation],
+    )
+    def sentiments(self, request, pk=None, consultation_pk=None):
+        """Get sentiment counts for a question."""
+        question = self.get_object()
+
+        filter_params = [
+            "themeFilters",
+            "demographics",
+            "evidenceRich",
+            "unseenResponsesOnly",
+            "is_flagged",
+            "multiple_choice_answer",
+            "searchValue",
+        ]
+        has_filters = any(request.query_params.get(p) for p in filter_params)
+
+        resolved = has_filters and get_filtered_response_bitmap(
+            request.query_params, question.id, request.user
+        )
+
+        if resolved:
+            index, bitmap = resolved
+            counts = {
+                sentiment: index.count(bitmap & sentiment_bitmap)
+                for sentiment, sentiment_bitmap in index.sentiments.items()
+            }
+        elif has_filters:
+            # Evaluated in a transaction, which the SET LOCAL semantic search options need
+            with transaction.atomic():
+                filtered_responses = get_filtered_responses(
+                    request.query_params, consultation_pk, question_id=pk, user=request.user
+                )
+                counts = dict(
+                    models.ResponseAnnotation.objects.filter(
+                        response__in=filtered_responses, sentiment__isnull=False
+                    )
+                    .values_list("sentiment")
+                    .annotate(c=Count("id"))
+                    .values_list("sentiment", "c")
+                )
+        else:
+            counts = dict(
+                models.QuestionSentimentCount.objects.filter(question=question).values_list(
+                    "sentiment", "response_count"
+                )
+            )
+
+        data = [
+            {"sentiment": sentiment, "count": counts.get(sentiment, 0)}
+            for sentiment in models.ResponseAnnotation.Sentiment.values
+        ]
+        serializer = QuestionSentimentSerializer(data, many=True)
+        return Response({"sentiments": serializer.data})
+
     @action(
         detail=True,
         methods=["get"],
@@ -1,7 +1,10 @@
 import uuid
 from typing import ClassVar
 
-from django.db.models import Exists, OuterRef
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.pagination import PageNumberPagination
@@ -10,7 +13,12 @@ from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from consultations import models
-from consultations.api.filters import ResponseFilter, ResponseSearchFilter
+from consultations.api.filters import (
+    DEFAULT_SEARCH_RECALL,
+    ResponseFilter,
+    ResponseSearchFilter,
+    exact_semantic_ordering,
+)
 from consultations.api.permissions import (
     CanSeeConsultation,
 )
@@ -25,6 +33,8 @@ from consultations.api.serializers import (
 # while still capping the work done per request.
 MAX_BULK_MARK_READ = 1000
 
+logger = settings.LOGGER
+
 
 class BespokeResultsSetPagination(PageNumberPagination):
     page_size = 100
@@ -44,44 +54,82 @@ class BespokeResultsSetPagination(PageNumberPagination):
         self.request = request
         page_size = self.get_page_size(request)
         cursor = request.query_params.get("cursor")
-        self._is_semantic = request.query_params.get("searchMode") == "semantic"
+        # Only an actual semantic search is annotated and ordered by distance
+        self._is_semantic = bool(
+            request.query_params.get("searchMode") == "semantic"
+            and request.query_params.get("searchValue")
+        )
+        self._snapshot = None
 
         # COUNT only on first page — skipped on every subsequent load-more click.
         # On large consultations this avoids a repeated full-table count.
         self._filtered_count = queryset.count() if not cursor else None
 
-        if cursor:
-            if self._is_semantic:
-                # Semantic search is ordered by distance with no stable row key,
-                # so keyset pagination does not apply. Use an integer offset encoded
-                # in the cursor instead.
-                try:
-                    semantic_offset = int(cursor)
-                except ValueError:
-                    semantic_offset = 0  # Malformed cursor — treat as first page
-                self._semantic_offset = semantic_offset
-                items = list(queryset[semantic_offset : semantic_offset + page_size + 1])
-            else:
+        if self._is_semantic:
+            items = self._paginate_semantic(queryset, request, cursor, page_size)
+        else:
+            if cursor:
                 # Keyset pagination: seek directly to the position after the last-seen id.
-                self._semantic_offset = 0
                 try:
                     uuid.UUID(cursor)  # validate before passing to the ORM
                     queryset = queryset.filter(id__gt=cursor)
                 except ValueError:
                     pass  # Malformed cursor — treat as first page
-                items = list(queryset[: page_size + 1])
-        else:
-            self._semantic_offset = 0
             items = list(queryset[: page_size + 1])
 
         self._has_next = len(items) > page_size
         self._page = items[:page_size] if self._has_next else items
         return self._page
 
+    def _paginate_semantic(self, queryset, request, cursor, page_size):
+        """
+        Semantic search is ordered by (distance, id), so later pages seek past the
+        last row seen rather than re-sorting and discarding every earlier page.
+
+        With searchSnapshot the ranked ids are instead stored server-side on the first
+        page, so "load more" pages hydrate a fixed slice and stay consistent while
+        annotations change underneath.
+
+        Approximate recall levels are read from the HNSW index, which never returns
+        responses without an embedding and stops after hnsw.max_scan_tuples candidates,
+        so a page the index leaves short is completed from the exact ordering.
+        """
+        exact = None
+        if request.query_params.get("searchRecall", DEFAULT_SEARCH_RECALL) != "exact":
+            exact = exact_semantic_ordering(queryset)
+
+        after = None
+        if cursor and cursor.startswith(SNAPSHOT_CURSOR_PREFIX):
+            self._snapshot = _load_search_snapshot(cursor)
+            if self._snapshot is None:
+                # Expired or malformed snapshot — start again from the first page
+                self._filtered_count = queryset.count()
+        elif cursor:
+            after = _parse_semantic_cursor(cursor)
+        elif request.query_params.get("searchSnapshot", "").lower() in ("true", "1"):
+            self._snapshot = _create_search_snapshot(queryset, exact)
+
+        if self._snapshot is None:
+            return _semantic_page(queryset, exact, after, page_size + 1)
+
+        offset = self._snapshot["offset"]
+        page_ids = self._snapshot["ids"][offset : offset + page_size + 1]
+        # Both orderings are by (distance, id), matching the snapshot order; the exact
+        # one cannot drop snapshot rows the index scan would not return
+        ranked = queryset if exact is None else exact
+        items = list(ranked.filter(id__in=page_ids))
+        if items and len(items) <= page_size and not self._snapshot["complete"]:
+            # The snapshot is capped, so carry on past its end with a keyset seek
+            remaining = page_size + 1 - len(items)
+            items += _semantic_page(queryset, exact, _semantic_position(items[-1]), remaining)
+        return items
+
     def get_paginated_response(self, data):
         if self._has_next and self._page:
-            if self._is_semantic:
-                next_cursor = str(self._semantic_offset + len(self._page))
+            if self._snapshot is not None:
+                next_cursor = self._next_snapshot_cursor()
+            elif self._is_semantic:
+                next_cursor = _semantic_cursor(self._page[-1])
             else:
                 next_cursor = str(self._page[-1].id)
         else:
@@ -96,6 +144,99 @@ class BespokeResultsSetPagination(PageNumberPagination):
             result["total_count"] = self._filtered_count
         return Response(result)
 
+    def _next_snapshot_cursor(self) -> str:
+        next_offset = self._snapshot["offset"] + len(self._page)
+        if next_offset >= len(self._snapshot["ids"]):
+            # Past the end of a capped snapshot — continue with the keyset cursor
+            return _semantic_cursor(self._page[-1])
+        return f"{SNAPSHOT_CURSOR_PREFIX}{self._snapshot['token']}:{next_offset}"
+
+
+SNAPSHOT_CURSOR_PREFIX = "snapshot:"
+
+
+def _semantic_cursor(response) -> str:
+    """Encode the (distance, id) of the last row; repr round-trips the float exactly."""
+    distance = "null" if response.distance is None else repr(response.distance)
+    return f"{distance}:{response.id}"
+
+
+def _semantic_position(response) -> tuple:
+    return response.distance, response.id
+
+
+def _parse_semantic_cursor(cursor) -> tuple | None:
+    try:
+        distance, response_id = cursor.split(":", 1)
+        response_id = uuid.UUID(response_id)
+        distance = None if distance == "null" else float(distance)
+    except ValueError:
+        return None  # Malformed cursor — treat as first page
+    return distance, response_id
+
+
+def _semantic_page(queryset, exact, after, limit, position=_semantic_position) -> list:
+    """
+    Up to limit rows of a semantic search after the (distance, id) position `after`, or
+    from the first row when None. If an approximate search comes back short, the rest
+    is read from its exact ordering, seeking past the last row returned.
+    """
+    rows = list((queryset if after is None else _seek_past(queryset, *after))[:limit])
+    if exact is not None and len(rows) < limit:
+        if rows:
+            after = position(rows[-1])
+        tail = exact if after is None else _seek_past(exact, *after)
+        rows += list(tail[: limit - len(rows)])
+    return rows
+
+
+def _seek_past(queryset, distance, response_id):
+    # Responses without an embedding have a NULL distance and sort last
+    if distance is None:
+        return queryset.filter(distance__isnull=True, id__gt=response_id)
+    return queryset.filter(
+        Q(distance__gt=distance)
+        | Q(distance=distance, id__gt=response_id)
+        | Q(distance__isnull=True)
+    )
+
+
+def _snapshot_cache_key(token: str) -> str:
+    return f"search-snapshot:{token}"
+
+
+def _create_search_snapshot(queryset, exact) -> dict:
+    """Store the ranked ids for a semantic search, capped at SEARCH_SNAPSHOT_MAX_RESULTS."""
+    limit = settings.SEARCH_SNAPSHOT_MAX_RESULTS
+    rows = _semantic_page(
+        queryset.values_list("distance", "id"),
+        None if exact is None else exact.values_list("distance", "id"),
+        None,
+        limit + 1,
+        position=tuple,
+    )
+    ids = [response_id for _, response_id in rows]
+    snapshot = {"ids": ids[:limit], "complete": len(ids) <= limit}
+    token = uuid.uuid4().hex
+    caches[settings.SEARCH_SNAPSHOT_CACHE].set(
+        _snapshot_cache_key(token), snapshot, timeout=settings.SEARCH_SNAPSHOT_TIMEOUT
+    )
+    return {**snapshot, "token": token, "offset": 0}
+
+
+def _load_search_snapshot(cursor: str) -> dict | None:
+    try:
+        token, offset = cursor.removeprefix(SNAPSHOT_CURSOR_PREFIX).split(":", 1)
+        offset = int(offset)
+    except ValueError:
+        return None
+
+    snapshot = caches[settings.SEARCH_SNAPSHOT_CACHE].get(_snapshot_cache_key(token))
+    if snapshot is None:
+        logger.info("Search snapshot {token} has expired", token=token)
+        return None
+    return {**snapshot, "token": token, "offset": offset}
+
 
 class ResponseViewSet(ModelViewSet):
     serializer_class = ResponseSerializer
@@ -171,6 +312,14 @@ class ResponseViewSet(ModelViewSet):
         # this with .order_by("distance") when applied.
         return filtered_queryset.order_by("id")
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get("searchMode") != "semantic":
+            return super().list(request, *args, **kwargs)
+        # The HNSW search options are SET LOCAL, so the search and its pagination
+        # run in one transaction
+        with transaction.atomic():
+            return super().list(request, *args, **kwargs)
+
     @action(
         detail=True,
         methods=["get"],
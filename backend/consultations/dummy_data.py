@@ -195,6 +195,9 @@ def create_dummy_consultation_from_yaml(
                 logger.info("Multiple choice question - create response chosen options")
                 create_response_chosen_options(response, multiple_choice_options)
 
+        # Responses are created one by one through the factories, bypassing the counts
+        # an import keeps up to date
+        question.update_counts()
         logger.info(
             "Finished adding question and responses for question {question_number}",
             question_number=question.number,
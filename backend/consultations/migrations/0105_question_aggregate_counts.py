@@ -0,0 +1,142 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:27
+
+import uuid
+from typing import ClassVar
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_question_aggregate_counts(apps, schema_editor):
+    """Backfill the denormalised per-question theme, sentiment and demographic counts."""
+
+    with schema_editor.connection.cursor() as cursor:
+        # 1. SelectedTheme.response_count
+        cursor.execute("""
+            UPDATE consultations_selectedtheme AS t
+            SET response_count = sub.c
+            FROM (
+                SELECT theme_id, COUNT(*) AS c
+                FROM consultations_responseannotationtheme
+                GROUP BY theme_id
+            ) sub
+            WHERE t.id = sub.theme_id
+        """)
+
+        # 2. QuestionSentimentCount
+        cursor.execute("""
+            INSERT INTO consultations_questionsentimentcount
+                (id, created_at, modified_at, question_id, sentiment, response_count)
+            SELECT gen_random_uuid(), NOW(), NOW(), r.question_id, a.sentiment, COUNT(*)
+            FROM consultations_responseannotation a
+            INNER JOIN consultations_response r ON r.id = a.response_id
+            WHERE a.sentiment IS NOT NULL
+            GROUP BY r.question_id, a.sentiment
+        """)
+
+        # 3. QuestionDemographicCount (distinct respondents per question)
+        cursor.execute("""
+            INSERT INTO consultations_questiondemographiccount
+                (id, created_at, modified_at, question_id, demographic_option_id, response_count)
+            SELECT gen_random_uuid(), NOW(), NOW(), sub.question_id, rd.demographicoption_id,
+                COUNT(*)
+            FROM (
+                SELECT DISTINCT question_id, respondent_id
+                FROM consultations_response
+            ) sub
+            INNER JOIN consultations_respondent_demographics rd
+                ON rd.respondent_id = sub.respondent_id
+            GROUP BY sub.question_id, rd.demographicoption_id
+        """)
+
+
+class Migration(migrations.Migration):
+    dependencies: ClassVar[list] = [
+        ("consultations", "0104_alter_consultation_stage"),
+    ]
+
+    operations: ClassVar[list] = [
+        migrations.AddField(
+            model_name="selectedtheme",
+            name="response_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="QuestionDemographicCount",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("response_count", models.IntegerField(default=0)),
+                (
+                    "demographic_option",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="consultations.demographicoption",
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="consultations.question"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("question", "demographic_option"),
+                        name="unique_question_demographic_count",
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="QuestionSentimentCount",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                (
+                    "sentiment",
+                    models.CharField(
+                        choices=[
+                            ("AGREEMENT", "Agreement"),
+                            ("DISAGREEMENT", "Disagreement"),
+                            ("UNCLEAR", "Unclear"),
+                        ],
+                        max_length=12,
+                    ),
+                ),
+                ("response_count", models.IntegerField(default=0)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="consultations.question"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["created_at"],
+                "abstract": False,
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("question", "sentiment"), name="unique_question_sentiment_count"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_question_aggregate_counts, migrations.RunPython.noop),
+    ]
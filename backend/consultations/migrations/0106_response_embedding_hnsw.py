@@ -0,0 +1,33 @@
+from typing import ClassVar
+
+from django.conf import settings
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+from django.db.models.functions import Cast
+from pgvector.django import HalfVectorField, HnswIndex
+
+
+class Migration(migrations.Migration):
+    # Build the index without locking responses against writes
+    atomic = False
+
+    dependencies: ClassVar[list] = [
+        ("consultations", "0105_question_aggregate_counts"),
+    ]
+
+    operations: ClassVar[list] = [
+        AddIndexConcurrently(
+            model_name="response",
+            index=HnswIndex(
+                # The dimension the model's index and half_precision_embedding() cast to
+                OpClass(
+                    Cast("embedding", HalfVectorField(dimensions=settings.EMBEDDING_DIMENSION)),
+                    name="halfvec_cosine_ops",
+                ),
+                ef_construction=64,
+                m=16,
+                name="response_embedding_hnsw",
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.1.2 on 2026-10-18 21:00
+
+import uuid
+from typing import ClassVar
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies: ClassVar[list] = [
+        ("consultations", "0106_response_embedding_hnsw"),
+    ]
+
+    operations: ClassVar[list] = [
+        migrations.CreateModel(
+            name="TextEmbedding",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4, editable=False, primary_key=True, serialize=False
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("modified_at", models.DateTimeField(auto_now=True)),
+                ("text_hash", models.CharField(max_length=64, unique=True)),
+                ("embedding", pgvector.django.vector.VectorField(dimensions=3072)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
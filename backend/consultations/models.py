@@ -4,15 +4,16 @@ from textwrap import shorten
 from typing import ClassVar
 
 from django.conf import settings
-from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.core.validators import BaseValidator
 from django.db import models
-from django.db.models import Count
+from django.db.models import Count, F
+from django.db.models.functions import Cast
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
-from pgvector.django import VectorField
+from pgvector.django import HalfVectorField, HnswIndex, VectorField
 from simple_history.models import HistoricalRecords
 
 from authentication.models import User
@@ -183,6 +184,17 @@ class Question(UUIDPrimaryKeyModel, TimeStampedModel):
                 "multi_choice_response_count",
             ]
         )
+        QuestionDemographicCount.update_response_counts(self)
+
+    def update_annotation_counts(self):
+        """Persist denormalised theme and sentiment counts from this question's annotations."""
+        SelectedTheme.update_response_counts(self)
+        QuestionSentimentCount.update_response_counts(self)
+
+    def update_counts(self):
+        """Recompute every denormalised count, e.g. after creating responses outside an import."""
+        self.update_response_counts()
+        self.update_annotation_counts()
 
     def get_non_empty_responses(self):
         """
@@ -211,7 +223,12 @@ class Question(UUIDPrimaryKeyModel, TimeStampedModel):
             Response.objects.filter(question=self).exclude(id__in=list(ids_to_keep)).delete()
         )
 
-        self.update_response_counts()
+        self.update_counts()
+
+        # Imported here as the response index module imports these models
+        from consultations.services.response_index import invalidate_response_index
+
+        invalidate_response_index(self.id)
 
         return SampleResult(kept=keep_count, deleted=delete_count)
 
@@ -246,6 +263,14 @@ class Respondent(UUIDPrimaryKeyModel, TimeStampedModel):
         return self.themefinder_id if self.themefinder_id else self.id
 
 
+def half_precision_embedding():
+    """
+    Response.embedding cast to halfvec. HNSW indexes cap vector at 2,000 dimensions,
+    so the index covers this expression and approximate searches must order by it.
+    """
+    return Cast("embedding", HalfVectorField(dimensions=settings.EMBEDDING_DIMENSION))
+
+
 class Response(UUIDPrimaryKeyModel, TimeStampedModel):
     """Response to a question - can include both free text and multiple choice"""
 
@@ -266,6 +291,12 @@ class Response(UUIDPrimaryKeyModel, TimeStampedModel):
         indexes: ClassVar[list] = [
             GinIndex(fields=["search_vector"]),
             models.Index(fields=["question", "id"]),
+            HnswIndex(
+                OpClass(half_precision_embedding(), name="halfvec_cosine_ops"),
+                name="response_embedding_hnsw",
+                m=16,
+                ef_construction=64,
+            ),
         ]
 
     def __str__(self):
@@ -349,6 +380,23 @@ class SelectedTheme(UUIDPrimaryKeyModel, TimeStampedModel):
     key = models.CharField(max_length=128, null=True, blank=True)
     version = models.IntegerField(default=1)
     last_modified_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    response_count = models.IntegerField(default=0)
+
+    @classmethod
+    def update_response_counts(cls, question):
+        """Update response_count for all themes belonging to a question."""
+        themes = list(
+            cls.objects.filter(question=question).annotate(_count=Count("responseannotationtheme"))
+        )
+        for theme in themes:
+            theme.response_count = theme._count
+        cls.objects.bulk_update(themes, ["response_count"])
+
+    @classmethod
+    def adjust_response_counts(cls, theme_ids, delta):
+        """Shift response_count for the given themes by delta, e.g. after a human review."""
+        if theme_ids:
+            cls.objects.filter(id__in=theme_ids).update(response_count=F("response_count") + delta)
 
     class Meta(UUIDPrimaryKeyModel.Meta, TimeStampedModel.Meta):
         constraints: ClassVar[list] = [
@@ -490,12 +538,17 @@ class ResponseAnnotation(UUIDPrimaryKeyModel, TimeStampedModel):
 
     def add_original_ai_themes(self, themes):
         """Add themes as original AI assignments"""
+        added_theme_ids = []
         for theme in themes:
-            ResponseAnnotationTheme.objects.get_or_create(
+            _, created = ResponseAnnotationTheme.objects.get_or_create(
                 response_annotation=self,
                 theme=theme,
                 defaults={"assigned_by": None},
             )
+            if created:
+                added_theme_ids.append(theme.id)
+
+        SelectedTheme.adjust_response_counts(added_theme_ids, 1)
 
     def set_human_reviewed_themes(self, themes, user):
         """Set themes as human-reviewed, will override original AI assignments"""
@@ -504,17 +557,22 @@ class ResponseAnnotation(UUIDPrimaryKeyModel, TimeStampedModel):
         current_theme_ids = {x.theme_id for x in self.responseannotationtheme_set.all()}
         proposed_theme_ids = {x.id for x in themes}
 
-        self.responseannotationtheme_set.filter(
-            theme_id__in=current_theme_ids - proposed_theme_ids
-        ).delete()
+        removed_theme_ids = current_theme_ids - proposed_theme_ids
+        added_theme_ids = proposed_theme_ids - current_theme_ids
+
+        self.responseannotationtheme_set.filter(theme_id__in=removed_theme_ids).delete()
 
-        for theme_id in proposed_theme_ids - current_theme_ids:
+        for theme_id in added_theme_ids:
             ResponseAnnotationTheme.objects.create(
                 response_annotation=self,
                 theme_id=theme_id,
                 assigned_by=user,
             )
 
+        # Keep the denormalised per-theme counts in step with the assignments
+        SelectedTheme.adjust_response_counts(removed_theme_ids, -1)
+        SelectedTheme.adjust_response_counts(added_theme_ids, 1)
+
     def get_original_ai_theme_ids(self):
         """Get IDs of themes originally assigned by AI.
 
@@ -574,6 +632,124 @@ class MultiChoiceAnswer(UUIDPrimaryKeyModel, TimeStampedModel):  # type: ignore[
         return f"{self.question.number} = {self.text}"
 
 
+class QuestionSentimentCount(UUIDPrimaryKeyModel, TimeStampedModel):
+    """Denormalised number of annotated responses per sentiment for a question"""
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    sentiment = models.CharField(max_length=12, choices=ResponseAnnotation.Sentiment.choices)
+    response_count = models.IntegerField(default=0)
+
+    @classmethod
+    def update_response_counts(cls, question):
+        """Recalculate the sentiment counts for a question, one row per sentiment."""
+        counts = dict(
+            ResponseAnnotation.objects.filter(response__question=question, sentiment__isnull=False)
+            .values_list("sentiment")
+            .annotate(c=Count("id"))
+            .values_list("sentiment", "c")
+        )
+        cls.objects.bulk_create(
+            [
+                cls(question=question, sentiment=sentiment, response_count=counts.get(sentiment, 0))
+                for sentiment in ResponseAnnotation.Sentiment.values
+            ],
+            update_conflicts=True,
+            unique_fields=["question", "sentiment"],
+            update_fields=["response_count", "modified_at"],
+        )
+
+    @classmethod
+    def adjust_response_count(cls, question_id, sentiment, delta):
+        """Shift the count for a single sentiment by delta, e.g. after a human review."""
+        if sentiment is None:
+            return
+        updated = cls.objects.filter(question_id=question_id, sentiment=sentiment).update(
+            response_count=F("response_count") + delta
+        )
+        if not updated:
+            cls.objects.create(
+                question_id=question_id, sentiment=sentiment, response_count=max(delta, 0)
+            )
+
+    class Meta(UUIDPrimaryKeyModel.Meta, TimeStampedModel.Meta):
+        constraints: ClassVar[list] = [
+            models.UniqueConstraint(
+                fields=["question", "sentiment"], name="unique_question_sentiment_count"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.question.number} {self.sentiment} = {self.response_count}"
+
+
+class QuestionDemographicCount(UUIDPrimaryKeyModel, TimeStampedModel):
+    """Denormalised number of respondents per demographic option that answered a question"""
+
+    question = models.ForeignKey(Question, on_delete=models.CASCADE)
+    demographic_option = models.ForeignKey(DemographicOption, on_delete=models.CASCADE)
+    response_count = models.IntegerField(default=0)
+
+    @classmethod
+    def update_response_counts(cls, question):
+        """Recalculate the demographic option counts for a question."""
+        respondent_ids = Response.objects.filter(question=question).values("respondent_id")
+        counts = (
+            Respondent.demographics.through.objects.filter(respondent_id__in=respondent_ids)
+            .values_list("demographicoption_id")
+            .annotate(c=Count("id"))
+            .values_list("demographicoption_id", "c")
+        )
+        cls.objects.filter(question=question).delete()
+        cls.objects.bulk_create(
+            [
+                cls(question=question, demographic_option_id=option_id, response_count=count)
+                for option_id, count in counts
+            ],
+            batch_size=1000,
+        )
+
+    class Meta(UUIDPrimaryKeyModel.Meta, TimeStampedModel.Meta):
+        constraints: ClassVar[list] = [
+            models.UniqueConstraint(
+                fields=["question", "demographic_option"],
+                name="unique_question_demographic_count",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.question.number} {self.demographic_option} = {self.response_count}"
+
+
+class TextEmbedding(UUIDPrimaryKeyModel, TimeStampedModel):
+    """
+    Embedding of a text, keyed by a hash of the text, model and dimension.
+    Shared across consultations so re-imports, clones and repeated answers are only
+    sent to the embedding model once.
+    """
+
+    text_hash = models.CharField(max_length=64, unique=True)
+    embedding = VectorField(dimensions=settings.EMBEDDING_DIMENSION)
+
+    @classmethod
+    def lookup(cls, text_hashes) -> dict:
+        """Stored embeddings for whichever of the hashes have been seen before."""
+        return dict(
+            cls.objects.filter(text_hash__in=set(text_hashes)).values_list("text_hash", "embedding")
+        )
+
+    @classmethod
+    def store(cls, embeddings: dict) -> None:
+        """Save newly created embeddings by hash, keeping any stored concurrently."""
+        cls.objects.bulk_create(
+            [cls(text_hash=key, embedding=embedding) for key, embedding in embeddings.items()],
+            ignore_conflicts=True,
+            batch_size=500,
+        )
+
+    def __str__(self):
+        return self.text_hash
+
+
 class FileUpload(UUIDPrimaryKeyModel, TimeStampedModel):  # type: ignore[misc]
     consultation = models.ForeignKey(Consultation, on_delete=models.CASCADE, editable=False)
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
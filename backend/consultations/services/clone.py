@@ -10,6 +10,8 @@ from consultations.models import (
     DemographicOption,
     MultiChoiceAnswer,
     Question,
+    QuestionDemographicCount,
+    QuestionSentimentCount,
     Respondent,
     Response,
     ResponseAnnotation,
@@ -169,6 +171,16 @@ def clone_consultation(original: Consultation) -> Consultation:
         [("question_id", question_map)],
     )
 
+    # Clone denormalised per-question counts
+    _clone(
+        QuestionDemographicCount.objects.filter(question__consultation=original),
+        [("question_id", question_map), ("demographic_option_id", demographic_map)],
+    )
+    _clone(
+        QuestionSentimentCount.objects.filter(question__consultation=original),
+        [("question_id", question_map)],
+    )
+
     # Clone selectedthemes and candidatethemes
     selected_theme_map = _clone(
         SelectedTheme.objects.filter(question__consultation=original),
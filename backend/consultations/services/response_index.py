@@ -0,0 +1,284 @@
+from contextlib import nullcontext
+from dataclasses import dataclass, field, replace
+from functools import cached_property
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from consultations.models import (
+    DemographicOption,
+    Response,
+    ResponseAnnotation,
+    ResponseAnnotationTheme,
+    ResponseReadBy,
+)
+from embeddings import LRUCache
+
+logger = settings.LOGGER
+
+
+def _to_bitmap(ordinals, size: int) -> int:
+    """Pack ordinals into an int bitmap via a bytearray, avoiding a big-int op per bit."""
+    buffer = bytearray((size + 7) // 8)
+    for ordinal in ordinals:
+        buffer[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(buffer, "little")
+
+
+@dataclass
+class ResponseBitmapIndex:
+    """
+    Bitmap index over the responses to a single question.
+
+    Each response is given a dense ordinal (its position when ordered by id) and each
+    filter value maps to a bitmap, held as a Python int with bit n set when response n
+    matches. Filters then combine with & and |, and counts are popcounts.
+
+    The version changes whenever the index does, so a copy held in process can be
+    checked against the shared cache without loading the index from it.
+    """
+
+    question_id: UUID
+    response_ids: list[UUID]
+    free_text: int
+    multiple_choice: int
+    sentiments: dict[str, int]
+    evidence_rich: dict[bool, int]
+    themes: dict[UUID, int]
+    demographics: dict[UUID, int]
+    demographic_fields: dict[UUID, str]
+    multiple_choice_answers: dict[UUID, int]
+    version: str = field(default_factory=lambda: uuid4().hex)
+
+    def __getstate__(self) -> dict:
+        # The ordinal map is rebuilt once per loaded index rather than stored
+        state = self.__dict__.copy()
+        state.pop("ordinals", None)
+        return state
+
+    @cached_property
+    def ordinals(self) -> dict[UUID, int]:
+        """Ordinal of each response id."""
+        return {response_id: i for i, response_id in enumerate(self.response_ids)}
+
+    @property
+    def all(self) -> int:
+        """Bitmap with every response in the question set."""
+        return (1 << len(self.response_ids)) - 1
+
+    @classmethod
+    def build(cls, question_id) -> "ResponseBitmapIndex":
+        """Build the index for a question from the database, one query per dimension."""
+        responses = Response.objects.filter(question_id=question_id)
+        response_ids = list(responses.order_by("id").values_list("id", flat=True))
+        ordinals = {response_id: i for i, response_id in enumerate(response_ids)}
+
+        def bitmap(ids) -> int:
+            return _to_bitmap((ordinals[response_id] for response_id in ids), len(ordinals))
+
+        def bitmaps(pairs) -> dict:
+            grouped: dict = {}
+            for response_id, key in pairs:
+                grouped.setdefault(key, []).append(ordinals[response_id])
+            return {key: _to_bitmap(values, len(ordinals)) for key, values in grouped.items()}
+
+        annotations = ResponseAnnotation.objects.filter(response__question_id=question_id)
+
+        index = cls(
+            question_id=question_id,
+            response_ids=response_ids,
+            free_text=bitmap(
+                responses.filter(free_text__isnull=False).values_list("id", flat=True)
+            ),
+            multiple_choice=bitmap(
+                responses.filter(chosen_options__isnull=False)
+                .values_list("id", flat=True)
+                .distinct()
+            ),
+            sentiments=bitmaps(
+                annotations.filter(sentiment__isnull=False).values_list("response_id", "sentiment")
+            ),
+            evidence_rich=bitmaps(
+                annotations.filter(evidence_rich__isnull=False).values_list(
+                    "response_id", "evidence_rich"
+                )
+            ),
+            themes=bitmaps(
+                ResponseAnnotationTheme.objects.filter(
+                    response_annotation__response__question_id=question_id
+                ).values_list("response_annotation__response_id", "theme_id")
+            ),
+            demographics=bitmaps(
+                responses.filter(respondent__demographics__isnull=False).values_list(
+                    "id", "respondent__demographics__id"
+                )
+            ),
+            demographic_fields=dict(
+                DemographicOption.objects.filter(
+                    consultation__question__id=question_id
+                ).values_list("id", "field_name")
+            ),
+            multiple_choice_answers=bitmaps(
+                responses.filter(chosen_options__isnull=False).values_list(
+                    "id", "chosen_options__id"
+                )
+            ),
+        )
+        index.ordinals = ordinals
+        return index
+
+    def bitmap_for(self, response_ids) -> int:
+        """Bitmap for an arbitrary set of response ids, ignoring ids outside the question."""
+        ordinals = self.ordinals
+        return _to_bitmap(
+            (ordinals[r] for r in response_ids if r in ordinals), len(self.response_ids)
+        )
+
+    def with_response(
+        self, response_id, sentiment, evidence_rich, theme_ids
+    ) -> "ResponseBitmapIndex":
+        """
+        Copy of the index with one response's annotation replaced, leaving this one
+        untouched for any request still reading it. Ids outside the question are ignored.
+        """
+        ordinal = self.ordinals.get(response_id)
+        if ordinal is None:
+            return self
+        bit = 1 << ordinal
+
+        def moved(bitmaps: dict, keys) -> dict:
+            updated = {key: bitmap & ~bit for key, bitmap in bitmaps.items()}
+            for key in keys:
+                updated[key] = updated.get(key, 0) | bit
+            return updated
+
+        index = replace(
+            self,
+            sentiments=moved(self.sentiments, [sentiment] if sentiment is not None else []),
+            evidence_rich=moved(
+                self.evidence_rich, [evidence_rich] if evidence_rich is not None else []
+            ),
+            themes=moved(self.themes, theme_ids),
+            version=uuid4().hex,
+        )
+        index.ordinals = self.ordinals
+        return index
+
+    def read_by(self, user) -> int:
+        """Bitmap of responses the user has read. Per-user so never cached."""
+        return self.bitmap_for(
+            ResponseReadBy.objects.filter(
+                user=user, response__question_id=self.question_id
+            ).values_list("response_id", flat=True)
+        )
+
+    def flagged_by(self, user) -> int:
+        """Bitmap of responses the user has flagged. Per-user so never cached."""
+        return self.bitmap_for(
+            ResponseAnnotation.objects.filter(
+                response__question_id=self.question_id, flagged_by=user
+            ).values_list("response_id", flat=True)
+        )
+
+    def ids(self, bitmap: int) -> list[UUID]:
+        """Response ids for the set bits of a bitmap, in id order."""
+        bits = format(bitmap, "b")[::-1]
+        return [self.response_ids[i] for i, bit in enumerate(bits) if bit == "1"]
+
+    @staticmethod
+    def count(bitmap: int) -> int:
+        return bitmap.bit_count()
+
+
+_loaded_indexes = LRUCache(
+    maxsize=settings.RESPONSE_INDEX_LRU_SIZE, ttl=settings.RESPONSE_INDEX_TIMEOUT
+)
+
+
+def _cache_key(question_id) -> str:
+    return f"response-bitmap-index:{question_id}"
+
+
+def _version_key(question_id) -> str:
+    return f"response-bitmap-index-version:{question_id}"
+
+
+def _store(cache, index: ResponseBitmapIndex) -> None:
+    # The index before its version, so a reader never sees a version with no index
+    cache.set(_cache_key(index.question_id), index, timeout=settings.RESPONSE_INDEX_TIMEOUT)
+    cache.set(
+        _version_key(index.question_id), index.version, timeout=settings.RESPONSE_INDEX_TIMEOUT
+    )
+    _loaded_indexes.set(index.question_id, index)
+
+
+def get_response_index(question_id) -> ResponseBitmapIndex:
+    """
+    Get the bitmap index for a question, building and caching it on a miss. A copy
+    loaded earlier in this process is reused while its version is still current, so
+    only the version is read from the shared cache.
+    """
+    cache = caches[settings.RESPONSE_INDEX_CACHE]
+
+    loaded = _loaded_indexes.get(question_id)
+    if loaded is not None and loaded.version == cache.get(_version_key(question_id)):
+        return loaded
+
+    index = cache.get(_cache_key(question_id))
+    if index is not None:
+        _loaded_indexes.set(question_id, index)
+        return index
+
+    index = ResponseBitmapIndex.build(question_id)
+    _store(cache, index)
+    logger.info(
+        "Built response bitmap index for question {question_id} with {response_count} responses",
+        question_id=question_id,
+        response_count=len(index.response_ids),
+    )
+    return index
+
+
+def invalidate_response_index(question_id) -> None:
+    """
+    Drop the cached index for a question after its responses change.
+    Deferred until commit so a concurrent request cannot re-cache the old state.
+    """
+    transaction.on_commit(
+        lambda: caches[settings.RESPONSE_INDEX_CACHE].delete_many(
+            [_cache_key(question_id), _version_key(question_id)]
+        )
+    )
+
+
+def _apply_response_edit(question_id, response_id) -> None:
+    cache = caches[settings.RESPONSE_INDEX_CACHE]
+    # Serialise edits to a question's index where the cache can lock, so concurrent
+    # reviews don't overwrite each other's changes
+    lock = (
+        cache.lock(f"{_cache_key(question_id)}:lock", timeout=10)
+        if hasattr(cache, "lock")
+        else nullcontext()
+    )
+    with lock:
+        index = cache.get(_cache_key(question_id))
+        if index is None:
+            # Nothing cached, so the next request builds from the committed state
+            return
+        annotation = ResponseAnnotation.objects.filter(response_id=response_id).values(
+            "sentiment", "evidence_rich"
+        ).first() or {"sentiment": None, "evidence_rich": None}
+        theme_ids = ResponseAnnotationTheme.objects.filter(
+            response_annotation__response_id=response_id
+        ).values_list("theme_id", flat=True)
+        _store(cache, index.with_response(response_id, theme_ids=theme_ids, **annotation))
+
+
+def update_response_in_index(question_id, response_id) -> None:
+    """
+    Apply a single response's annotation edit to the cached index in place of a full
+    rebuild. Deferred until commit so the edit is read back as saved.
+    """
+    transaction.on_commit(lambda: _apply_response_edit(question_id, response_id))
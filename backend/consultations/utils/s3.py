@@ -1,11 +1,22 @@
+import threading
+
 import boto3
 from botocore.config import Config
 from django.conf import settings
 
 logger = settings.LOGGER
 
+# boto3's default session isn't thread-safe, so serialise client creation
+_client_lock = threading.Lock()
+
+
 def get_s3_client(config: Config | None = None):
     config = config or Config()
+    with _client_lock:
+        return _create_s3_client(config)
+
+
+def _create_s3_client(config: Config):
     if settings.ENVIRONMENT.upper() in ["LOCAL", "TEST"]:
         base_config = Config(signature_version="s3v4")
         s3_client = boto3.client(
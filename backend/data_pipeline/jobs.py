@@ -117,6 +117,7 @@ def import_response_annotations(
         import_response_annotations_from_s3(
             consultation_code=consultation_code,
             timestamp=run_date,
+            max_workers=settings.ANNOTATION_IMPORT_MAX_WORKERS,
         )
     except Exception:
         logger.exception(
@@ -1,4 +1,7 @@
 import json
+import queue
+import threading
+from collections.abc import Iterator
 
 from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
@@ -8,6 +11,9 @@ from consultations.utils import s3 as s3_utils
 logger = settings.LOGGER
 account_id = settings.AWS_ACCOUNT_ID
 
+# Parsed lines iter_jsonl reads ahead of its consumer
+READ_AHEAD_LINES = 1_000
+
 
 def read_jsonl(
     bucket_name: str, key: str, raise_if_missing: bool = True
@@ -46,6 +52,80 @@ def read_jsonl(
     return objects
 
 
+def iter_jsonl(
+    bucket_name: str,
+    key: str,
+    raise_if_missing: bool = True,
+    read_ahead: int = READ_AHEAD_LINES,
+) -> Iterator[dict]:
+    """
+    Stream a JSONL file from S3, yielding one parsed object at a time.
+
+    A background thread downloads and parses up to read_ahead lines ahead of the
+    consumer, so the download overlaps with per-row work while memory stays bounded
+    however large the file is.
+    Args:
+        bucket_name: S3 bucket name
+        key: S3 key to JSONL file
+        raise_if_missing: If False, yield nothing instead of raising error
+        read_ahead: Maximum number of parsed lines buffered ahead of the consumer
+    Yields:
+        Parsed JSON objects (one per line)
+    Raises:
+        ClientError: If file doesn't exist and raise_if_missing=True
+    """
+    s3_client = s3_utils.get_s3_client()
+    try:
+        params = {
+            "Bucket": bucket_name,
+            "Key": key,
+        }
+
+        if settings.ENVIRONMENT.upper() not in ["LOCAL", "TEST"]:
+            params["ExpectedBucketOwner"] = settings.AWS_ACCOUNT_ID
+
+        response = s3_client.get_object(**params)
+    except ClientError as e:
+        if not raise_if_missing and e.response["Error"]["Code"] == "NoSuchKey":
+            logger.info("File not found (skipping): {key}", key=key)
+            return
+        raise
+
+    body = response["Body"]
+    buffer: queue.Queue = queue.Queue(maxsize=read_ahead)
+    finished = object()
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # Give up once the consumer has gone away rather than blocking forever
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read() -> None:
+        try:
+            for line in body.iter_lines():
+                if line and not put(json.loads(line.decode("utf-8"))):
+                    return
+            put(finished)
+        except Exception as e:  # noqa: BLE001 - re-raised by the consumer
+            put(e)
+
+    threading.Thread(target=read, name=f"iter_jsonl:{key}", daemon=True).start()
+    try:
+        while (item := buffer.get()) is not finished:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stopped.set()
+        body.close()
+
+
 def read_json(
     bucket_name: str, key: str, raise_if_missing: bool = True
 ) -> dict | None:
@@ -1,9 +1,15 @@
+import asyncio
+from collections.abc import Iterable, Iterator
+from itertools import chain
 from uuid import UUID
 
 import tiktoken
 from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
-from django.db import transaction
+from django.core.cache import caches
+from django.db import connection, transaction
+from pgvector import Vector
+from rq import Retry, get_current_job
 
 from authentication.models import User
 from consultations.models import (
@@ -13,7 +19,9 @@ from consultations.models import (
     Question,
     Respondent,
     Response,
+    TextEmbedding,
 )
+from consultations.services.response_index import invalidate_response_index
 from data_pipeline import s3
 from data_pipeline.models import (
     ConsultationDataBatch,
@@ -22,12 +30,17 @@ from data_pipeline.models import (
     RespondentInput,
     ResponseInput,
 )
-from embeddings import embed_text
+from embeddings import EMBEDDING_MAX_INPUT_TOKENS, embed_batches, text_hash
+from hosting_environment import HostingEnvironment
 from rq_context import job
 
 logger = settings.LOGGER
 encoding = tiktoken.encoding_for_model("text-embedding-3-small")
 DEFAULT_TIMEOUT_SECONDS = 3_600
+# Responses read per keyset page of the embedding job; progress is checkpointed per page
+EMBEDDING_PAGE_SIZE = 5_000
+EMBEDDING_WRITE_BATCH_SIZE = 500
+EMBEDDING_CHECKPOINT_TIMEOUT = 60 * 60 * 24 * 7
 ResponseThemeThroughModel = Response.chosen_options.through
 
 # =============================================================================
@@ -208,6 +221,97 @@ def load_multi_choice_from_s3(
     return multi_choices
 
 
+def iter_respondents_from_s3(consultation_code: str, bucket_name: str) -> Iterator[RespondentInput]:
+    """
+    Stream and validate respondents from S3 one at a time.
+
+    Args:
+        consultation_code: Consultation code
+        bucket_name: S3 bucket name
+
+    Yields:
+        Validated RespondentInput objects
+    """
+    key = f"app_data/consultations/{consultation_code}/inputs/respondents.jsonl"
+
+    logger.info("Streaming respondents from {key}", key=key)
+
+    count = 0
+    try:
+        for data in s3.iter_jsonl(bucket_name, key):
+            yield RespondentInput(**data)
+            count += 1
+    except (ClientError, BotoCoreError) as e:
+        logger.exception(
+            "Failed to load respondents file from S3: bucket={bucket}, key={key}",
+            bucket=bucket_name,
+            key=key,
+        )
+        if isinstance(e, ClientError) and e.response["Error"]["Code"] == "NoSuchKey":
+            raise ValueError(f"Respondents file not found: {key}") from e
+        raise
+
+    logger.info("Streamed and validated {respondent_count} respondents", respondent_count=count)
+
+
+def iter_responses_from_s3(
+    consultation_code: str, question_number: int, bucket_name: str
+) -> Iterator[ResponseInput]:
+    """
+    Stream and validate the free text responses for a question from S3, skipping
+    rows without text as load_responses_from_s3 does.
+    """
+    key = f"app_data/consultations/{consultation_code}/inputs/question_part_{question_number}/responses.jsonl"
+
+    count = 0
+    for data in s3.iter_jsonl(bucket_name, key, raise_if_missing=False):
+        if data.get("text"):
+            yield ResponseInput(**data)
+            count += 1
+
+    logger.info(
+        "Streamed {response_count} responses for question {question_number}",
+        response_count=count,
+        question_number=question_number,
+    )
+
+
+def iter_multi_choice_from_s3(
+    consultation_code: str, question_number: int, bucket_name: str
+) -> Iterator[MultiChoiceInput]:
+    """
+    Stream and validate the multi-choice selections for a question from S3, skipping
+    rows without options as load_multi_choice_from_s3 does.
+    """
+    key = f"app_data/consultations/{consultation_code}/inputs/question_part_{question_number}/multi_choice.jsonl"
+
+    count = 0
+    for data in s3.iter_jsonl(bucket_name, key, raise_if_missing=False):
+        if data.get("options"):
+            yield MultiChoiceInput(**data)
+            count += 1
+
+    logger.info(
+        "Streamed {multi_choice_count} multi-choice responses for question {question_number}",
+        multi_choice_count=count,
+        question_number=question_number,
+    )
+
+
+def list_question_numbers(consultation_code: str, bucket_name: str) -> list[int]:
+    """Sorted question numbers from the question_part_N folders of a consultation."""
+    inputs_path = f"app_data/consultations/{consultation_code}/inputs/"
+    question_folders = s3.get_question_folders(inputs_path, bucket_name)
+
+    if not question_folders:
+        raise ValueError(f"No question folders found at {inputs_path}")
+
+    # folder looks like: "app_data/.../question_part_1/"
+    return sorted(
+        int(folder.split("/")[-2].replace("question_part_", "")) for folder in question_folders
+    )
+
+
 def load_consultation_data_batch(
     consultation_code: str,
     consultation_title: str,
@@ -242,20 +346,7 @@ def load_consultation_data_batch(
     respondents = load_respondents_from_s3(consultation_code, bucket_name)
 
     # Discover question folders
-    inputs_path = f"app_data/consultations/{consultation_code}/inputs/"
-    question_folders = s3.get_question_folders(inputs_path, bucket_name)
-
-    if not question_folders:
-        raise ValueError(f"No question folders found at {inputs_path}")
-
-    # Extract question numbers from folder paths
-    question_numbers = []
-    for folder in question_folders:
-        # folder looks like: "app_data/.../question_part_1/"
-        question_num_str = folder.split("/")[-2].replace("question_part_", "")
-        question_numbers.append(int(question_num_str))
-
-    question_numbers.sort()
+    question_numbers = list_question_numbers(consultation_code, bucket_name)
 
     # Load questions
     questions = []
@@ -309,7 +400,10 @@ def load_consultation_data_batch(
 
 @transaction.atomic
 def import_consultation_data(
-    batch: ConsultationDataBatch, user_id: UUID, batch_size: int = 512
+    batch: ConsultationDataBatch,
+    user_id: UUID,
+    batch_size: int = 512,
+    use_copy: bool | None = None,
 ) -> UUID:
     """
     Import base consultation data (consultation, respondents, questions, responses) into database.
@@ -330,6 +424,8 @@ def import_consultation_data(
     Args:
         batch: Validated consultation data batch from S3
         user_id: User ID to associate with consultation
+        use_copy: Load respondents and responses with COPY and set-based SQL rather
+            than the ORM (defaults to settings.CONSULTATION_IMPORT_USE_COPY)
 
     Returns:
         UUID of created/updated consultation
@@ -343,41 +439,147 @@ def import_consultation_data(
     )
 
     # 1. Create or update consultation
+    consultation = _get_or_create_consultation(
+        batch.consultation_code, batch.consultation_title, user_id
+    )
+
+    if use_copy is None:
+        use_copy = settings.CONSULTATION_IMPORT_USE_COPY
+
+    # 2. Create respondents with demographics
+    if use_copy:
+        _copy_respondents(consultation, batch.respondents)
+    else:
+        _ingest_respondents(consultation, batch.respondents)
+
+    # 3. Create questions with multi-choice options
+    _ingest_questions(consultation, batch.questions)
+
+    # 4. Create responses (free text and multi-choice)
+    if use_copy:
+        _copy_responses(consultation, batch.responses_by_question, batch.multi_choice_by_question)
+    else:
+        _ingest_responses(
+            consultation, batch.responses_by_question, batch.multi_choice_by_question, batch_size
+        )
+    DemographicOption.update_response_counts(consultation)
+
+    logger.info(
+        "Completed consultation data ingestion for {consultation_code}",
+        consultation_code=consultation.code,
+    )
+    return consultation.id
+
+
+@transaction.atomic
+def import_consultation_data_from_s3(
+    consultation_code: str,
+    consultation_title: str,
+    user_id: UUID,
+    bucket_name: str | None = None,
+    batch_size: int = 512,
+    use_copy: bool | None = None,
+) -> UUID:
+    """
+    Import base consultation data straight from S3, one question at a time.
+
+    Unlike load_consultation_data_batch followed by import_consultation_data, only
+    one question's files are read at a time and, with use_copy, rows are streamed
+    from S3 into the database without being held in memory, so worker memory stays
+    flat however large the consultation is.
+
+    Args:
+        consultation_code: S3 folder code
+        consultation_title: Display name
+        user_id: User ID to associate with consultation
+        bucket_name: S3 bucket name (defaults to settings.AWS_BUCKET_NAME)
+        use_copy: Load respondents and responses with COPY and set-based SQL rather
+            than the ORM (defaults to settings.CONSULTATION_IMPORT_USE_COPY)
+
+    Returns:
+        UUID of created/updated consultation
+    """
+    if bucket_name is None:
+        bucket_name = settings.AWS_BUCKET_NAME
+    if use_copy is None:
+        use_copy = settings.CONSULTATION_IMPORT_USE_COPY
+
+    logger.info(
+        "Starting streaming ingestion for {consultation_code}",
+        consultation_code=consultation_code,
+    )
+
+    question_numbers = list_question_numbers(consultation_code, bucket_name)
+    consultation = _get_or_create_consultation(consultation_code, consultation_title, user_id)
+
+    respondents = iter_respondents_from_s3(consultation_code, bucket_name)
+    if use_copy:
+        _copy_respondents(consultation, respondents)
+    else:
+        _ingest_respondents(consultation, list(respondents))
+
+    _ingest_questions(
+        consultation,
+        [
+            load_question_from_s3(consultation_code, question_number, bucket_name)
+            for question_number in question_numbers
+        ],
+    )
+
+    for question_number in question_numbers:
+        responses = iter_responses_from_s3(consultation_code, question_number, bucket_name)
+        multi_choices = iter_multi_choice_from_s3(consultation_code, question_number, bucket_name)
+        if use_copy:
+            _copy_responses(
+                consultation, {question_number: responses}, {question_number: multi_choices}
+            )
+        else:
+            _ingest_responses(
+                consultation,
+                {question_number: list(responses)},
+                {question_number: list(multi_choices)},
+                batch_size,
+            )
+    DemographicOption.update_response_counts(consultation)
+
+    logger.info(
+        "Completed streaming ingestion for {consultation_code}",
+        consultation_code=consultation.code,
+    )
+    return consultation.id
+
+
+def _get_or_create_consultation(
+    consultation_code: str, consultation_title: str, user_id: UUID
+) -> Consultation:
+    """Create the consultation, or retitle an existing one, and add the user to it."""
     consultation, created = Consultation.objects.get_or_create(
-        code=batch.consultation_code,
+        code=consultation_code,
         defaults={
-            "title": batch.consultation_title,
+            "title": consultation_title,
         },
     )
 
     if not created:
         logger.warning(
             "Consultation {consultation_code} already exists, updating...",
-            consultation_code=batch.consultation_code,
+            consultation_code=consultation_code,
         )
-        consultation.title = batch.consultation_title
+        consultation.title = consultation_title
         consultation.save()
 
     # Add user to consultation
     user = User.objects.get(id=user_id)
     consultation.users.add(user)
+    return consultation
 
-    # 2. Create respondents with demographics
-    _ingest_respondents(consultation, batch.respondents)
-
-    # 3. Create questions with multi-choice options
-    _ingest_questions(consultation, batch.questions)
-
-    # 4. Create responses (free text and multi-choice)
-    _ingest_responses(
-        consultation, batch.responses_by_question, batch.multi_choice_by_question, batch_size
-    )
 
-    logger.info(
-        "Completed consultation data ingestion for {consultation_code}",
-        consultation_code=consultation.code,
-    )
-    return consultation.id
+def _invalidate_response_indexes(consultation: Consultation) -> None:
+    """Drop the cached response index of every question in the consultation."""
+    for question_id in Question.objects.filter(consultation=consultation).values_list(
+        "id", flat=True
+    ):
+        invalidate_response_index(question_id)
 
 
 def _ingest_respondents(consultation: Consultation, respondents: list[RespondentInput]) -> None:
@@ -399,6 +601,7 @@ def _ingest_respondents(consultation: Consultation, respondents: list[Respondent
             "Deleting {existing_count} existing respondents for idempotency",
             existing_count=existing_count,
         )
+        _invalidate_response_indexes(consultation)
         Respondent.objects.filter(consultation=consultation).delete()
 
     # Create respondents
@@ -509,7 +712,13 @@ def _ingest_responses(
         r.themefinder_id: r for r in Respondent.objects.filter(consultation=consultation)
     }
 
-    question_lookup = {q.number: q for q in Question.objects.filter(consultation=consultation)}
+    question_lookup = {
+        q.number: q
+        for q in Question.objects.filter(
+            consultation=consultation,
+            number__in=responses_by_question.keys() | multi_choice_by_question.keys(),
+        )
+    }
 
     # Process each question
     for question_number, question in question_lookup.items():
@@ -553,19 +762,9 @@ def _ingest_responses(
                 logger.warning("No respondent found for themefinder_id {tf_id}", tf_id=tf_id)
                 continue
 
-            free_text = data["free_text"]
-            if free_text in ("", "Not Provided", "-"):
-                free_text = None
-
+            free_text = _clean_free_text(data["free_text"], tf_id)
             # Calculate tokens for free text
-            if free_text:
-                token_count = len(encoding.encode(free_text))
-                if token_count > 8192:
-                    logger.warning("Truncated text for themefinder_id: {tf_id}", tf_id=tf_id)
-                    free_text = free_text[:1000]
-                    token_count = len(encoding.encode(free_text))
-            else:
-                token_count = 0
+            token_count = len(encoding.encode(free_text)) if free_text else 0
 
             # Batch by token count or size
             if (
@@ -616,8 +815,255 @@ def _ingest_responses(
         # Update denormalised response counts
         MultiChoiceAnswer.update_response_counts(question)
         question.update_response_counts()
+        invalidate_response_index(question.id)
 
-    DemographicOption.update_response_counts(consultation)
+    logger.info("Completed response ingestion")
+
+
+# =============================================================================
+# COPY IMPORT - Set-based ingestion for large consultations
+# =============================================================================
+
+
+def _clean_free_text(free_text: str | None, tf_id: int) -> str | None:
+    """Drop placeholder answers and truncate over-length ones, for both import paths."""
+    if free_text in ("", "Not Provided", "-"):
+        return None
+    # A token is at least one byte, so only texts this long can exceed the limit
+    if free_text and len(free_text.encode()) > 8192 and len(encoding.encode(free_text)) > 8192:
+        logger.warning("Truncated text for themefinder_id: {tf_id}", tf_id=tf_id)
+        return free_text[:1000]
+    return free_text
+
+
+def _copy_rows(cursor, table: str, columns: list[str], types: list[str], rows) -> int:
+    """Stream rows into a table with COPY, returning how many were written."""
+    count = 0
+    with cursor.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN") as copy:
+        copy.set_types(types)
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def _respondent_rows(respondents: Iterable[RespondentInput]):
+    """One row per demographic value, or a single empty row for respondents without any."""
+    for respondent in respondents:
+        values = [
+            (field_name, field_value)
+            for field_name, field_values in respondent.demographic_data.items()
+            for field_value in field_values
+        ]
+        for field_name, field_value in values or [(None, None)]:
+            yield respondent.themefinder_id, field_name, field_value
+
+
+def _copy_respondents(consultation: Consultation, respondents: Iterable[RespondentInput]) -> None:
+    """
+    Create respondents and their demographics with COPY into a staging table and
+    set-based inserts, instead of a get_or_create per demographic value.
+
+    This deletes existing respondents for idempotency, as _ingest_respondents does.
+    """
+    logger.info("Copying respondents")
+    _invalidate_response_indexes(consultation)
+    Respondent.objects.filter(consultation=consultation).delete()
+
+    respondent_table = Respondent._meta.db_table
+    option_table = DemographicOption._meta.db_table
+    demographics_table = Respondent.demographics.through._meta.db_table
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMPORARY TABLE staging_respondent (
+                themefinder_id integer NOT NULL,
+                field_name text,
+                field_value text
+            ) ON COMMIT DROP
+        """)
+        _copy_rows(
+            cursor,
+            "staging_respondent",
+            ["themefinder_id", "field_name", "field_value"],
+            ["int4", "text", "text"],
+            _respondent_rows(respondents),
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {respondent_table}
+                (id, created_at, modified_at, consultation_id, themefinder_id)
+            SELECT gen_random_uuid(), NOW(), NOW(), %s, themefinder_id
+            FROM staging_respondent
+            GROUP BY themefinder_id
+            """,  # nosec B608
+            [consultation.id],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {option_table}
+                (id, created_at, modified_at, consultation_id, field_name, field_value,
+                 response_count)
+            SELECT gen_random_uuid(), NOW(), NOW(), %s, field_name, to_jsonb(field_value), 0
+            FROM (
+                SELECT DISTINCT field_name, field_value
+                FROM staging_respondent
+                WHERE field_name IS NOT NULL
+            ) AS options
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {option_table} AS existing
+                WHERE existing.consultation_id = %s
+                AND existing.field_name = options.field_name
+                AND existing.field_value = to_jsonb(options.field_value)
+            )
+            """,  # nosec B608
+            [consultation.id, consultation.id],
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {demographics_table} (respondent_id, demographicoption_id)
+            SELECT DISTINCT respondent.id, option.id
+            FROM staging_respondent AS staging
+            JOIN {respondent_table} AS respondent
+                ON respondent.consultation_id = %s
+                AND respondent.themefinder_id = staging.themefinder_id
+            JOIN {option_table} AS option
+                ON option.consultation_id = %s
+                AND option.field_name = staging.field_name
+                AND option.field_value = to_jsonb(staging.field_value)
+            """,  # nosec B608
+            [consultation.id, consultation.id],
+        )
+
+    logger.info(
+        "Created {respondent_count} respondents",
+        respondent_count=Respondent.objects.filter(consultation=consultation).count(),
+    )
+
+
+def _copy_responses(
+    consultation: Consultation,
+    responses_by_question: dict[int, Iterable[ResponseInput]],
+    multi_choice_by_question: dict[int, Iterable[MultiChoiceInput]],
+) -> None:
+    """
+    Create responses with COPY into a staging table, then one set-based insert into
+    responses (computing search_vector in the same pass) and one into the
+    multi-choice through table.
+
+    Free text and multi-choice rows for the same respondent are merged in SQL, and
+    rows whose themefinder_id has no respondent are skipped, as in _ingest_responses.
+    """
+    logger.info("Copying responses")
+
+    response_table = Response._meta.db_table
+    respondent_table = Respondent._meta.db_table
+    question_table = Question._meta.db_table
+    answer_table = MultiChoiceAnswer._meta.db_table
+    chosen_options_table = ResponseThemeThroughModel._meta.db_table
+
+    free_text_rows = (
+        (
+            question_number,
+            response.themefinder_id,
+            _clean_free_text(response.text, response.themefinder_id),
+            None,
+        )
+        for question_number, responses in responses_by_question.items()
+        for response in responses
+    )
+    multi_choice_rows = (
+        (question_number, multi_choice.themefinder_id, None, multi_choice.options)
+        for question_number, multi_choices in multi_choice_by_question.items()
+        for multi_choice in multi_choices
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMPORARY TABLE staging_response (
+                question_number integer NOT NULL,
+                themefinder_id integer NOT NULL,
+                free_text text,
+                options text[]
+            ) ON COMMIT DROP
+        """)
+        row_count = _copy_rows(
+            cursor,
+            "staging_response",
+            ["question_number", "themefinder_id", "free_text", "options"],
+            ["int4", "int4", "text", "text[]"],
+            chain(free_text_rows, multi_choice_rows),
+        )
+        logger.info("Copied {row_count} response rows to staging", row_count=row_count)
+
+        cursor.execute(
+            f"""
+            SELECT DISTINCT staging.themefinder_id
+            FROM staging_response AS staging
+            LEFT JOIN {respondent_table} AS respondent
+                ON respondent.consultation_id = %s
+                AND respondent.themefinder_id = staging.themefinder_id
+            WHERE respondent.id IS NULL
+            """,  # nosec B608
+            [consultation.id],
+        )
+        for (tf_id,) in cursor.fetchall():
+            logger.warning("No respondent found for themefinder_id {tf_id}", tf_id=tf_id)
+
+        cursor.execute(
+            f"""
+            INSERT INTO {response_table}
+                (id, created_at, modified_at, respondent_id, question_id, free_text,
+                 search_vector)
+            SELECT
+                gen_random_uuid(), NOW(), NOW(), respondent.id, question.id, merged.free_text,
+                CASE WHEN merged.free_text IS NOT NULL
+                    THEN to_tsvector('english', merged.free_text)
+                END
+            FROM (
+                SELECT question_number, themefinder_id, MAX(free_text) AS free_text
+                FROM staging_response
+                GROUP BY question_number, themefinder_id
+            ) AS merged
+            JOIN {question_table} AS question
+                ON question.consultation_id = %s AND question.number = merged.question_number
+            JOIN {respondent_table} AS respondent
+                ON respondent.consultation_id = %s
+                AND respondent.themefinder_id = merged.themefinder_id
+            """,  # nosec B608
+            [consultation.id, consultation.id],
+        )
+        logger.info("Created {response_count} responses", response_count=cursor.rowcount)
+
+        cursor.execute(
+            f"""
+            INSERT INTO {chosen_options_table} (response_id, multichoiceanswer_id)
+            SELECT DISTINCT response.id, answer.id
+            FROM staging_response AS staging
+            CROSS JOIN LATERAL unnest(staging.options) AS option(text)
+            JOIN {question_table} AS question
+                ON question.consultation_id = %s AND question.number = staging.question_number
+            JOIN {respondent_table} AS respondent
+                ON respondent.consultation_id = %s
+                AND respondent.themefinder_id = staging.themefinder_id
+            JOIN {response_table} AS response
+                ON response.question_id = question.id AND response.respondent_id = respondent.id
+            JOIN {answer_table} AS answer
+                ON answer.question_id = question.id AND answer.text = option.text
+            """,  # nosec B608
+            [consultation.id, consultation.id],
+        )
+
+        cursor.execute("DROP TABLE staging_response")
+
+    # Update denormalised response counts
+    for question in Question.objects.filter(
+        consultation=consultation,
+        number__in=responses_by_question.keys() | multi_choice_by_question.keys(),
+    ):
+        MultiChoiceAnswer.update_response_counts(question)
+        question.update_response_counts()
+        invalidate_response_index(question.id)
 
     logger.info("Completed response ingestion")
 
@@ -627,50 +1073,157 @@ def _ingest_responses(
 # =============================================================================
 
 
-@job("default", timeout=DEFAULT_TIMEOUT_SECONDS)
+def batch_by_tokens(
+    texts: list[str], max_tokens: int | None = None, max_inputs: int | None = None
+) -> list[list[str]]:
+    """
+    Split texts, in order, into embedding requests within the API's per-request input
+    and token limits. Texts over the model's per-input token limit are truncated.
+    """
+    max_tokens = max_tokens or settings.EMBEDDING_BATCH_MAX_TOKENS
+    max_inputs = max_inputs or settings.EMBEDDING_BATCH_MAX_INPUTS
+
+    batches: list[list[str]] = []
+    batch: list[str] = []
+    batch_tokens = 0
+    for text, tokens in zip(texts, encoding.encode_ordinary_batch(texts), strict=True):
+        if len(tokens) > EMBEDDING_MAX_INPUT_TOKENS:
+            tokens = tokens[:EMBEDDING_MAX_INPUT_TOKENS]
+            text = encoding.decode(tokens)
+        if batch and (batch_tokens + len(tokens) > max_tokens or len(batch) >= max_inputs):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += len(tokens)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def write_embeddings(response_ids: list[UUID], embeddings: list[list[float]]) -> None:
+    """
+    Write response embeddings and refresh their search vectors with a single
+    UPDATE ... FROM (VALUES ...) per chunk, rather than bulk_update's CASE per row.
+    """
+    table = Response._meta.db_table
+    for start in range(0, len(response_ids), EMBEDDING_WRITE_BATCH_SIZE):
+        ids = response_ids[start : start + EMBEDDING_WRITE_BATCH_SIZE]
+        vectors = embeddings[start : start + EMBEDDING_WRITE_BATCH_SIZE]
+        values = ", ".join(["(%s::uuid, %s::vector)"] * len(ids))
+        params = [
+            param
+            for response_id, vector in zip(ids, vectors, strict=True)
+            for param in (response_id, Vector(vector).to_text())
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} AS response
+                SET embedding = v.embedding,
+                    search_vector = to_tsvector(COALESCE(response.free_text, ''))
+                FROM (VALUES {values}) AS v(id, embedding)
+                WHERE response.id = v.id
+                """,
+                params,
+            )
+
+
+def embed_with_store(texts: list[str]) -> tuple[list, int]:
+    """
+    Embeddings for texts, in order, reusing any already in the TextEmbedding store.
+    Texts are keyed by the hash of exactly what is embedded, and each unseen text is
+    sent to the embedding model once. Returns the embeddings and how many texts were
+    newly embedded.
+
+    Outside a deployed environment texts get placeholder vectors, which are never
+    written to the store.
+    """
+    hashes = [text_hash(text) for text in texts]
+    embeddings = TextEmbedding.lookup(hashes)
+
+    unseen: dict[str, str] = {}
+    for key, text in zip(hashes, texts, strict=True):
+        if key not in embeddings:
+            unseen.setdefault(key, text)
+    if unseen:
+        batches = asyncio.run(embed_batches(batch_by_tokens(list(unseen.values()))))
+        created = dict(zip(unseen, chain.from_iterable(batches), strict=True))
+        if HostingEnvironment.is_deployed():
+            TextEmbedding.store(created)
+        embeddings |= created
+
+    return [embeddings[key] for key in hashes], len(unseen)
+
+
+def _embedding_checkpoint_key(question_id: UUID, job_id: str) -> str:
+    return f"embedding-checkpoint:{question_id}:{job_id}"
+
+
+@job("default", timeout=DEFAULT_TIMEOUT_SECONDS, retry=Retry(max=3, interval=60))
 def create_embeddings_for_question(question_id: UUID) -> None:
     """
     Create embeddings for all responses to a question.
 
-    This is designed to be run as an async job via django-rq.
+    This is designed to be run as an async job via django-rq. Responses are read in
+    id order with keyset pagination, packed into token-aware requests that are sent
+    concurrently, and the last written id is checkpointed after each page so a
+    crashed or retried job resumes where it stopped.
+
+    The checkpoint is keyed by the job, which keeps its id when retried, so a later
+    job, e.g. after a re-import gives responses new ids, never skips responses
+    behind a cursor saved by an earlier one. Run outside a worker, nothing is
+    checkpointed.
 
     Args:
         question_id: UUID of the question
     """
-    from django.contrib.postgres.search import SearchVector
+    question = Question.objects.get(id=question_id)
+    checkpoints = caches[settings.EMBEDDING_CHECKPOINT_CACHE]
+    current_job = get_current_job()
+    checkpoint_key = _embedding_checkpoint_key(question_id, current_job.id) if current_job else None
 
     queryset = Response.objects.filter(question_id=question_id, free_text__isnull=False)
-    total = queryset.count()
-    batch_size = 1_000
+    last_id = checkpoints.get(checkpoint_key) if checkpoint_key else None
+    if last_id:
+        logger.info(
+            "Resuming embeddings for question {question_id} after response {last_id}",
+            question_id=question_id,
+            last_id=last_id,
+        )
+        queryset = queryset.filter(id__gt=last_id)
 
     logger.info(
         "Creating embeddings for {total} responses in question {question_id}",
-        total=total,
+        total=queryset.count(),
         question_id=question_id,
     )
 
-    for i in range(0, total, batch_size):
-        responses = queryset.order_by("id")[i : i + batch_size]
-
-        free_texts = [
-            f"Question: {response.question.text} \nAnswer: {response.free_text}"
-            for response in responses
-        ]
-
-        embeddings = embed_text(free_texts)
-
-        for response, embedding in zip(responses, embeddings):
-            response.embedding = embedding
-            response.search_vector = SearchVector("free_text")
+    page_num = 0
+    while page := list(
+        queryset.order_by("id").values_list("id", "free_text")[:EMBEDDING_PAGE_SIZE]
+    ):
+        page_num += 1
+        response_ids = [response_id for response_id, _ in page]
+        embeddings, embedded_count = embed_with_store(
+            [f"Question: {question.text} \nAnswer: {free_text}" for _, free_text in page]
+        )
+        write_embeddings(response_ids, embeddings)
 
-        Response.objects.bulk_update(responses, ["embedding", "search_vector"])
+        if checkpoint_key:
+            checkpoints.set(checkpoint_key, response_ids[-1], timeout=EMBEDDING_CHECKPOINT_TIMEOUT)
+        queryset = queryset.filter(id__gt=response_ids[-1])
 
         logger.info(
-            "Created embeddings for batch {batch_num} of question {question_id}",
-            batch_num=i // batch_size + 1,
+            "Created embeddings for page {page_num} of question {question_id}, "
+            "{embedded_count} of {response_count} texts not previously embedded",
+            page_num=page_num,
             question_id=question_id,
+            embedded_count=embedded_count,
+            response_count=len(page),
         )
 
+    if checkpoint_key:
+        checkpoints.delete(checkpoint_key)
     logger.info("Completed embedding creation for question {question_id}", question_id=question_id)
 
 
@@ -685,12 +1238,13 @@ def import_consultation_from_s3(
     user_id: UUID,
     enqueue_embeddings: bool = False,  # Whether to enqueue embedding jobs after import (default False for consultation setup for now)
     batch_size: int = 512,
+    use_copy: bool | None = None,
 ) -> UUID:
     """
     Import consultation base data from S3.
 
     This orchestrates:
-    1. Loading data from S3
+    1. Streaming data from S3 one question at a time
     2. Validating with Pydantic
     3. Ingesting into Django models
     4. Optionally enqueueing async jobs for embeddings
@@ -700,21 +1254,22 @@ def import_consultation_from_s3(
         consultation_title: Display name
         user_id: User ID to associate
         enqueue_embeddings: Whether to enqueue embedding jobs (default True)
+        use_copy: Ingest with COPY and set-based SQL (see import_consultation_data_from_s3)
 
     Returns:
         Consultation UUID
     """
     logger.info("Starting S3 import for {consultation_code}", consultation_code=consultation_code)
 
-    # Load and validate data from S3
-    batch = load_consultation_data_batch(
+    # Stream, validate and import consultation data into the database
+    consultation_id = import_consultation_data_from_s3(
         consultation_code=consultation_code,
         consultation_title=consultation_title,
+        user_id=user_id,
+        batch_size=batch_size,
+        use_copy=use_copy,
     )
 
-    # Import consultation data into database
-    consultation_id = import_consultation_data(batch, user_id, batch_size)
-
     # Enqueue async jobs for embeddings
     if enqueue_embeddings:
         consultation = Consultation.objects.get(id=consultation_id)
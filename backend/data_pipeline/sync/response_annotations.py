@@ -1,7 +1,11 @@
 
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
-from django.db import transaction
+from django.db import connections, transaction
 
 from consultations.models import (
     Consultation,
@@ -9,6 +13,7 @@ from consultations.models import (
     ResponseAnnotation,
     SelectedTheme,
 )
+from consultations.services.response_index import invalidate_response_index
 from data_pipeline import s3
 from data_pipeline.models import (
     AnnotationBatch,
@@ -264,6 +269,7 @@ def load_annotation_batch(
     timestamp: str,
     question_numbers: list[int] | None = None,
     bucket_name: str | None = None,
+    max_workers: int = 1,
 ) -> AnnotationBatch:
     """
     Load all response annotations for a consultation, organized by question.
@@ -273,6 +279,7 @@ def load_annotation_batch(
         timestamp: The timestamp folder identifying the mapping run
         question_numbers: Optional list of question numbers to load (defaults to all questions in consultation)
         bucket_name: S3 bucket name (defaults to settings.AWS_BUCKET_NAME)
+        max_workers: Number of S3 files fetched concurrently (default 1, sequential)
 
     Returns:
         AnnotationBatch with all annotations organized by question number
@@ -322,31 +329,36 @@ def load_annotation_batch(
     mappings_by_question: dict[int, list[ThemeMappingInput]] = {}
     selected_themes_by_question: dict[int, list[SelectedThemeInput]] = {}
 
-    for question_number in question_numbers:
-        # Load selected themes (required)
-        themes = load_selected_themes_from_s3(
-            consultation_code, question_number, timestamp, bucket_name_str
-        )
-        selected_themes_by_question[question_number] = themes
+    # Each question has four files: selected themes, sentiments (optional), detail
+    # detections and theme mappings. Every GET is independent, so fetch them all at once.
+    loaders = [
+        load_selected_themes_from_s3,
+        load_sentiments_from_s3,
+        load_detail_detections_from_s3,
+        load_theme_mappings_from_s3,
+    ]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            (question_number, loader): executor.submit(
+                loader, consultation_code, question_number, timestamp, bucket_name_str
+            )
+            for question_number in question_numbers
+            for loader in loaders
+        }
+        results = {key: future.result() for key, future in futures.items()}
 
-        # Load sentiments (optional)
-        sentiments = load_sentiments_from_s3(
-            consultation_code, question_number, timestamp, bucket_name_str
-        )
-        if sentiments:
+    for question_number in question_numbers:
+        selected_themes_by_question[question_number] = results[
+            question_number, load_selected_themes_from_s3
+        ]
+        if sentiments := results[question_number, load_sentiments_from_s3]:
             sentiments_by_question[question_number] = sentiments
-
-        # Load detail detections (required)
-        details = load_detail_detections_from_s3(
-            consultation_code, question_number, timestamp, bucket_name_str
-        )
-        details_by_question[question_number] = details
-
-        # Load theme mappings (required)
-        mappings = load_theme_mappings_from_s3(
-            consultation_code, question_number, timestamp, bucket_name_str
-        )
-        mappings_by_question[question_number] = mappings
+        details_by_question[question_number] = results[
+            question_number, load_detail_detections_from_s3
+        ]
+        mappings_by_question[question_number] = results[
+            question_number, load_theme_mappings_from_s3
+        ]
 
     # Create batch object
     batch = AnnotationBatch(
@@ -617,28 +629,86 @@ def _import_response_annotations(
         question_number=question.number,
     )
 
+    # Refresh the denormalised theme and sentiment counts served to the dashboard
+    question.update_annotation_counts()
+    invalidate_response_index(question.id)
 
-@transaction.atomic
-def import_response_annotations(batch: AnnotationBatch) -> None:
-    """
-    Import all response annotations from a batch into the database.
 
-    This is the main import function that:
-    1. Validates that the consultation exists
-    2. Updates the consultation's timestamp
-    3. For each question:
-       a. Imports selected themes
-       b. Imports response annotations (sentiment, evidence, theme mappings)
+def _import_question(
+    consultation: Consultation, question_number: int, batch: AnnotationBatch
+) -> None:
+    """Import one question's selected theme mappings, sentiments and detail detections."""
+    question = Question.objects.get(consultation=consultation, number=question_number)
+    # Build lookup from batch theme_keys to database SelectedTheme records
+    theme_lookup = _build_batch_key_to_db_theme_lookup(
+        question, batch.selected_themes_by_question[question_number]
+    )
+    _import_response_annotations(
+        question,
+        batch.sentiments_by_question.get(question_number, []),
+        batch.details_by_question.get(question_number, []),
+        batch.mappings_by_question.get(question_number, []),
+        theme_lookup,
+    )
 
-    This function is idempotent - can safely re-run to update annotations.
 
-    Args:
-        batch: AnnotationBatch containing all annotations to import
+def _import_questions_serially(
+    consultation: Consultation, question_numbers: list[int], batch: AnnotationBatch
+) -> None:
+    for question_number in question_numbers:
+        _import_question(consultation, question_number, batch)
 
-    Raises:
-        ValueError: If consultation doesn't exist or questions are missing
+
+def _import_question_annotations(
+    consultation: Consultation, question_number: int, batch: AnnotationBatch
+) -> None:
+    """Import one question's annotations in its own transaction, closing the thread's connection."""
+    try:
+        with transaction.atomic():
+            _import_question(consultation, question_number, batch)
+    finally:
+        # Worker threads each open their own connection; don't leave them idle
+        connections.close_all()
+
+
+def _import_questions_concurrently(
+    consultation: Consultation,
+    question_numbers: list[int],
+    batch: AnnotationBatch,
+    max_workers: int,
+) -> None:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            question_number: executor.submit(
+                _import_question_annotations, consultation, question_number, batch
+            )
+            for question_number in question_numbers
+        }
+
+    failed = {}
+    for question_number, future in futures.items():
+        if error := future.exception():
+            logger.error(
+                "Annotation import failed for question {question_number}: {error}",
+                question_number=question_number,
+                error=error,
+            )
+            failed[question_number] = error
+    if failed:
+        raise ValueError(
+            f"Annotation import failed for questions {sorted(failed)}; "
+            f"consultation timestamp left at '{consultation.timestamp}'"
+        ) from next(iter(failed.values()))
+
+
+def _import_annotation_batch(
+    batch: AnnotationBatch,
+    import_questions: Callable[[Consultation, list[int], AnnotationBatch], None],
+) -> None:
+    """
+    Import a batch with the given strategy for importing its questions, then update
+    the consultation's timestamp and stage, so they only mark a complete import.
     """
-    # Get consultation
     try:
         consultation = Consultation.objects.get(code=batch.consultation_code)
     except Consultation.DoesNotExist:
@@ -647,55 +717,80 @@ def import_response_annotations(batch: AnnotationBatch) -> None:
             "Base consultation data must be imported before annotations."
         )
 
+    question_numbers = list(batch.selected_themes_by_question)
+    missing = set(question_numbers) - set(
+        Question.objects.filter(consultation=consultation, number__in=question_numbers).values_list(
+            "number", flat=True
+        )
+    )
+    if missing:
+        raise ValueError(
+            f"Questions {sorted(missing)} do not exist for consultation '{batch.consultation_code}'. "
+            "Base consultation data must be imported before annotations."
+        )
+
     logger.info(
-        "Starting annotation import for consultation '{consultation_title}'",
+        "Starting annotation import for consultation '{consultation_title}' "
+        "across {question_count} questions",
         consultation_title=consultation.title,
+        question_count=len(question_numbers),
     )
 
-    # Update consultation timestamp
-    if consultation.timestamp != batch.timestamp:
-        logger.info(
-            "Updating consultation timestamp from '{old_timestamp}' to '{new_timestamp}'",
-            old_timestamp=consultation.timestamp,
-            new_timestamp=batch.timestamp,
-        )
-        consultation.timestamp = batch.timestamp
-        consultation.save(update_fields=["timestamp"])
+    import_questions(consultation, question_numbers, batch)
 
-    # Import data for each question
-    questions_processed = 0
+    logger.info(
+        "Response annotations import complete for {questions_processed} questions",
+        questions_processed=len(question_numbers),
+    )
 
-    for question_number in batch.selected_themes_by_question:
-        # Get question
-        try:
-            question = Question.objects.get(consultation=consultation, number=question_number)
-        except Question.DoesNotExist:
-            raise ValueError(
-                f"Question {question_number} does not exist for consultation '{batch.consultation_code}'. "
-                "Base consultation data must be imported before annotations."
-            )
+    consultation.timestamp = batch.timestamp
+    consultation.stage = Consultation.Stage.ANALYSIS
+    consultation.save(update_fields=["timestamp", "stage"])
 
-        # Build lookup from batch theme_keys to database SelectedTheme records
-        themes_for_question = batch.selected_themes_by_question[question_number]
-        theme_lookup = _build_batch_key_to_db_theme_lookup(question, themes_for_question)
 
-        # Import response annotations
-        sentiments = batch.sentiments_by_question.get(question_number, [])
-        details = batch.details_by_question.get(question_number, [])
-        mappings = batch.mappings_by_question.get(question_number, [])
+@transaction.atomic
+def import_response_annotations(batch: AnnotationBatch) -> None:
+    """
+    Import all response annotations from a batch into the database.
 
-        _import_response_annotations(question, sentiments, details, mappings, theme_lookup)
+    This is the main import function that:
+    1. Validates that the consultation and its questions exist
+    2. For each question:
+       a. Imports selected themes
+       b. Imports response annotations (sentiment, evidence, theme mappings)
+    3. Updates the consultation's timestamp and stage
 
-        questions_processed += 1
+    This function is idempotent - can safely re-run to update annotations.
 
-    logger.info(
-        "Response annotations import complete for {questions_processed} questions",
-        questions_processed=questions_processed,
-    )
+    Args:
+        batch: AnnotationBatch containing all annotations to import
 
-    # Update consultation stage to ANALYSIS now that annotations are imported
-    consultation.stage = Consultation.Stage.ANALYSIS
-    consultation.save(update_fields=["stage"])
+    Raises:
+        ValueError: If consultation doesn't exist or questions are missing
+    """
+    _import_annotation_batch(batch, _import_questions_serially)
+
+
+def import_response_annotations_concurrently(batch: AnnotationBatch, max_workers: int) -> None:
+    """
+    Import response annotations with each question in its own transaction, up to
+    max_workers questions at a time, each on its own database connection.
+
+    The consultation's timestamp and stage are only updated once every question has
+    been imported, so they mark a consistent import. If any question fails the
+    others stay committed and a re-run (which is idempotent per question) completes
+    the import.
+
+    Args:
+        batch: AnnotationBatch containing all annotations to import
+        max_workers: Number of questions imported concurrently
+
+    Raises:
+        ValueError: If consultation or questions don't exist, or any question fails
+    """
+    _import_annotation_batch(
+        batch, partial(_import_questions_concurrently, max_workers=max_workers)
+    )
 
 
 # ============================================================================
@@ -707,6 +802,7 @@ def import_response_annotations_from_s3(
     consultation_code: str,
     timestamp: str,
     question_numbers: list[int] | None = None,
+    max_workers: int = 1,
 ) -> None:
     """
     High-level orchestration function to import response annotations from S3.
@@ -720,6 +816,8 @@ def import_response_annotations_from_s3(
         consultation_code: The consultation folder name in S3
         timestamp: The timestamp folder identifying the mapping run
         question_numbers: Optional list of question numbers to import (defaults to all)
+        max_workers: Fetch S3 files and import questions this many at a time, each
+            question in its own transaction (default 1 imports in a single transaction)
 
     Raises:
         ValidationError: If S3 data doesn't match expected schema
@@ -736,10 +834,14 @@ def import_response_annotations_from_s3(
         consultation_code=consultation_code,
         timestamp=timestamp,
         question_numbers=question_numbers,
+        max_workers=max_workers,
     )
 
     # Import into database
-    import_response_annotations(batch)
+    if max_workers > 1:
+        import_response_annotations_concurrently(batch, max_workers)
+    else:
+        import_response_annotations(batch)
 
     logger.info(
         "Response annotations import complete for consultation '{consultation_code}'",
@@ -1,13 +1,25 @@
+import asyncio
+import hashlib
 import os
 import random
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
 
 from django.conf import settings
-from openai import AzureOpenAI
+from django.core.cache import caches
+from openai import AsyncAzureOpenAI, AzureOpenAI
 
 from hosting_environment import HostingEnvironment
 
 hosting_environment = HostingEnvironment()
 
+EMBEDDING_MODEL = "text-embedding-3-large"
+# Per-input token limit of the embedding model; longer inputs are rejected
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+
 
 def _uniform_vector(txt):
     seed = hash(txt) % (2**32)  # Ensure positive 32-bit integer
@@ -15,15 +27,19 @@ def _uniform_vector(txt):
     return [random.uniform(-1, 1) for _ in range(settings.EMBEDDING_DIMENSION)]
 
 
+def _client_kwargs() -> dict:
+    return {
+        "azure_endpoint": os.environ["LLM_GATEWAY_URL"],
+        "api_key": os.environ["LITELLM_CONSULT_OPENAI_API_KEY"],
+        "api_version": os.environ.get("OPENAI_API_VERSION", "2024-12-01-preview"),
+    }
+
+
 def embed_text(text: str | list[str]) -> list[float] | list[list[float]]:
     if hosting_environment.is_deployed():
-        client = AzureOpenAI(
-            azure_endpoint=os.environ["LLM_GATEWAY_URL"],
-            api_key=os.environ["LITELLM_CONSULT_OPENAI_API_KEY"],
-            api_version=os.environ.get("OPENAI_API_VERSION", "2024-12-01-preview"),
-        )
+        client = AzureOpenAI(**_client_kwargs())
         response = client.embeddings.create(
-            input=text, model="text-embedding-3-large", dimensions=settings.EMBEDDING_DIMENSION
+            input=text, model=EMBEDDING_MODEL, dimensions=settings.EMBEDDING_DIMENSION
         )
         if isinstance(text, str):
             return response.data[0].embedding
@@ -33,3 +49,98 @@ def embed_text(text: str | list[str]) -> list[float] | list[list[float]]:
     if isinstance(text, list):
         return list(map(_uniform_vector, text))
     raise ValueError(f"expected str or list[str] not {type(text)}")
+
+
+async def embed_batches(batches: list[list[str]]) -> list[list[list[float]]]:
+    """
+    Embed several batches of texts concurrently, with at most EMBEDDING_MAX_CONCURRENCY
+    requests in flight. The client retries rate limits, timeouts and server errors
+    with exponential backoff, up to EMBEDDING_MAX_RETRIES times per request.
+    """
+    if not hosting_environment.is_deployed():
+        return [list(map(_uniform_vector, batch)) for batch in batches]
+
+    semaphore = asyncio.Semaphore(settings.EMBEDDING_MAX_CONCURRENCY)
+
+    async with AsyncAzureOpenAI(
+        **_client_kwargs(), max_retries=settings.EMBEDDING_MAX_RETRIES
+    ) as client:
+
+        async def embed(batch: list[str]) -> list[list[float]]:
+            async with semaphore:
+                response = await client.embeddings.create(
+                    input=batch, model=EMBEDDING_MODEL, dimensions=settings.EMBEDDING_DIMENSION
+                )
+            return [item.embedding for item in response.data]
+
+        return await asyncio.gather(*(embed(batch) for batch in batches))
+
+
+class LRUCache:
+    """Small thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_query_embeddings = LRUCache(
+    maxsize=settings.QUERY_EMBEDDING_LRU_SIZE, ttl=settings.QUERY_EMBEDDING_TIMEOUT
+)
+
+
+def text_hash(text: str) -> str:
+    """Content hash of a text as embedded, for the model and dimension it is embedded with."""
+    key = f"{EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSION}:{text}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _query_embedding_key(text: str) -> str:
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return f"query-embedding:{EMBEDDING_MODEL}:{settings.EMBEDDING_DIMENSION}:{digest}"
+
+
+def embed_query(text: str) -> list[float]:
+    """
+    Embed a search query, checking an in-process LRU and then the shared cache
+    before calling the embedding model, so repeated and paginated searches skip
+    the round-trip. The key is the query exactly as typed and embedded.
+    """
+    key = _query_embedding_key(text)
+
+    if (embedding := _query_embeddings.get(key)) is not None:
+        return embedding
+
+    cache = caches[settings.QUERY_EMBEDDING_CACHE]
+    embedding = cache.get(key)
+    if embedding is None:
+        embedding = embed_text(text)
+        cache.set(key, embedding, timeout=settings.QUERY_EMBEDDING_TIMEOUT)
+
+    _query_embeddings.set(key, embedding)
+    return embedding
@@ -378,6 +378,9 @@ def create_response_annotations(
     # Bulk create theme assignments
     theme_assignments = ResponseAnnotationTheme.objects.bulk_create(theme_assignments_to_create)
 
+    # Update question's theme and sentiment counts
+    selected_themes[0].question.update_annotation_counts()
+
     return (len(annotations), len(theme_assignments))
 
 
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Benchmark exact vs approximate (HNSW) semantic search.
+
+Creates a throwaway consultation with a single question whose responses carry random
+clustered embeddings, then runs the same query vectors through every searchRecall
+level and reports median/p95 latency and recall@k against the exact ranking.
+
+Usage:
+    python scripts/semantic_search_benchmark.py --num-of-responses 1000000
+    python scripts/semantic_search_benchmark.py --question-id <uuid> --num-of-queries 50
+
+Generating 1M responses at 3,072 dimensions writes ~6GB of half-precision index and
+takes a while; use --keep and --question-id to re-run queries against the same data.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Setup Django environment
+sys.path.insert(0, str(Path(__file__).parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings.local")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.db import transaction
+
+from consultations.api.filters import SEARCH_RECALL_CHOICES, order_by_semantic_distance
+from consultations.models import Consultation, Question, Respondent, Response
+
+BATCH_SIZE = 1000
+NUM_CLUSTERS = 200
+
+
+def random_unit_vectors(rng: np.random.Generator, n: int, centres: np.ndarray) -> np.ndarray:
+    """Vectors scattered around random cluster centres, so neighbourhoods are meaningful."""
+    vectors = centres[rng.integers(len(centres), size=n)] + rng.normal(
+        scale=0.3, size=(n, centres.shape[1])
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def create_synthetic_question(
+    num_responses: int, rng: np.random.Generator, centres: np.ndarray
+) -> Question:
+    consultation = Consultation.objects.create(
+        title="Semantic search benchmark", code=f"semantic-benchmark-{int(time.time())}"
+    )
+    question = Question.objects.create(
+        consultation=consultation, number=1, text="Benchmark question", has_free_text=True
+    )
+
+    start = time.perf_counter()
+    for offset in range(0, num_responses, BATCH_SIZE):
+        size = min(BATCH_SIZE, num_responses - offset)
+        respondents = Respondent.objects.bulk_create(
+            Respondent(consultation=consultation, themefinder_id=offset + i) for i in range(size)
+        )
+        Response.objects.bulk_create(
+            Response(
+                question=question,
+                respondent=respondent,
+                free_text=f"Synthetic response {respondent.themefinder_id}",
+                embedding=vector,
+            )
+            for respondent, vector in zip(
+                respondents, random_unit_vectors(rng, size, centres), strict=True
+            )
+        )
+        print(f"  {offset + size:,}/{num_responses:,} responses", end="\r")
+
+    print(f"\n✓ Created {num_responses:,} responses in {time.perf_counter() - start:.1f}s")
+    return question
+
+
+def run_benchmark(question: Question, queries: np.ndarray, top_k: int) -> None:
+    responses = Response.objects.filter(question=question)
+
+    def search(query, recall) -> tuple[list, float]:
+        start = time.perf_counter()
+        # The HNSW options are SET LOCAL, so they only apply inside a transaction
+        with transaction.atomic():
+            ranked = order_by_semantic_distance(responses, query, recall)
+            ids = list(ranked.values_list("id", flat=True)[:top_k])
+        return ids, (time.perf_counter() - start) * 1000
+
+    exact = [search(query, "exact") for query in queries]
+
+    print(f"\n{'recall level':<14}{'median ms':>12}{'p95 ms':>12}{'recall@' + str(top_k):>12}")
+    for recall in SEARCH_RECALL_CHOICES:
+        results = exact if recall == "exact" else [search(query, recall) for query in queries]
+        latencies = sorted(ms for _, ms in results)
+        recalls = [
+            len(set(ids) & set(expected)) / max(len(expected), 1)
+            for (ids, _), (expected, _) in zip(results, exact, strict=True)
+        ]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(
+            f"{recall:<14}{statistics.median(latencies):>12.1f}{p95:>12.1f}"
+            f"{statistics.mean(recalls):>12.3f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="semantic_search_benchmark",
+        description="Compare exact and HNSW semantic search latency and recall",
+    )
+    parser.add_argument(
+        "--num-of-responses",
+        type=int,
+        default=1_000_000,
+        help="Number of synthetic responses to generate (default: 1000000)",
+    )
+    parser.add_argument(
+        "--num-of-queries",
+        type=int,
+        default=20,
+        help="Number of query vectors to run per recall level (default: 20)",
+    )
+    parser.add_argument(
+        "--top-k", type=int, default=100, help="Page size to compare (default: 100)"
+    )
+    parser.add_argument(
+        "--question-id", type=str, help="Benchmark an existing question instead of generating one"
+    )
+    parser.add_argument(
+        "--keep", action="store_true", help="Keep the generated consultation for later runs"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    centres = rng.normal(size=(NUM_CLUSTERS, settings.EMBEDDING_DIMENSION))
+
+    if args.question_id:
+        question = Question.objects.get(id=args.question_id)
+    else:
+        question = create_synthetic_question(args.num_of_responses, rng, centres)
+
+    try:
+        run_benchmark(question, random_unit_vectors(rng, args.num_of_queries, centres), args.top_k)
+    finally:
+        if not args.question_id and not args.keep:
+            question.consultation.delete()
+        elif not args.question_id:
+            print(f"\nKept question {question.id} (pass --question-id to re-run)")
+
+
+if __name__ == "__main__":
+    main()
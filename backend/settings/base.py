@@ -286,6 +286,21 @@ CACHES = {
     },
 }
 
+# Per-question response bitmap indexes used to resolve filters and filtered counts
+RESPONSE_INDEX_CACHE = env.str("RESPONSE_INDEX_CACHE", "redis")
+RESPONSE_INDEX_TIMEOUT = env.int("RESPONSE_INDEX_TIMEOUT", 300)
+RESPONSE_INDEX_LRU_SIZE = env.int("RESPONSE_INDEX_LRU_SIZE", 64)
+
+# Search query embeddings, cached in-process (LRU) and in the shared cache
+QUERY_EMBEDDING_CACHE = env.str("QUERY_EMBEDDING_CACHE", "redis")
+QUERY_EMBEDDING_TIMEOUT = env.int("QUERY_EMBEDDING_TIMEOUT", 60 * 60 * 24)
+QUERY_EMBEDDING_LRU_SIZE = env.int("QUERY_EMBEDDING_LRU_SIZE", 512)
+
+# Short-lived ranked id snapshots for paging through semantic search results
+SEARCH_SNAPSHOT_CACHE = env.str("SEARCH_SNAPSHOT_CACHE", "redis")
+SEARCH_SNAPSHOT_TIMEOUT = env.int("SEARCH_SNAPSHOT_TIMEOUT", 60 * 10)
+SEARCH_SNAPSHOT_MAX_RESULTS = env.int("SEARCH_SNAPSHOT_MAX_RESULTS", 5000)
+
 # rq
 RQ_QUEUES = {
     "default": {
@@ -300,6 +315,22 @@ if DEBUG:
 # changing this will require a database migration
 EMBEDDING_DIMENSION = 3072
 
+# Response embedding job: requests are packed up to these limits (the API allows
+# 2,048 inputs and 300k tokens per request) and sent a few at a time
+EMBEDDING_BATCH_MAX_INPUTS = env.int("EMBEDDING_BATCH_MAX_INPUTS", 2048)
+EMBEDDING_BATCH_MAX_TOKENS = env.int("EMBEDDING_BATCH_MAX_TOKENS", 100_000)
+EMBEDDING_MAX_CONCURRENCY = env.int("EMBEDDING_MAX_CONCURRENCY", 4)
+EMBEDDING_MAX_RETRIES = env.int("EMBEDDING_MAX_RETRIES", 5)
+# Progress checkpoints let a re-run embedding job resume where it stopped
+EMBEDDING_CHECKPOINT_CACHE = env.str("EMBEDDING_CHECKPOINT_CACHE", "redis")
+
+# Load consultation respondents and responses with COPY and set-based SQL
+CONSULTATION_IMPORT_USE_COPY = env.bool("CONSULTATION_IMPORT_USE_COPY", False)
+
+# Questions fetched from S3 and imported concurrently when importing response
+# annotations, each in its own transaction; 1 imports everything in one transaction
+ANNOTATION_IMPORT_MAX_WORKERS = env.int("ANNOTATION_IMPORT_MAX_WORKERS", 1)
+
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 100,
@@ -19,6 +19,13 @@ STORAGES["default"] = {
 for queueConfig in RQ_QUEUES.values():
     queueConfig["ASYNC"] = False
 
+# Build response bitmap indexes per request so tests see their own writes
+RESPONSE_INDEX_CACHE = "default"
+RESPONSE_INDEX_TIMEOUT = 0
+QUERY_EMBEDDING_CACHE = "default"
+SEARCH_SNAPSHOT_CACHE = "default"
+EMBEDDING_CHECKPOINT_CACHE = "default"
+
 # Use memory email backend for tests
 EMAIL_BACKEND = "django.core.mail.backends.locmem.EmailBackend"
 
@@ -1,7 +1,15 @@
 import pytest
 from django.conf import settings
-
-from consultations.api.filters import ResponseSearchFilter, get_filtered_responses
+from django.db import connection, transaction
+
+from consultations.api.filters import (
+    ResponseSearchFilter,
+    ResponseSearchSerializer,
+    exact_semantic_ordering,
+    get_filtered_response_bitmap,
+    get_filtered_responses,
+    order_by_semantic_distance,
+)
 from consultations.models import Response
 
 
@@ -234,3 +242,168 @@ def test_demographics_filter_and_across_groups_or_within(free_text_question):
         question_id=free_text_question.id,
     )
     assert results.count() == 2
+
+
+@pytest.mark.django_db
+def test_bitmap_filters_match_queryset_filters(
+    free_text_question, theme_a, theme_b, individual_demographic, group_demographic
+):
+    """get_filtered_response_bitmap resolves the same responses as the ResponseFilter queryset"""
+    from factories import RespondentFactory, ResponseAnnotationFactoryNoThemes
+
+    consultation = free_text_question.consultation
+    rows = [
+        ("AGREEMENT", True, [theme_a, theme_b], individual_demographic),
+        ("AGREEMENT", False, [theme_a], group_demographic),
+        ("DISAGREEMENT", True, [theme_b], individual_demographic),
+        ("UNCLEAR", False, [], None),
+    ]
+    for sentiment, evidence_rich, themes, demographic in rows:
+        respondent = RespondentFactory(consultation=consultation)
+        if demographic:
+            respondent.demographics.add(demographic)
+        response = Response.objects.create(
+            respondent=respondent, question=free_text_question, free_text=sentiment
+        )
+        annotation = ResponseAnnotationFactoryNoThemes(
+            response=response, sentiment=sentiment, evidence_rich=evidence_rich
+        )
+        annotation.add_original_ai_themes(themes)
+
+    for params in [
+        {},
+        {"sentimentFilters": "AGREEMENT,UNCLEAR"},
+        {"evidenceRich": "true"},
+        {"evidenceRich": "false"},
+        {"themeFilters": f"{theme_a.id},{theme_b.id}"},
+        {"themeFilters": str(theme_b.id), "sentimentFilters": "DISAGREEMENT"},
+        {"demographics": f"{individual_demographic.id},{group_demographic.id}"},
+        {"demographics": str(group_demographic.id), "themeFilters": str(theme_a.id)},
+    ]:
+        index, bitmap = get_filtered_response_bitmap(params, free_text_question.id)
+        expected = get_filtered_responses(params, consultation.id, free_text_question.id)
+        assert set(index.ids(bitmap)) == set(expected.values_list("id", flat=True)), params
+        assert index.count(bitmap) == expected.count(), params
+
+
+@pytest.mark.django_db
+def test_bitmap_and_search_fallback_apply_the_same_user_filters(free_text_question):
+    """Flagged and unseen filters narrow aggregates the same way with or without search"""
+    from factories import RespondentFactory, ResponseAnnotationFactoryNoThemes, UserFactory
+
+    user = UserFactory()
+    responses = [
+        Response.objects.create(
+            respondent=RespondentFactory(consultation=free_text_question.consultation),
+            question=free_text_question,
+            free_text=f"climate answer {i}",
+        )
+        for i in range(4)
+    ]
+    for response in responses:
+        ResponseAnnotationFactoryNoThemes(response=response)
+    responses[0].annotation.flagged_by.add(user)
+    responses[1].annotation.flagged_by.add(user)
+    responses[1].mark_as_read_by(user)
+    responses[2].mark_as_read_by(user)
+
+    consultation_id = free_text_question.consultation.id
+    # every response matches the search, so it changes the path but not the result
+    search = {"searchMode": "keyword", "searchValue": "climate"}
+    for params in [
+        {"is_flagged": "true"},
+        {"is_flagged": "false"},
+        {"unseenResponsesOnly": "true"},
+        {"unseenResponsesOnly": "false"},
+        {"is_flagged": "true", "unseenResponsesOnly": "true"},
+    ]:
+        index, bitmap = get_filtered_response_bitmap(params, free_text_question.id, user)
+        fallback = get_filtered_responses(
+            {**params, **search}, consultation_id, free_text_question.id, user=user
+        )
+        assert set(index.ids(bitmap)) == set(fallback.values_list("id", flat=True)), params
+        assert index.count(bitmap) == fallback.count(), params
+
+    # with no user, both paths ignore the user-scoped filters
+    params = {"is_flagged": "true", "unseenResponsesOnly": "true"}
+    index, bitmap = get_filtered_response_bitmap(params, free_text_question.id)
+    fallback = get_filtered_responses({**params, **search}, consultation_id, free_text_question.id)
+    assert index.count(bitmap) == fallback.count() == 4
+
+
+@pytest.mark.django_db
+def test_bitmap_filters_fall_back_for_search(free_text_question):
+    """Search needs the database, so no bitmap is resolved"""
+    params = {"searchMode": "keyword", "searchValue": "climate"}
+    assert get_filtered_response_bitmap(params, free_text_question.id) is None
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("recall", ["exact", "fast", "balanced", "high"])
+def test_order_by_semantic_distance(respondent_1, free_text_question, recall):
+    """Exact and HNSW-backed approximate searches rank responses by cosine distance"""
+    for i, vector in enumerate([[0, 1], [1, 1], [1, 0]]):
+        Response.objects.create(
+            respondent=respondent_1,
+            question=free_text_question,
+            free_text=f"Response {i}",
+            embedding=pad_vector(vector),
+        )
+
+    queryset = order_by_semantic_distance(
+        Response.objects.filter(question=free_text_question), pad_vector([1, 0]), recall
+    )
+
+    assert [r.free_text for r in queryset] == ["Response 2", "Response 1", "Response 0"]
+    assert queryset.first().distance == pytest.approx(0, abs=1e-3)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_hnsw_search_options_are_local_to_the_transaction():
+    """SET LOCAL options end with the transaction, so they never leak onto the connection"""
+
+    def ef_search():
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting('hnsw.ef_search', true)")
+            return cursor.fetchone()[0]
+
+    before = ef_search()
+    with transaction.atomic():
+        order_by_semantic_distance(Response.objects.all(), pad_vector([1, 0]), "high")
+        assert ef_search() == "400"
+    assert ef_search() == before
+
+
+@pytest.mark.django_db
+def test_exact_semantic_ordering_includes_responses_without_embeddings(
+    respondent_1, free_text_question
+):
+    """The exact re-ordering keeps the approximate distances and sorts missing embeddings last"""
+    for i, vector in enumerate([[0, 1], None, [1, 0]]):
+        Response.objects.create(
+            respondent=respondent_1,
+            question=free_text_question,
+            free_text=f"Response {i}",
+            embedding=pad_vector(vector) if vector else None,
+        )
+    approximate = order_by_semantic_distance(
+        Response.objects.filter(question=free_text_question), pad_vector([1, 0]), "balanced"
+    )
+
+    exact = exact_semantic_ordering(approximate)
+
+    assert [(r.free_text, r.distance) for r in exact] == [
+        ("Response 2", pytest.approx(0, abs=1e-3)),
+        ("Response 0", pytest.approx(1, abs=1e-3)),
+        ("Response 1", None),
+    ]
+
+
+def test_search_serializer_accepts_semantic_recall():
+    serializer = ResponseSearchSerializer(
+        data={"searchMode": "semantic", "searchValue": "trains", "searchRecall": "high"}
+    )
+    assert serializer.is_valid(), serializer.errors
+
+    serializer = ResponseSearchSerializer(data={"searchMode": "semantic", "searchRecall": "max"})
+    assert not serializer.is_valid()
@@ -1,4 +1,7 @@
+from unittest.mock import patch
+
 import pytest
+from django.db import connection
 from django.urls import reverse
 from rest_framework_simplejwt.tokens import RefreshToken
 
@@ -138,6 +141,45 @@ class TestQuestionViewSet:
         themes = {t["name"]: t["count"] for t in response.json()["themes"]}
         assert themes["Theme A"] == 1
 
+    def test_get_sentiments_with_counts(
+        self, client, staff_user_token, free_text_question, individual_demographic
+    ):
+        """Test sentiments endpoint serves stored counts and recomputes them when filtered"""
+        respondent1 = RespondentFactory(consultation=free_text_question.consultation)
+        respondent1.demographics.set([individual_demographic])
+        respondent2 = RespondentFactory(consultation=free_text_question.consultation)
+        response1 = ResponseFactory(question=free_text_question, respondent=respondent1)
+        response2 = ResponseFactory(question=free_text_question, respondent=respondent2)
+        ResponseAnnotationFactoryNoThemes(response=response1, sentiment="AGREEMENT")
+        ResponseAnnotationFactoryNoThemes(response=response2, sentiment="DISAGREEMENT")
+        free_text_question.update_annotation_counts()
+
+        url = reverse(
+            "question-sentiments",
+            kwargs={
+                "consultation_pk": free_text_question.consultation.id,
+                "pk": free_text_question.id,
+            },
+        )
+        response = client.get(
+            url,
+            headers={"Authorization": f"Bearer {staff_user_token}"},
+        )
+
+        assert response.status_code == 200
+        sentiments = {s["sentiment"]: s["count"] for s in response.json()["sentiments"]}
+        assert sentiments == {"AGREEMENT": 1, "DISAGREEMENT": 1, "UNCLEAR": 0}
+
+        response = client.get(
+            url,
+            query_params={"demographics": individual_demographic.pk},
+            headers={"Authorization": f"Bearer {staff_user_token}"},
+        )
+
+        assert response.status_code == 200
+        sentiments = {s["sentiment"]: s["count"] for s in response.json()["sentiments"]}
+        assert sentiments == {"AGREEMENT": 1, "DISAGREEMENT": 0, "UNCLEAR": 0}
+
     def test_get_free_text_question(self, client, staff_user, free_text_question, staff_user_token):
         """Test API endpoint returns question information correctly"""
         # Add a known response count with free text
@@ -802,3 +844,34 @@ class TestQuestionResponseViewSet:
         assert response.status_code == 200
         data = response.json()
         assert data["all_respondents"][0]["identifier"] == str(respondent1.identifier)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("view", ["question-detail", "question-themes", "question-sentiments"])
+def test_semantic_search_counts_run_in_a_transaction(
+    client, staff_user_token, free_text_question, view
+):
+    """The SET LOCAL search options only apply to a search evaluated in a transaction"""
+    ResponseFactory(question=free_text_question, free_text="Climate policy is important")
+    url = reverse(
+        view,
+        kwargs={
+            "consultation_pk": free_text_question.consultation.id,
+            "pk": free_text_question.id,
+        },
+    )
+
+    in_transaction = []
+    with patch(
+        "consultations.api.filters._set_hnsw_search_options",
+        side_effect=lambda ef_search: in_transaction.append(connection.in_atomic_block),
+    ):
+        response = client.get(
+            url,
+            query_params={"searchValue": "policy", "searchMode": "semantic"},
+            headers={"Authorization": f"Bearer {staff_user_token}"},
+        )
+
+    assert response.status_code == 200
+    assert in_transaction
+    assert all(in_transaction)
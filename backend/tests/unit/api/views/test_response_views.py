@@ -5,8 +5,20 @@ import orjson
 import pytest
 from django.urls import reverse
 
-from consultations.api.views.response import MAX_BULK_MARK_READ
-from consultations.models import ResponseAnnotation, ResponseAnnotationTheme, ResponseReadBy
+from consultations.api.filters import exact_semantic_ordering, order_by_semantic_distance
+from consultations.api.views.response import (
+    MAX_BULK_MARK_READ,
+    _semantic_page,
+    _semantic_position,
+)
+from consultations.models import (
+    QuestionSentimentCount,
+    Response,
+    ResponseAnnotation,
+    ResponseAnnotationTheme,
+    ResponseReadBy,
+)
+from embeddings import embed_text
 from factories import (
     ConsultationFactory,
     QuestionFactory,
@@ -160,6 +172,175 @@ class TestResponseViewSet:
         data = orjson.loads(response.content)
         assert "total_count" not in data
 
+    @pytest.mark.parametrize("search_recall", ["balanced", "exact"])
+    def test_semantic_search_keyset_pagination(
+        self, client, staff_user_token, free_text_question, search_recall
+    ):
+        """Semantic pages seek past the (distance, id) of the last row, including ties"""
+        shared_embedding = embed_text("shared")
+        for i in range(6):
+            respondent = RespondentFactory(consultation=free_text_question.consultation)
+            ResponseFactory(
+                question=free_text_question,
+                respondent=respondent,
+                embedding=shared_embedding if i % 2 else embed_text(f"response {i}"),
+            )
+
+        url = reverse(
+            "response-list",
+            kwargs={"consultation_pk": free_text_question.consultation.id},
+        )
+        params = {
+            "question_id": free_text_question.id,
+            "searchMode": "semantic",
+            "searchValue": "public transport",
+            "searchRecall": search_recall,
+        }
+        auth = {"Authorization": f"Bearer {staff_user_token}"}
+
+        everything = orjson.loads(client.get(url, query_params=params, headers=auth).content)
+        expected_ids = [response["id"] for response in everything["all_respondents"]]
+        assert len(expected_ids) == 6
+
+        paged_ids, cursor = [], None
+        while True:
+            page = client.get(
+                url,
+                query_params={**params, "page_size": 2, **({"cursor": cursor} if cursor else {})},
+                headers=auth,
+            )
+            assert page.status_code == 200
+            data = orjson.loads(page.content)
+            paged_ids += [response["id"] for response in data["all_respondents"]]
+            cursor = data["next_cursor"]
+            if not data["has_more_pages"]:
+                break
+            assert ":" in cursor
+
+        assert paged_ids == expected_ids
+
+    def test_semantic_search_snapshot_pagination(
+        self, client, staff_user_token, free_text_question
+    ):
+        """With searchSnapshot, later pages come from the ranking taken on the first page"""
+        for i in range(4):
+            respondent = RespondentFactory(consultation=free_text_question.consultation)
+            ResponseFactory(
+                question=free_text_question,
+                respondent=respondent,
+                embedding=embed_text(f"response {i}"),
+            )
+
+        url = reverse(
+            "response-list",
+            kwargs={"consultation_pk": free_text_question.consultation.id},
+        )
+        params = {
+            "question_id": free_text_question.id,
+            "searchMode": "semantic",
+            "searchValue": "public transport",
+            "page_size": 2,
+        }
+        auth = {"Authorization": f"Bearer {staff_user_token}"}
+
+        page1 = orjson.loads(
+            client.get(url, query_params={**params, "searchSnapshot": "true"}, headers=auth).content
+        )
+        assert page1["total_count"] == 4
+        assert page1["next_cursor"].startswith("snapshot:")
+
+        # A new best match arriving mid-scroll does not shift the remaining pages
+        respondent = RespondentFactory(consultation=free_text_question.consultation)
+        newcomer = ResponseFactory(
+            question=free_text_question,
+            respondent=respondent,
+            embedding=embed_text("public transport"),
+        )
+
+        page2 = orjson.loads(
+            client.get(
+                url, query_params={**params, "cursor": page1["next_cursor"]}, headers=auth
+            ).content
+        )
+        assert page2["has_more_pages"] is False
+        assert page2["next_cursor"] is None
+        ids = [r["id"] for r in page1["all_respondents"] + page2["all_respondents"]]
+        assert len(set(ids)) == 4
+        assert str(newcomer.id) not in ids
+
+        # An expired snapshot restarts from the first page
+        expired = orjson.loads(
+            client.get(
+                url, query_params={**params, "cursor": "snapshot:expired:2"}, headers=auth
+            ).content
+        )
+        assert expired["total_count"] == 5
+        assert expired["all_respondents"][0]["id"] == str(newcomer.id)
+
+    def test_semantic_search_includes_responses_without_embeddings(
+        self, client, staff_user_token, free_text_question
+    ):
+        """Responses the HNSW index cannot return are still listed, after every match"""
+        for i in range(3):
+            respondent = RespondentFactory(consultation=free_text_question.consultation)
+            ResponseFactory(
+                question=free_text_question,
+                respondent=respondent,
+                embedding=embed_text(f"response {i}"),
+            )
+        respondent = RespondentFactory(consultation=free_text_question.consultation)
+        unembedded = ResponseFactory(
+            question=free_text_question, respondent=respondent, embedding=None
+        )
+
+        url = reverse(
+            "response-list",
+            kwargs={"consultation_pk": free_text_question.consultation.id},
+        )
+        params = {
+            "question_id": free_text_question.id,
+            "searchMode": "semantic",
+            "searchValue": "public transport",
+            "searchRecall": "fast",
+            "page_size": 2,
+        }
+        auth = {"Authorization": f"Bearer {staff_user_token}"}
+
+        page1 = orjson.loads(client.get(url, query_params=params, headers=auth).content)
+        page2 = orjson.loads(
+            client.get(
+                url, query_params={**params, "cursor": page1["next_cursor"]}, headers=auth
+            ).content
+        )
+
+        assert page1["total_count"] == 4
+        assert page2["has_more_pages"] is False
+        assert page2["all_respondents"][-1]["id"] == str(unembedded.id)
+
+    def test_semantic_page_completes_a_short_approximate_scan(self, free_text_question):
+        """A page an index scan leaves short is filled from the exact ordering"""
+        for i in range(5):
+            respondent = RespondentFactory(consultation=free_text_question.consultation)
+            ResponseFactory(
+                question=free_text_question,
+                respondent=respondent,
+                embedding=embed_text(f"response {i}"),
+            )
+        ranked = order_by_semantic_distance(
+            Response.objects.filter(question=free_text_question),
+            embed_text("public transport"),
+            "balanced",
+        )
+        exact = exact_semantic_ordering(ranked)
+        expected = list(exact)
+        # Stands in for an index scan that stopped after two candidates
+        truncated = ranked.filter(id__in=[response.id for response in expected[:2]])
+
+        assert _semantic_page(truncated, exact, None, 4) == expected[:4]
+        after_first = _semantic_position(expected[0])
+        assert _semantic_page(truncated, exact, after_first, 3) == expected[1:4]
+        assert _semantic_page(truncated, None, None, 4) == expected[:2]
+
     def test_get_filtered_responses_with_demographic_filters(
         self,
         client,
@@ -681,6 +862,14 @@ class TestResponseViewSet:
         assert history.first().sentiment is None  # Initial state
         assert history.last().sentiment == "AGREEMENT"  # Final state after PATCH
 
+        # The denormalised sentiment count for the question follows the edit
+        assert (
+            QuestionSentimentCount.objects.get(
+                question=free_text_annotation.response.question, sentiment="AGREEMENT"
+            ).response_count
+            == 1
+        )
+
     def test_patch_response_evidence_rich(self, client, staff_user_token, free_text_annotation):
         url = reverse(
             "response-detail",
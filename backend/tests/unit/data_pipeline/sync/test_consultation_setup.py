@@ -1,9 +1,11 @@
 import json
+from types import SimpleNamespace
 from unittest.mock import patch
 
 import pytest
 from botocore.exceptions import ClientError
 from django.conf import settings
+from django.core.cache import caches
 from django.db.models import Count
 
 from consultations.models import (
@@ -11,13 +13,18 @@ from consultations.models import (
     Question,
     Respondent,
     Response,
+    TextEmbedding,
 )
 from data_pipeline.sync.consultation_setup import (
+    _embedding_checkpoint_key,
+    batch_by_tokens,
+    create_embeddings_for_question,
     import_consultation_from_s3,
     load_question_from_s3,
     load_respondents_from_s3,
 )
-from factories import UserFactory
+from embeddings import EMBEDDING_MAX_INPUT_TOKENS, embed_batches
+from factories import QuestionFactory, ResponseFactory, UserFactory
 
 logger = settings.LOGGER
 
@@ -28,8 +35,11 @@ def _client_error(code: str) -> ClientError:
 
 @pytest.mark.django_db
 class TestImportConsultationFromS3:
+    @pytest.mark.parametrize("use_copy", [False, True])
     @patch("data_pipeline.sync.consultation_setup.create_embeddings_for_question.enqueue")
-    def test_import_consultation_from_s3(self, mock_enqueue, minio_test_bucket, minio_client):
+    def test_import_consultation_from_s3(
+        self, mock_enqueue, minio_test_bucket, minio_client, use_copy
+    ):
         """
         Test importing a complete consultation from S3 with multiple question types.
 
@@ -172,6 +182,7 @@ class TestImportConsultationFromS3:
                 user_id=user.id,
                 enqueue_embeddings=True,
                 batch_size=2,
+                use_copy=use_copy,
             )
 
             # Verify: Check consultation was created correctly
@@ -188,6 +199,15 @@ class TestImportConsultationFromS3:
             respondent_2 = Respondent.objects.get(consultation=consultation, themefinder_id=2)
             respondent_3 = Respondent.objects.get(consultation=consultation, themefinder_id=3)
 
+            # Verify demographics were linked to their respondents
+            assert [(d.field_name, d.field_value) for d in respondent_1.demographics.all()] == [
+                ("age", "25-34")
+            ]
+            assert [(d.field_name, d.field_value) for d in respondent_2.demographics.all()] == [
+                ("region", "North")
+            ]
+            assert not respondent_3.demographics.exists()
+
             # Verify questions were created with correct types
             question_1_db = Question.objects.get(consultation=consultation, number=1)
             assert question_1_db.text == "What are your thoughts on this proposal?"
@@ -240,6 +260,13 @@ class TestImportConsultationFromS3:
             assert q3_response_2.free_text == "Not sure, need more information"
             assert [opt.text for opt in q3_response_2.chosen_options.all()] == ["Not sure"]
 
+            if use_copy:
+                # The COPY path computes every search vector in the same pass
+                free_text_responses = Response.objects.filter(
+                    question__consultation=consultation, free_text__isnull=False
+                )
+                assert not free_text_responses.filter(search_vector__isnull=True).exists()
+
             # Verify embedding jobs were enqueued for free text questions only
             assert mock_enqueue.call_count == 2
 
@@ -310,3 +337,132 @@ class TestLoadQuestionFromS3:
             )
 
         assert exc_info.value.response["Error"]["Code"] == "AccessDenied"
+
+
+class TestBatchByTokens:
+    def test_respects_input_and_token_limits(self):
+        texts = ["one two three", "four", "five six", "seven"]
+
+        assert batch_by_tokens(texts, max_tokens=1000, max_inputs=2) == [
+            ["one two three", "four"],
+            ["five six", "seven"],
+        ]
+        assert batch_by_tokens(texts, max_tokens=4, max_inputs=10) == [
+            ["one two three", "four"],
+            ["five six", "seven"],
+        ]
+
+    def test_truncates_texts_over_the_model_limit(self):
+        (batch,) = batch_by_tokens(["word " * (EMBEDDING_MAX_INPUT_TOKENS + 100)])
+
+        assert len(batch) == 1
+        assert len(batch[0].split()) <= EMBEDDING_MAX_INPUT_TOKENS
+
+
+@pytest.mark.django_db
+class TestCreateEmbeddingsForQuestion:
+    @pytest.fixture
+    def question_responses(self):
+        question = QuestionFactory(has_free_text=True)
+        responses = [ResponseFactory(question=question, embedding=None) for _ in range(5)]
+        yield question, sorted(response.id for response in responses)
+        caches[settings.EMBEDDING_CHECKPOINT_CACHE].clear()
+
+    @pytest.fixture
+    def current_job(self):
+        job = SimpleNamespace(id="job-1")
+        with patch("data_pipeline.sync.consultation_setup.get_current_job", return_value=job):
+            yield job
+
+    def test_embeds_every_response(self, question_responses, current_job):
+        question, _ = question_responses
+
+        create_embeddings_for_question(question.id)
+
+        responses = Response.objects.filter(question=question)
+        assert not responses.filter(embedding__isnull=True).exists()
+        assert not responses.filter(search_vector__isnull=True).exists()
+        assert (
+            caches[settings.EMBEDDING_CHECKPOINT_CACHE].get(
+                _embedding_checkpoint_key(question.id, current_job.id)
+            )
+            is None
+        )
+
+    def test_ignores_checkpoints_of_earlier_jobs(self, question_responses, current_job):
+        question, response_ids = question_responses
+        # An earlier job stopped after the last response of a consultation since re-imported
+        caches[settings.EMBEDDING_CHECKPOINT_CACHE].set(
+            _embedding_checkpoint_key(question.id, "earlier-job"), response_ids[-1]
+        )
+
+        create_embeddings_for_question(question.id)
+
+        assert not Response.objects.filter(question=question, embedding__isnull=True).exists()
+
+    @patch("data_pipeline.sync.consultation_setup.HostingEnvironment")
+    def test_only_unseen_texts_are_embedded(self, mock_hosting_environment):
+        mock_hosting_environment.is_deployed.return_value = True
+        question = QuestionFactory(has_free_text=True)
+        for free_text in ["No", "No", "No  ", "Yes"]:
+            ResponseFactory(question=question, free_text=free_text, embedding=None)
+
+        with patch(
+            "data_pipeline.sync.consultation_setup.embed_batches", wraps=embed_batches
+        ) as mock_embed:
+            create_embeddings_for_question(question.id)
+            # A re-import of the same answers is served entirely from the store
+            Response.objects.filter(question=question).update(embedding=None)
+            create_embeddings_for_question(question.id)
+
+        # Each distinct text is embedded once, exactly as written
+        (call,) = mock_embed.call_args_list
+        texts = sorted(text for batch in call.args[0] for text in batch)
+        assert texts == [
+            f"Question: {question.text} \nAnswer: {answer}" for answer in ["No", "No  ", "Yes"]
+        ]
+        assert TextEmbedding.objects.count() == 3
+        assert not Response.objects.filter(question=question, embedding__isnull=True).exists()
+
+    def test_placeholder_embeddings_are_not_stored(self, question_responses):
+        question, _ = question_responses
+
+        create_embeddings_for_question(question.id)
+
+        assert not Response.objects.filter(question=question, embedding__isnull=True).exists()
+        assert not TextEmbedding.objects.exists()
+
+    @patch("data_pipeline.sync.consultation_setup.EMBEDDING_PAGE_SIZE", 2)
+    def test_resumes_from_checkpoint_after_a_crash(self, question_responses, current_job):
+        question, response_ids = question_responses
+        calls = []
+
+        async def fail_on_second_page(batches):
+            calls.append(batches)
+            if len(calls) == 2:
+                raise RuntimeError("embedding service unavailable")
+            return await embed_batches(batches)
+
+        with (
+            patch(
+                "data_pipeline.sync.consultation_setup.embed_batches",
+                side_effect=fail_on_second_page,
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            create_embeddings_for_question(question.id)
+
+        checkpoints = caches[settings.EMBEDDING_CHECKPOINT_CACHE]
+        checkpoint_key = _embedding_checkpoint_key(question.id, current_job.id)
+        assert checkpoints.get(checkpoint_key) == response_ids[1]
+        embedded = Response.objects.filter(question=question, embedding__isnull=False)
+        assert sorted(embedded.values_list("id", flat=True)) == response_ids[:2]
+
+        with patch(
+            "data_pipeline.sync.consultation_setup.embed_batches", wraps=embed_batches
+        ) as mock_embed:
+            create_embeddings_for_question(question.id)
+
+        # Only the three remaining responses are sent on the re-run
+        assert sum(len(batch) for call in mock_embed.call_args_list for batch in call.args[0]) == 3
+        assert not Response.objects.filter(question=question, embedding__isnull=True).exists()
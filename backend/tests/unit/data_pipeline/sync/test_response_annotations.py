@@ -4,6 +4,7 @@ import pytest
 from botocore.exceptions import ClientError
 
 from consultations.models import (
+    QuestionSentimentCount,
     ResponseAnnotation,
     SelectedTheme,
 )
@@ -145,6 +146,95 @@ class TestImportResponseAnnotationsFromS3:
         assert theme_a.key == "A"
         assert theme_b.key == "B"
 
+        # Verify denormalised theme and sentiment counts were populated
+        assert theme_a.response_count == 1
+        assert theme_b.response_count == 1
+        sentiment_counts = dict(
+            QuestionSentimentCount.objects.filter(question=question).values_list(
+                "sentiment", "response_count"
+            )
+        )
+        assert sentiment_counts == {"AGREEMENT": 1, "DISAGREEMENT": 1, "UNCLEAR": 0}
+
+
+def _mock_s3_for_questions(mock_s3, themes_by_question: dict[int, list[dict]]) -> None:
+    """Serve one theme "Support" mapped to respondent 1 for each question."""
+
+    def question_number(key: str) -> int:
+        return int(key.split("question_part_")[1].split("/")[0])
+
+    def mock_read_json(bucket_name, key, s3_client=None, raise_if_missing=True):
+        return themes_by_question[question_number(key)]
+
+    def mock_read_jsonl(bucket_name, key, s3_client=None, raise_if_missing=True):
+        if "sentiment.jsonl" in key:
+            return [{"themefinder_id": 1, "sentiment": "AGREEMENT"}]
+        elif "detail_detection.jsonl" in key:
+            return [{"themefinder_id": 1, "evidence_rich": "YES"}]
+        return [{"themefinder_id": 1, "theme_keys": ["A"]}]
+
+    mock_s3.read_json.side_effect = mock_read_json
+    mock_s3.read_jsonl.side_effect = mock_read_jsonl
+
+
+# Questions are imported on worker threads with their own connections, which can't
+# see rows created inside a test transaction
+@pytest.mark.django_db(transaction=True)
+class TestImportResponseAnnotationsConcurrently:
+    @pytest.fixture
+    def consultation(self):
+        consultation = ConsultationFactory(code="test-consultation", timestamp="2024-01-01")
+        respondent = RespondentFactory(consultation=consultation, themefinder_id=1)
+        for number in [1, 2, 3]:
+            question = QuestionFactory(consultation=consultation, number=number, has_free_text=True)
+            ResponseFactory(question=question, respondent=respondent, free_text="I support this")
+            SelectedTheme.objects.create(question=question, name="Support", description="Support")
+        return consultation
+
+    @patch("data_pipeline.sync.response_annotations.s3")
+    def test_imports_every_question_and_flips_timestamp(self, mock_s3, consultation):
+        theme = {"theme_key": "A", "theme_name": "Support", "theme_description": "Support"}
+        _mock_s3_for_questions(mock_s3, {1: [theme], 2: [theme], 3: [theme]})
+
+        import_response_annotations_from_s3(
+            consultation_code="test-consultation",
+            timestamp="2024-01-20",
+            question_numbers=[1, 2, 3],
+            max_workers=3,
+        )
+
+        annotations = ResponseAnnotation.objects.filter(
+            response__question__consultation=consultation
+        )
+        assert annotations.count() == 3
+        assert all(annotation.themes.get().key == "A" for annotation in annotations)
+        consultation.refresh_from_db()
+        assert consultation.timestamp == "2024-01-20"
+        assert consultation.stage == consultation.Stage.ANALYSIS
+
+    @patch("data_pipeline.sync.response_annotations.s3")
+    def test_leaves_timestamp_when_a_question_fails(self, mock_s3, consultation):
+        theme = {"theme_key": "A", "theme_name": "Support", "theme_description": "Support"}
+        unknown = {"theme_key": "A", "theme_name": "Unknown", "theme_description": "Not in db"}
+        _mock_s3_for_questions(mock_s3, {1: [theme], 2: [unknown], 3: [theme]})
+
+        with pytest.raises(ValueError, match=r"failed for questions \[2\]"):
+            import_response_annotations_from_s3(
+                consultation_code="test-consultation",
+                timestamp="2024-01-20",
+                question_numbers=[1, 2, 3],
+                max_workers=3,
+            )
+
+        # Successful questions are committed independently, the failed one rolled back
+        imported = ResponseAnnotation.objects.filter(
+            response__question__consultation=consultation
+        ).values_list("response__question__number", flat=True)
+        assert sorted(imported) == [1, 3]
+        consultation.refresh_from_db()
+        assert consultation.timestamp == "2024-01-01"
+        assert consultation.stage != consultation.Stage.ANALYSIS
+
 
 class TestLoadSelectedThemesFromS3:
     @patch("data_pipeline.sync.response_annotations.s3.read_json")
@@ -1,7 +1,10 @@
+import json
+
 import pytest
+from botocore.exceptions import ClientError
 from django.conf import settings
 
-from data_pipeline.s3 import get_consultation_folders, get_question_folders
+from data_pipeline.s3 import get_consultation_folders, get_question_folders, iter_jsonl
 
 logger = settings.LOGGER
 
@@ -109,3 +112,29 @@ class TestGetConsultationFolders:
                     )
                 except Exception as e:  # noqa: BLE001
                     logger.warning("Failed to cleanup object {key}: {e}", key=key, e=e)
+
+
+class TestIterJsonl:
+    def test_streams_every_line_in_order(self, minio_test_bucket, minio_client):
+        """Lines are yielded in order even when the read-ahead buffer is smaller than the file"""
+        key = "app_data/consultations/test/inputs/respondents.jsonl"
+        rows = [{"themefinder_id": i} for i in range(25)]
+        body = "\n".join(json.dumps(row) for row in rows) + "\n"
+        minio_client.put_object(Bucket=minio_test_bucket, Key=key, Body=body.encode())
+
+        try:
+            assert list(iter_jsonl(minio_test_bucket, key, read_ahead=2)) == rows
+
+            # Stopping early releases the reader instead of blocking on the full buffer
+            stream = iter_jsonl(minio_test_bucket, key, read_ahead=2)
+            assert next(stream) == rows[0]
+            stream.close()
+        finally:
+            minio_client.delete_object(Bucket=minio_test_bucket, Key=key)
+
+    def test_missing_file(self, minio_test_bucket):
+        key = "app_data/consultations/test/inputs/missing.jsonl"
+
+        assert list(iter_jsonl(minio_test_bucket, key, raise_if_missing=False)) == []
+        with pytest.raises(ClientError):
+            list(iter_jsonl(minio_test_bucket, key))
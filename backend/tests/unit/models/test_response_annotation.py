@@ -115,3 +115,22 @@ class TestResponseAnnotation:
         assert annotation.sentiment is None
         assert annotation.evidence_rich is None
         assert annotation.themes.count() == 0
+
+    def test_theme_assignments_maintain_theme_response_counts(self):
+        """Test that AI and human theme assignments keep SelectedTheme.response_count in step"""
+        response = ResponseFactory()
+        theme1 = SelectedThemeFactory(question=response.question)
+        theme2 = SelectedThemeFactory(question=response.question)
+        annotation = ResponseAnnotation.objects.create(response=response)
+
+        annotation.add_original_ai_themes([theme1])
+        # Re-adding an existing assignment must not double count
+        annotation.add_original_ai_themes([theme1])
+        theme1.refresh_from_db()
+        assert theme1.response_count == 1
+
+        annotation.set_human_reviewed_themes([theme2], UserFactory())
+        theme1.refresh_from_db()
+        theme2.refresh_from_db()
+        assert theme1.response_count == 0
+        assert theme2.response_count == 1
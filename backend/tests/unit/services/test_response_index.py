@@ -0,0 +1,149 @@
+import pickle
+from unittest.mock import patch
+
+import pytest
+from django.test import override_settings
+
+from consultations.services.response_index import (
+    ResponseBitmapIndex,
+    get_response_index,
+    invalidate_response_index,
+    update_response_in_index,
+)
+from data_pipeline.sync.consultation_setup import _ingest_respondents
+from factories import (
+    MultiChoiceAnswerFactory,
+    QuestionFactory,
+    RespondentFactory,
+    ResponseAnnotationFactoryNoThemes,
+    ResponseFactory,
+    SelectedThemeFactory,
+    UserFactory,
+)
+
+
+@pytest.mark.django_db
+class TestResponseBitmapIndex:
+    def test_build(self):
+        """Each dimension maps to the bitmap of matching response ordinals"""
+        question = QuestionFactory(has_free_text=True, has_multiple_choice=True)
+        theme = SelectedThemeFactory(question=question)
+        answer = MultiChoiceAnswerFactory(question=question)
+
+        responses = [ResponseFactory(question=question) for _ in range(3)]
+        responses[2].chosen_options.add(answer)
+        annotation = ResponseAnnotationFactoryNoThemes(
+            response=responses[1], sentiment="AGREEMENT", evidence_rich=True
+        )
+        annotation.add_original_ai_themes([theme])
+
+        index = ResponseBitmapIndex.build(question.id)
+
+        assert index.response_ids == sorted(r.id for r in responses)
+        assert index.count(index.all) == 3
+        assert index.ids(index.themes[theme.id]) == [responses[1].id]
+        assert index.ids(index.sentiments["AGREEMENT"]) == [responses[1].id]
+        assert index.ids(index.evidence_rich[True]) == [responses[1].id]
+        assert index.ids(index.multiple_choice_answers[answer.id]) == [responses[2].id]
+        assert index.ids(index.multiple_choice) == [responses[2].id]
+
+    def test_per_user_bitmaps(self):
+        """Read and flagged bitmaps are scoped to the given user"""
+        question = QuestionFactory(has_free_text=True)
+        user = UserFactory()
+        read, flagged = (ResponseFactory(question=question) for _ in range(2))
+        read.mark_as_read_by(user)
+        annotation = ResponseAnnotationFactoryNoThemes(response=flagged)
+        annotation.flagged_by.add(user)
+
+        index = ResponseBitmapIndex.build(question.id)
+
+        assert index.ids(index.read_by(user)) == [read.id]
+        assert index.ids(index.flagged_by(user)) == [flagged.id]
+        assert index.read_by(UserFactory()) == 0
+
+    @override_settings(RESPONSE_INDEX_CACHE="default", RESPONSE_INDEX_TIMEOUT=60)
+    def test_cached_until_invalidated(self, django_capture_on_commit_callbacks):
+        """The index is cached per question and rebuilt after invalidation"""
+        question = QuestionFactory(has_free_text=True)
+        respondent = RespondentFactory(consultation=question.consultation)
+        ResponseFactory(question=question, respondent=respondent)
+
+        assert len(get_response_index(question.id).response_ids) == 1
+
+        ResponseFactory(question=question)
+        assert len(get_response_index(question.id).response_ids) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            invalidate_response_index(question.id)
+        assert len(get_response_index(question.id).response_ids) == 2
+
+    @override_settings(RESPONSE_INDEX_CACHE="default", RESPONSE_INDEX_TIMEOUT=60)
+    def test_invalidated_when_responses_are_sampled(self, django_capture_on_commit_callbacks):
+        """Sampling deletes responses, so the cached index is dropped"""
+        question = QuestionFactory(has_free_text=True)
+        for _ in range(3):
+            ResponseFactory(question=question, free_text="an answer")
+        assert len(get_response_index(question.id).response_ids) == 3
+
+        with django_capture_on_commit_callbacks(execute=True):
+            question.sample_responses(keep_count=1)
+        assert len(get_response_index(question.id).response_ids) == 1
+
+    @override_settings(RESPONSE_INDEX_CACHE="default", RESPONSE_INDEX_TIMEOUT=60)
+    def test_invalidated_when_respondents_are_reimported(self, django_capture_on_commit_callbacks):
+        """Re-importing respondents deletes their responses, so the cached index is dropped"""
+        question = QuestionFactory(has_free_text=True)
+        respondent = RespondentFactory(consultation=question.consultation)
+        ResponseFactory(question=question, respondent=respondent)
+        assert len(get_response_index(question.id).response_ids) == 1
+
+        with django_capture_on_commit_callbacks(execute=True):
+            _ingest_respondents(question.consultation, [])
+        assert get_response_index(question.id).response_ids == []
+
+    def test_ordinals_are_rebuilt_rather_than_cached(self):
+        """The ordinal map is left out of the cached index and rebuilt on load"""
+        question = QuestionFactory(has_free_text=True)
+        responses = [ResponseFactory(question=question) for _ in range(2)]
+        index = ResponseBitmapIndex.build(question.id)
+
+        state = pickle.dumps(index)
+        assert "ordinals" not in pickle.loads(state).__dict__
+        assert pickle.loads(state).bitmap_for([responses[1].id]) == index.bitmap_for(
+            [responses[1].id]
+        )
+
+    @override_settings(RESPONSE_INDEX_CACHE="default", RESPONSE_INDEX_TIMEOUT=60)
+    def test_review_edit_updates_the_cached_index(self, django_capture_on_commit_callbacks):
+        """A single response's edit is applied to the cached index without a rebuild"""
+        question = QuestionFactory(has_free_text=True)
+        old_theme, new_theme = (SelectedThemeFactory(question=question) for _ in range(2))
+        edited, other = (ResponseFactory(question=question) for _ in range(2))
+        annotation = ResponseAnnotationFactoryNoThemes(
+            response=edited, sentiment="AGREEMENT", evidence_rich=True
+        )
+        annotation.add_original_ai_themes([old_theme])
+        ResponseAnnotationFactoryNoThemes(response=other, sentiment="AGREEMENT")
+        before = get_response_index(question.id)
+
+        annotation.sentiment = "DISAGREEMENT"
+        annotation.evidence_rich = False
+        annotation.save()
+        annotation.set_human_reviewed_themes([new_theme], UserFactory())
+        with (
+            patch.object(ResponseBitmapIndex, "build") as mock_build,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            update_response_in_index(question.id, edited.id)
+            index = get_response_index(question.id)
+
+        mock_build.assert_not_called()
+        assert index.version != before.version
+        assert index.ids(index.sentiments["AGREEMENT"]) == [other.id]
+        assert index.ids(index.sentiments["DISAGREEMENT"]) == [edited.id]
+        assert index.ids(index.evidence_rich[False]) == [edited.id]
+        assert index.themes[old_theme.id] == 0
+        assert index.ids(index.themes[new_theme.id]) == [edited.id]
+        # The index being read before the edit is left as it was
+        assert before.ids(before.sentiments["DISAGREEMENT"]) == []
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import caches
+
+import embeddings
+from embeddings import LRUCache, embed_query, text_hash
+
+
+@pytest.fixture(autouse=True)
+def clear_query_embedding_caches():
+    embeddings._query_embeddings.clear()
+    caches["default"].clear()
+    yield
+    embeddings._query_embeddings.clear()
+    caches["default"].clear()
+
+
+@patch("embeddings.embed_text", return_value=[0.1, 0.2])
+def test_embed_query_reuses_repeated_queries(mock_embed_text):
+    assert embed_query("Public  transport") == [0.1, 0.2]
+    assert embed_query("Public  transport") == [0.1, 0.2]
+
+    mock_embed_text.assert_called_once_with("Public  transport")
+
+
+@patch("embeddings.embed_text", return_value=[0.1, 0.2])
+def test_embed_query_keys_queries_as_embedded(mock_embed_text):
+    embed_query("NHS Funding")
+    embed_query("nhs funding")
+
+    # Differently written queries embed differently, so neither reuses the other's vector
+    assert [call.args for call in mock_embed_text.call_args_list] == [
+        ("NHS Funding",),
+        ("nhs funding",),
+    ]
+
+
+@patch("embeddings.embed_text", return_value=[0.1, 0.2])
+def test_embed_query_falls_back_to_shared_cache(mock_embed_text):
+    embed_query("housing")
+    # A fresh process has an empty LRU but still hits the shared cache
+    embeddings._query_embeddings.clear()
+    embed_query("housing")
+
+    mock_embed_text.assert_called_once()
+
+
+def test_text_hash_covers_the_exact_text():
+    assert text_hash("Not sure") == text_hash("Not sure")
+    assert text_hash("Not  sure\n") != text_hash("Not sure")
+    assert text_hash("Not sure") != text_hash("not sure")
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    cache.get("a")
+    cache.set("c", [3.0])
+
+    assert cache.get("a") == [1.0]
+    assert cache.get("b") is None
+    assert cache.get("c") == [3.0]
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(maxsize=2, ttl=60)
+    with patch("embeddings.time.monotonic", return_value=0):
+        cache.set("a", [1.0])
+    with patch("embeddings.time.monotonic", return_value=61):
+        assert cache.get("a") is None
@@ -43,3 +43,15 @@ def test_create_dummy_consultation_from_yaml():
     assert not q3.has_free_text
     assert q3.has_multiple_choice
     assert q3.multiple_choice_options
+
+
+@pytest.mark.django_db
+def test_dummy_consultation_has_denormalised_counts():
+    consultation = create_dummy_consultation_from_yaml(number_respondents=10)
+    question = models.Question.objects.get(consultation=consultation, number=1)
+
+    assert question.total_response_count == 10
+    sentiment_counts = models.QuestionSentimentCount.objects.filter(question=question)
+    assert sum(sentiment_counts.values_list("response_count", flat=True)) == 10
+    for theme in models.SelectedTheme.objects.filter(question=question):
+        assert theme.response_count == theme.responseannotationtheme_set.count()
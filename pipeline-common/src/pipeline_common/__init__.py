@@ -1,3 +1,4 @@
+from pipeline_common.checkpoints import delete_checkpoint, open_checkpoint
 from pipeline_common.logging_bootstrap import bootstrap_logger
 
-__all__ = ["bootstrap_logger"]
+__all__ = ["bootstrap_logger", "delete_checkpoint", "open_checkpoint"]
@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import boto3
+from botocore.exceptions import ClientError
+
+from themefinder import BatchCheckpoint
+
+BASE_PREFIX = "app_data/consultations/"
+
+
+def open_checkpoint(
+    consultation_dir: str, question_dir: str, job: str
+) -> BatchCheckpoint:
+    """
+    Open the record of LLM batches completed for a question, so a restarted job skips
+    them. A checkpoint left in S3 by an interrupted run is downloaded first, and the
+    checkpoint is synced back to S3 as batches complete.
+    """
+    bucket_name = os.getenv("DATA_S3_BUCKET")
+    account_id = os.getenv("AWS_ACCOUNT_ID")
+    local_path = Path(consultation_dir) / "checkpoints" / job / f"{question_dir}.jsonl"
+    s3_key = str(Path(BASE_PREFIX) / local_path)
+    local_path.parent.mkdir(parents=True, exist_ok=True)
+
+    s3 = boto3.client("s3")
+    try:
+        s3.download_file(
+            bucket_name,
+            s3_key,
+            str(local_path),
+            ExtraArgs={"ExpectedBucketOwner": account_id},
+        )
+    except ClientError as e:
+        if e.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            raise
+
+    def upload(path: Path) -> None:
+        s3.upload_file(
+            str(path),
+            bucket_name,
+            s3_key,
+            ExtraArgs={"ExpectedBucketOwner": account_id},
+        )
+
+    return BatchCheckpoint(local_path, sync=upload)
+
+
+def delete_checkpoint(checkpoint: BatchCheckpoint) -> None:
+    """Remove a completed question's checkpoint, so a later run starts afresh."""
+    s3 = boto3.client("s3")
+    s3.delete_object(
+        Bucket=os.getenv("DATA_S3_BUCKET"),
+        Key=str(Path(BASE_PREFIX) / checkpoint.path),
+        ExpectedBucketOwner=os.getenv("AWS_ACCOUNT_ID"),
+    )
+    checkpoint.path.unlink(missing_ok=True)
@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+from botocore.exceptions import ClientError
+
+from pipeline_common import delete_checkpoint, open_checkpoint
+
+
+def _not_found(*args, **kwargs):
+    raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+
+
+def test_open_checkpoint_starts_afresh_without_one_in_s3(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_S3_BUCKET", "bucket")
+    monkeypatch.chdir(tmp_path)
+    with patch("pipeline_common.checkpoints.boto3") as mock_boto3:
+        s3 = mock_boto3.client.return_value
+        s3.download_file.side_effect = _not_found
+        checkpoint = open_checkpoint("consultation", "question_1", "mapping")
+
+    assert (
+        checkpoint.path.as_posix()
+        == "consultation/checkpoints/mapping/question_1.jsonl"
+    )
+    assert checkpoint.completed == {}
+
+    checkpoint.record("a", [{"response_id": 1}])
+    checkpoint.close()
+    s3.upload_file.assert_called_once()
+    assert s3.upload_file.call_args.args[1:] == (
+        "bucket",
+        "app_data/consultations/consultation/checkpoints/mapping/question_1.jsonl",
+    )
+
+
+def test_delete_checkpoint_removes_local_and_s3_copies(monkeypatch, tmp_path):
+    monkeypatch.setenv("DATA_S3_BUCKET", "bucket")
+    monkeypatch.chdir(tmp_path)
+    with patch("pipeline_common.checkpoints.boto3") as mock_boto3:
+        s3 = mock_boto3.client.return_value
+        s3.download_file.side_effect = _not_found
+        checkpoint = open_checkpoint("consultation", "question_1", "sign_off")
+        checkpoint.record("a", [])
+        checkpoint.close()
+
+        delete_checkpoint(checkpoint)
+
+    assert not checkpoint.path.exists()
+    assert s3.delete_object.call_args.kwargs["Key"] == (
+        "app_data/consultations/consultation/checkpoints/sign_off/question_1.jsonl"
+    )
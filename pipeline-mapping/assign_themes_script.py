@@ -9,13 +9,15 @@ import boto3
 import pandas as pd
 import structlog
 import urllib3
-from pipeline_common import bootstrap_logger
+from pipeline_common import bootstrap_logger, delete_checkpoint, open_checkpoint
 
 from themefinder import (
+    RunReport,
     detail_detection,
     rule_2_themes_must_have_a_non_negligible_number_of_responses_slack,
     rule_4_themes_should_not_overlap_slack,
     theme_mapping,
+    theme_mapping_with_detail,
 )
 from themefinder.llm import OpenAILLM
 
@@ -25,6 +27,9 @@ logger = bootstrap_logger()
 BUCKET_NAME = os.getenv("DATA_S3_BUCKET")
 ACCOUNT_ID = os.getenv("AWS_ACCOUNT_ID")
 BASE_PREFIX = "app_data/consultations/"
+JOB = "mapping"
+# Map themes, detail and sentiment in one LLM pass rather than separate passes
+FUSED_MAPPING = os.getenv("FUSED_MAPPING", "false").lower() == "true"
 
 http = urllib3.PoolManager()
 
@@ -139,7 +144,9 @@ def load_question(consultation_dir: str, question_dir: str) -> tuple:
     return question, responses, themes
 
 
-async def process_consultation(consultation_dir: str, model_name: str) -> str:
+async def process_consultation(
+    consultation_dir: str, model_name: str, fused: bool = False
+) -> str:
     """
     Process all questions in a consultation directory, generating theme analyses.
 
@@ -152,6 +159,8 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
     Args:
         consultation_dir: Directory containing question subdirectories
         model_name: Language model instance for processing
+        fused: Map themes, detect detail and classify sentiment in a single LLM pass
+            per batch, rather than separate detail detection and mapping passes
 
     Returns:
         str: Path to the output directory
@@ -187,12 +196,52 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
                     question, responses_df, themes_df = load_question(
                         consultation_dir, question_dir
                     )
-
-                    detail_df, _ = await detail_detection(
-                        responses_df,
-                        llm,
-                        question=question,
-                    )
+                    checkpoint = open_checkpoint(consultation_dir, question_dir, JOB)
+                    run_report = RunReport()
+
+                    try:
+                        if fused:
+                            # One pass returns the mapping, detail and sentiment
+                            mapped_df, _ = await theme_mapping_with_detail(
+                                responses_df,
+                                llm,
+                                refined_themes_df=themes_df[["topic_id", "topic"]],
+                                question=question,
+                                checkpoint=checkpoint,
+                                run_report=run_report,
+                            )
+                            detail_df = mapped_df
+                            sentiment_df = mapped_df[["response_id", "position"]]
+                            sentiment_df = sentiment_df.rename(
+                                columns={
+                                    "response_id": "themefinder_id",
+                                    "position": "sentiment",
+                                }
+                            )
+                            sentiment_df.to_json(
+                                question_output_dir / "sentiment.jsonl",
+                                orient="records",
+                                lines=True,
+                            )
+                        else:
+                            detail_df, _ = await detail_detection(
+                                responses_df,
+                                llm,
+                                question=question,
+                                checkpoint=checkpoint,
+                                run_report=run_report,
+                            )
+                            mapped_df, _ = await theme_mapping(
+                                responses_df,
+                                llm,
+                                refined_themes_df=themes_df[["topic_id", "topic"]],
+                                question=question,
+                                checkpoint=checkpoint,
+                                run_report=run_report,
+                            )
+                    finally:
+                        checkpoint.close()
+                    run_report.write(question_output_dir / "run_report.json")
                     detail_df = detail_df[["response_id", "evidence_rich"]]
                     detail_df = detail_df.rename(
                         columns={"response_id": "themefinder_id"}
@@ -202,13 +251,6 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
                         orient="records",
                         lines=True,
                     )
-
-                    mapped_df, _ = await theme_mapping(
-                        responses_df,
-                        llm,
-                        refined_themes_df=themes_df[["topic_id", "topic"]],
-                        question=question,
-                    )
                     mapped_df = mapped_df[["response_id", "labels"]]
                     mapped_df = mapped_df.rename(
                         columns={
@@ -235,6 +277,7 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
                         question_id=question_dir,
                         output_dir=str(question_output_dir),
                     )
+                    delete_checkpoint(checkpoint)
 
                     rule_2_messages, rule_2_failed = (
                         rule_2_themes_must_have_a_non_negligible_number_of_responses_slack(
@@ -317,6 +360,12 @@ if __name__ == "__main__":
         type=str,
         required=True,
     )
+    parser.add_argument(
+        "--fused",
+        action="store_true",
+        default=FUSED_MAPPING,
+        help="Map themes, detail and sentiment in one LLM pass (also writes sentiment).",
+    )
     parser.add_argument(
         "--context-id",
         type=str,
@@ -336,6 +385,8 @@ if __name__ == "__main__":
 
     logger.info("Starting processing for subdirectory: {subdir}", subdir=args.subdir)
     download_s3_subdir(args.subdir)
-    output_dir = asyncio.run(process_consultation(args.subdir, args.model_name))
+    output_dir = asyncio.run(
+        process_consultation(args.subdir, args.model_name, fused=args.fused)
+    )
     upload_directory_to_s3(output_dir)
     logger.info("Processing completed for subdirectory: {subdir}", subdir=args.subdir)
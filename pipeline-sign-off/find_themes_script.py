@@ -10,10 +10,12 @@ import pandas as pd
 import structlog
 import urllib3
 from openai import OpenAI
-from pipeline_common import bootstrap_logger
+from pipeline_common import bootstrap_logger, delete_checkpoint, open_checkpoint
 from pydantic import BaseModel
 
 from themefinder import (
+    BatchCheckpoint,
+    RunReport,
     rule_1_total_theme_number_less_than_70_slack,
     rule_3_semantic_similarity_must_be_less_than_90pc_slack,
     theme_condensation,
@@ -49,6 +51,7 @@ logger = bootstrap_logger()
 BUCKET_NAME = os.getenv("DATA_S3_BUCKET")
 ACCOUNT_ID = os.getenv("AWS_ACCOUNT_ID")
 BASE_PREFIX = "app_data/consultations/"
+JOB = "sign_off"
 
 
 def download_s3_subdir(subdir: str) -> None:
@@ -151,7 +154,13 @@ def load_question(consultation_dir: str, question_dir: str) -> tuple:
     return question, responses
 
 
-async def generate_themes(question: str, responses_df, llm):
+async def generate_themes(
+    question: str,
+    responses_df,
+    llm,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+):
     """
     Generate refined themes from question and responses through multiple analysis steps.
 
@@ -159,23 +168,34 @@ async def generate_themes(question: str, responses_df, llm):
         question: The survey question text
         responses_df: DataFrame containing survey responses
         llm: the model to use
+        checkpoint: record of completed LLM batches, so a restarted job skips them
+        run_report: record of the LLM usage and latency of each stage
 
     Returns:
         pd.DataFrame: DataFrame containing refined themes
     """
     theme_df, _ = await theme_generation(
-        responses_df, llm, question=question, partition_key=None
+        responses_df,
+        llm,
+        question=question,
+        partition_key=None,
+        checkpoint=checkpoint,
+        run_report=run_report,
     )
 
     condensed_theme_df, _ = await theme_condensation(
         theme_df,
         llm,
         question=question,
+        checkpoint=checkpoint,
+        run_report=run_report,
     )
     refined_themes_df, _ = await theme_refinement(
         condensed_theme_df,
         llm,
         question=question,
+        checkpoint=checkpoint,
+        run_report=run_report,
     )
 
     return refined_themes_df
@@ -310,10 +330,16 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
                         consultation_dir, question_dir
                     )
 
-                    # Generate themes
-                    refined_themes_df = await generate_themes(
-                        question, responses_df, llm
-                    )
+                    # Generate themes, resuming from any checkpoint of an interrupted run
+                    checkpoint = open_checkpoint(consultation_dir, question_dir, JOB)
+                    run_report = RunReport()
+                    try:
+                        refined_themes_df = await generate_themes(
+                            question, responses_df, llm, checkpoint, run_report
+                        )
+                    finally:
+                        checkpoint.close()
+                    run_report.write(question_output_dir / "run_report.json")
 
                     def refined_themes_to_theme_node(row: dict):
                         topic_label, topic_description = row["topic"].split(":", 1)
@@ -407,6 +433,7 @@ async def process_consultation(consultation_dir: str, model_name: str) -> str:
                         question_id=question_dir,
                         output_dir=str(question_output_dir),
                     )
+                    delete_checkpoint(checkpoint)
                 except Exception:
                     logger.exception(
                         "Error processing {question_id}", question_id=question_dir
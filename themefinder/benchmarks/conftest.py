@@ -0,0 +1,150 @@
+"""Performance benchmarks of the themefinder core on synthetic consultations.
+
+Each benchmark runs at 1k, 10k and 100k responses, and at 1M with --max-rows 1000000,
+so scaling cliffs show up as a size whose time grows faster than its rows. Results
+are compared against the baselines stored in benchmarks/baselines, and a median
+more than REGRESSION_THRESHOLD slower than the baseline fails the run:
+
+    # Compare against the latest stored baseline
+    pytest benchmarks/ --benchmark-compare
+
+    # Store a new baseline, e.g. after an intended change in performance
+    pytest benchmarks/ --benchmark-save=baseline
+
+Baselines are only comparable on the machine that recorded them, so CI compares a
+pull request against its base branch run on the same runner instead.
+"""
+
+from functools import cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from pytest_benchmark.utils import parse_compare_fail
+from themefinder.llm_batch_processor import with_token_lengths
+from themefinder.models import ThemeNode
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Enough rounds at small sizes for a stable median, and fewer at larger sizes to
+# keep the full suite to a few minutes
+ROUNDS = {1_000: 50, 10_000: 20, 100_000: 3, 1_000_000: 1}
+REGRESSION_THRESHOLD = "median:25%"
+# Themes in a consultation, for benchmarks on the mapping of responses to themes
+MAPPED_THEMES = 50
+# Responses per theme, for benchmarks on the themes themselves
+RESPONSES_PER_THEME = 100
+
+VOCABULARY = (
+    "the proposal would increase costs for small businesses and local councils while "
+    "improving safety standards across housing transport energy and public health "
+    "services but many residents feel consultation was rushed unclear or unfair"
+)
+WORDS = np.array(VOCABULARY.split())
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--max-rows",
+        type=int,
+        default=100_000,
+        help="Largest number of synthetic responses to benchmark",
+    )
+
+
+def pytest_configure(config):
+    if config.option.benchmark_storage == "file://./.benchmarks":
+        config.option.benchmark_storage = (
+            f"file://{Path(__file__).parent / 'baselines'}"
+        )
+    if (
+        config.option.benchmark_compare != []
+        and not config.option.benchmark_compare_fail
+    ):
+        config.option.benchmark_compare_fail = [
+            parse_compare_fail(REGRESSION_THRESHOLD)
+        ]
+    if config.option.benchmark_group_by == "group":
+        # One table per function, so its scaling across sizes reads top to bottom
+        config.option.benchmark_group_by = "func"
+
+
+def pytest_generate_tests(metafunc):
+    if "n_rows" in metafunc.fixturenames:
+        max_rows = metafunc.config.getoption("max_rows")
+        sizes = [size for size in SIZES if size <= max_rows]
+        metafunc.parametrize("n_rows", sizes, ids=[f"{size:_}" for size in sizes])
+
+
+@cache
+def synthetic_responses(n_rows: int) -> pd.DataFrame:
+    """Responses of 5 to 80 words drawn from a fixed vocabulary."""
+    rng = np.random.default_rng(n_rows)
+    lengths = rng.integers(5, 80, n_rows)
+    words = rng.choice(WORDS, lengths.sum())
+    responses = [" ".join(row) for row in np.split(words, np.cumsum(lengths)[:-1])]
+    return pd.DataFrame(
+        {"response_id": np.arange(1, n_rows + 1), "response": responses}
+    )
+
+
+@cache
+def synthetic_mapping(n_rows: int) -> list[dict]:
+    """Each response mapped to 1 to 3 of MAPPED_THEMES themes, as the pipeline writes."""
+    rng = np.random.default_rng(n_rows)
+    theme_keys = [f"T{i}" for i in range(MAPPED_THEMES)]
+    return [
+        {
+            "themefinder_id": response_id,
+            "theme_keys": list(
+                rng.choice(theme_keys, rng.integers(1, 4), replace=False)
+            ),
+        }
+        for response_id in range(1, n_rows + 1)
+    ]
+
+
+@pytest.fixture
+def n_rounds(n_rows) -> int:
+    return ROUNDS[n_rows]
+
+
+@pytest.fixture
+def responses_df(n_rows) -> pd.DataFrame:
+    return synthetic_responses(n_rows).copy()
+
+
+@pytest.fixture
+def responses_with_token_lengths(n_rows) -> pd.DataFrame:
+    return with_token_lengths(synthetic_responses(n_rows))
+
+
+@pytest.fixture
+def mapping(n_rows) -> list[dict]:
+    return synthetic_mapping(n_rows)
+
+
+@pytest.fixture
+def theme_nodes(n_rows) -> list[ThemeNode]:
+    """A root theme over one theme per RESPONSES_PER_THEME responses."""
+    n_themes = n_rows // RESPONSES_PER_THEME
+    rng = np.random.default_rng(n_rows)
+    counts = rng.multinomial(n_rows - n_themes, np.ones(n_themes) / n_themes) + 1
+    themes = [
+        ThemeNode(
+            topic_id=f"T{i}",
+            topic_label=f"theme {i}",
+            topic_description=" ".join(rng.choice(WORDS, 12)),
+            source_topic_count=int(count),
+            parent_id="0",
+        )
+        for i, count in enumerate(counts)
+    ]
+    root = ThemeNode(
+        topic_id="0",
+        topic_label="All responses",
+        topic_description="Root of the theme hierarchy",
+        source_topic_count=n_rows,
+        children=[theme.topic_id for theme in themes],
+    )
+    return [root, *themes]
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import numpy as np
+from themefinder.advanced_tasks.theme_clustering_agent import ThemeClusteringAgent
+from themefinder.llm_batch_processor import (
+    _row_token_length,
+    batch_task_input_df,
+    generate_prompts,
+    process_llm_responses,
+    split_overflowing_batch,
+    with_token_lengths,
+)
+from themefinder.prompts import CONSULTATION_SYSTEM_PROMPT, THEME_MAPPING
+from themefinder.themeset_rules import (
+    rule_1_total_theme_number_less_than_70,
+    rule_2_themes_must_have_a_non_negligible_number_of_responses,
+    rule_3_semantic_similarity_must_be_less_than_90pc,
+    rule_4_themes_should_not_overlap,
+)
+
+ALLOWED_TOKENS = 50_000
+
+
+def test_with_token_lengths(benchmark, responses_df, n_rounds):
+    benchmark.pedantic(
+        with_token_lengths,
+        args=(responses_df,),
+        # Count every row afresh, as a new consultation would
+        setup=_row_token_length.cache_clear,
+        rounds=n_rounds,
+    )
+
+
+def test_generate_prompts(benchmark, responses_with_token_lengths, n_rounds):
+    prompts = benchmark.pedantic(
+        generate_prompts,
+        args=(THEME_MAPPING, responses_with_token_lengths),
+        kwargs={
+            "batch_size": 20,
+            "question": "What do you think of the proposal?",
+            "refined_themes": [{"A": "Cost: The proposal costs too much"}],
+            "system_prompt": CONSULTATION_SYSTEM_PROMPT,
+        },
+        rounds=n_rounds,
+    )
+    assert sum(len(prompt.response_ids) for prompt in prompts) == len(
+        responses_with_token_lengths
+    )
+
+
+def test_batch_task_input_df(benchmark, responses_with_token_lengths, n_rounds):
+    batches = benchmark.pedantic(
+        batch_task_input_df,
+        args=(responses_with_token_lengths, ALLOWED_TOKENS, 20),
+        rounds=n_rounds,
+    )
+    assert sum(len(batch) for batch in batches) == len(responses_with_token_lengths)
+
+
+def test_split_overflowing_batch(benchmark, responses_with_token_lengths, n_rounds):
+    batches = benchmark.pedantic(
+        split_overflowing_batch,
+        args=(responses_with_token_lengths, ALLOWED_TOKENS),
+        rounds=n_rounds,
+    )
+    assert sum(len(batch) for batch in batches) == len(responses_with_token_lengths)
+
+
+def test_process_llm_responses(benchmark, responses_df, n_rounds):
+    llm_responses = [
+        {"response_id": int(response_id), "labels": ["A", "B"]}
+        for response_id in responses_df["response_id"]
+    ]
+    processed = benchmark.pedantic(
+        process_llm_responses,
+        args=(llm_responses, responses_df),
+        rounds=n_rounds,
+    )
+    assert len(processed) == len(responses_df)
+
+
+def test_select_themes(benchmark, theme_nodes, n_rounds):
+    agent = ThemeClusteringAgent(llm=None, themes=theme_nodes)
+
+    selected = benchmark.pedantic(agent.select_themes, args=(1.0,), rounds=n_rounds)
+
+    assert len(selected) <= len(theme_nodes) - 1
+
+
+def test_rule_1_total_theme_number(benchmark, theme_nodes):
+    # Too quick to time in single rounds, so left to pytest-benchmark to calibrate
+    benchmark(rule_1_total_theme_number_less_than_70, theme_nodes)
+
+
+def test_rule_2_non_negligible_responses(benchmark, mapping, n_rounds):
+    benchmark.pedantic(
+        rule_2_themes_must_have_a_non_negligible_number_of_responses,
+        args=(mapping,),
+        rounds=n_rounds,
+    )
+
+
+def test_rule_3_semantic_similarity(benchmark, theme_nodes):
+    # Precomputed embeddings, so only the similarity checks are timed
+    rng = np.random.default_rng(len(theme_nodes))
+    data = [
+        SimpleNamespace(embedding=embedding.tolist())
+        for embedding in rng.normal(size=(len(theme_nodes), 256))
+    ]
+    client = SimpleNamespace(
+        embeddings=SimpleNamespace(create=lambda **_: SimpleNamespace(data=data))
+    )
+
+    # Too noisy in a few rounds, so left to pytest-benchmark to calibrate
+    benchmark(rule_3_semantic_similarity_must_be_less_than_90pc, theme_nodes, client)
+
+
+def test_rule_4_themes_should_not_overlap(benchmark, mapping, n_rounds):
+    benchmark.pedantic(
+        rule_4_themes_should_not_overlap, args=(mapping,), rounds=n_rounds
+    )
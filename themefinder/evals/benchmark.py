@@ -20,6 +20,7 @@ Requires:
     - LLM_GATEWAY_URL and CONSULT_EVAL_LITELLM_API_KEY env vars
 """
 
+# ruff: noqa: E402
 import argparse
 import asyncio
 import json
@@ -61,16 +62,18 @@ except ImportError:
 os.environ.setdefault("GRPC_DNS_RESOLVER", "native")
 
 
-import langfuse_utils  # noqa: E402
-from eval_condensation import evaluate_condensation  # noqa: E402
-from eval_generation import evaluate_generation  # noqa: E402
-from eval_mapping import evaluate_mapping  # noqa: E402
-from eval_refinement import evaluate_refinement  # noqa: E402
+import langfuse_utils
+from eval_condensation import evaluate_condensation
+from eval_generation import evaluate_generation
+from eval_mapping import evaluate_mapping
+from eval_mapping_with_detail import evaluate_mapping_with_detail
+from eval_refinement import evaluate_refinement
 
 console = Console()
 
 EVAL_FUNCS = {
     "mapping": evaluate_mapping,
+    "mapping_with_detail": evaluate_mapping_with_detail,
     "generation": evaluate_generation,
     "condensation": evaluate_condensation,
     "refinement": evaluate_refinement,
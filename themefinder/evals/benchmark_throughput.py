@@ -0,0 +1,99 @@
+"""Offline throughput benchmark of find_themes against the mock LLM server.
+
+Runs find_themes over synthetic responses with a local OpenAI-compatible server
+standing in for the gateway, so concurrency, retry and batching changes can be
+compared without LLM costs. Reports the wall time, responses per second, what the
+server saw and the run report of each stage.
+
+Usage:
+    uv run python benchmark_throughput.py --responses 2000 --latency-median 0.5 \
+        --rate-limit-rate 0.05 --concurrency 20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict
+
+import pandas as pd
+from themefinder.llm import OpenAILLM
+from themefinder.mock_llm_server import MockLLMConfig, MockLLMServer
+from themefinder.run_report import RunReport
+
+from themefinder import find_themes
+
+
+async def benchmark_throughput(
+    responses: int = 1000,
+    concurrency: int = 10,
+    config: MockLLMConfig | None = None,
+) -> dict:
+    """Run find_themes against the mock server.
+
+    Args:
+        responses: Number of synthetic responses
+        concurrency: Concurrent LLM calls allowed across stages
+        config: Latency and failure injection of the mock server
+
+    Returns:
+        Dict with the wall time, throughput, server stats and run report
+    """
+    responses_df = pd.DataFrame(
+        {
+            "response_id": range(1, responses + 1),
+            "response": [f"Synthetic response number {i}." for i in range(responses)],
+        }
+    )
+    run_report = RunReport()
+    with MockLLMServer(config) as server:
+        # Leave retries to themefinder, so they show in the run report
+        llm = OpenAILLM(
+            model="mock", base_url=server.base_url, api_key="mock", max_retries=0
+        )
+        start = time.perf_counter()
+        await find_themes(
+            responses_df,
+            llm,
+            question="What do you think of the proposal?",
+            concurrency=concurrency,
+            verbose=False,
+            run_report=run_report,
+        )
+        seconds = time.perf_counter() - start
+
+    return {
+        "seconds": round(seconds, 2),
+        "responses_per_second": round(responses / seconds, 1),
+        "server": asdict(server.stats),
+        "run_report": run_report.to_dict(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark find_themes throughput against a mock LLM"
+    )
+    parser.add_argument("--responses", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-median", type=float, default=0.2)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    results = asyncio.run(
+        benchmark_throughput(
+            responses=args.responses,
+            concurrency=args.concurrency,
+            config=MockLLMConfig(
+                latency_median=args.latency_median,
+                latency_sigma=args.latency_sigma,
+                rate_limit_rate=args.rate_limit_rate,
+                timeout_rate=args.timeout_rate,
+                max_concurrency=args.max_concurrency,
+            ),
+        )
+    )
+    print(json.dumps(results, indent=2))
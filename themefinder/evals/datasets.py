@@ -163,6 +163,32 @@ def _load_mapping(
     return dict(zip(df["response_id"].astype(str), df["labels"]))
 
 
+def _load_response_field(
+    config: DatasetConfig, question_part: str, filename: str, field: str
+) -> dict[str, str] | None:
+    """Load one per-response field from a mapping output file, if the dataset has it.
+
+    Args:
+        config: Dataset configuration
+        question_part: Which question part to load
+        filename: Output file name, e.g. detail_detection.jsonl
+        field: Column to load, e.g. evidence_rich
+
+    Returns:
+        Dict mapping response_id to the field's value, or None if the file is missing
+    """
+    outputs_dir = config.local_path / "outputs" / "mapping"
+    date_dirs = sorted(outputs_dir.iterdir(), reverse=True)
+    if not date_dirs:
+        raise FileNotFoundError(f"No output dates found in {outputs_dir}")
+
+    path = date_dirs[0] / question_part / filename
+    if not path.exists():
+        return None
+    df = pd.read_json(path, lines=True)
+    return dict(zip(df["response_id"].astype(str), df[field]))
+
+
 def _get_question_parts(config: DatasetConfig) -> list[str]:
     """Get available question parts for a dataset.
 
@@ -238,7 +264,15 @@ def load_local_mapping_data(config: DatasetConfig) -> list[dict]:
                         orient="records"
                     ),
                 },
-                "expected_output": {"mappings": mappings},
+                "expected_output": {
+                    "mappings": mappings,
+                    "evidence_rich": _load_response_field(
+                        config, question_part, "detail_detection.jsonl", "evidence_rich"
+                    ),
+                    "positions": _load_response_field(
+                        config, question_part, "sentiment.jsonl", "position"
+                    ),
+                },
                 "metadata": {"question_part": question_part},
             }
         )
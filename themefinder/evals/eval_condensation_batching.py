@@ -0,0 +1,150 @@
+"""Comparison of random and embedding-guided batching in theme condensation.
+
+Generates themes for each question of a dataset once, then condenses them with
+the default shuffled batches and with an embedder grouping similar themes, and
+reports the recursive rounds, LLM calls and prompt tokens each strategy used and
+the number of themes it condensed to.
+"""
+
+import argparse
+import asyncio
+import os
+from unittest.mock import patch
+
+import dotenv
+import pandas as pd
+import utils_gateway
+from datasets import DatasetConfig, load_local_data
+from themefinder.embeddings import OpenAIEmbedder
+from themefinder.llm import OpenAILLM
+from themefinder.llm_batch_processor import batch_and_run
+from utils import CountingLLM
+
+from themefinder import theme_condensation, theme_generation
+
+
+async def evaluate_condensation_batching(
+    dataset: str = "gambling_XS",
+    llm: OpenAILLM | None = None,
+    embedder: OpenAIEmbedder | None = None,
+    generation_batch_size: int = 10,
+    condensation_batch_size: int = 75,
+    runs: int = 3,
+) -> dict:
+    """Run the batching comparison.
+
+    Args:
+        dataset: Dataset identifier (e.g., "gambling_XS")
+        llm: Optional pre-configured LLM instance
+        embedder: Optional pre-configured embedder
+        generation_batch_size: Responses per theme generation batch. Smaller batches
+            generate more themes, so condensation needs more rounds.
+        condensation_batch_size: Themes per condensation batch
+        runs: Condensation runs per strategy, averaged as shuffling is random
+
+    Returns:
+        Dict containing rounds, calls, prompt tokens and theme counts per strategy
+    """
+    dotenv.load_dotenv()
+
+    if llm is None or embedder is None:
+        base_url, api_key = utils_gateway.gateway_credentials()
+    if llm is None:
+        llm = OpenAILLM(
+            model=os.getenv("AUTO_EVAL_4_1_SWEDEN_DEPLOYMENT"),
+            request_kwargs={"temperature": 0},
+            base_url=base_url,
+            api_key=api_key,
+        )
+    if embedder is None:
+        embedder = OpenAIEmbedder(
+            model=os.getenv("EVAL_EMBEDDING_MODEL", "text-embedding-3-large"),
+            base_url=base_url,
+            api_key=api_key,
+        )
+
+    all_scores = {}
+    for item in load_local_data(DatasetConfig(dataset=dataset, stage="generation")):
+        question_part = item.get("metadata", {}).get("question_part", "unknown")
+        question = item["input"]["question"]
+        responses_df = pd.DataFrame(item["input"]["responses"])
+        themes_df, _ = await theme_generation(
+            responses_df, llm, question=question, batch_size=generation_batch_size
+        )
+
+        scores = {}
+        for strategy, strategy_embedder in (("random", None), ("embedding", embedder)):
+            results = []
+            for _ in range(runs):
+                counting_llm = CountingLLM(llm)
+                with patch(
+                    "themefinder.tasks.batch_and_run", wraps=batch_and_run
+                ) as batch_and_run_spy:
+                    condensed_df, _ = await theme_condensation(
+                        themes_df.copy(),
+                        counting_llm,
+                        question=question,
+                        batch_size=condensation_batch_size,
+                        embedder=strategy_embedder,
+                    )
+                results.append(
+                    {
+                        # Every call but the final merge is a recursive round
+                        "rounds": batch_and_run_spy.call_count - 1,
+                        "calls": counting_llm.calls,
+                        "prompt_tokens": counting_llm.prompt_tokens,
+                        "themes": len(condensed_df),
+                    }
+                )
+            scores[strategy] = pd.DataFrame(results).mean().to_dict()
+
+        print(
+            f"Condensation batching ({question_part}, {len(themes_df)} themes):\n"
+            f"{pd.DataFrame(scores).to_string()}"
+        )
+        all_scores[f"{question_part}_generated_themes"] = len(themes_df)
+        for strategy, strategy_scores in scores.items():
+            for key, value in strategy_scores.items():
+                all_scores[f"{question_part}_{strategy}_{key}"] = value
+
+    return all_scores
+
+
+if __name__ == "__main__":
+    import nest_asyncio
+
+    nest_asyncio.apply()
+
+    parser = argparse.ArgumentParser(
+        description="Compare random and embedding-guided condensation batching"
+    )
+    parser.add_argument(
+        "--dataset",
+        default="gambling_XS",
+        help="Dataset identifier (e.g., gambling_XS)",
+    )
+    parser.add_argument(
+        "--generation-batch-size",
+        type=int,
+        default=10,
+        help="Responses per theme generation batch",
+    )
+    parser.add_argument(
+        "--condensation-batch-size",
+        type=int,
+        default=75,
+        help="Themes per condensation batch",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=3, help="Condensation runs per strategy"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        evaluate_condensation_batching(
+            dataset=args.dataset,
+            generation_batch_size=args.generation_batch_size,
+            condensation_batch_size=args.condensation_batch_size,
+            runs=args.runs,
+        )
+    )
@@ -15,7 +15,9 @@ import utils_gateway
 from datasets import DatasetConfig, load_local_data
 from evaluators import mapping_f1_evaluator
 from metrics import calculate_mapping_metrics
+from themefinder.embeddings import OpenAIEmbedder
 from themefinder.llm import OpenAILLM
+from utils import CountingLLM
 
 from themefinder import theme_mapping
 
@@ -25,6 +27,7 @@ async def evaluate_mapping(
     question_num: int | None = None,
     llm: OpenAILLM | None = None,
     langfuse_ctx: langfuse_utils.LangfuseContext | None = None,
+    shortlist_size: int | None = None,
 ) -> dict:
     """Run mapping evaluation.
 
@@ -33,6 +36,9 @@ async def evaluate_mapping(
         question_num: Optional specific question number (1-3) to evaluate
         llm: Optional pre-configured LLM instance (for benchmark runs)
         langfuse_ctx: Optional pre-configured Langfuse context (for benchmark runs)
+        shortlist_size: If set, also map each response against only this many
+            embedding-shortlisted themes and report its F1 and prompt tokens
+            alongside the full theme list's (local data only)
 
     Returns:
         Dict containing evaluation scores
@@ -63,10 +69,10 @@ async def evaluate_mapping(
         )
 
     # Branch: Langfuse dataset vs local fallback
-    if langfuse_ctx.is_enabled:
+    if langfuse_ctx.is_enabled and shortlist_size is None:
         result = await _run_with_langfuse(langfuse_ctx, config, llm, question_num)
     else:
-        result = await _run_local_fallback(config, llm, question_num)
+        result = await _run_local_fallback(config, llm, question_num, shortlist_size)
 
     # Only flush if we created the context
     if owns_context:
@@ -164,7 +170,10 @@ async def _run_with_langfuse(
 
 
 async def _run_local_fallback(
-    config: DatasetConfig, llm, question_num: int | None
+    config: DatasetConfig,
+    llm,
+    question_num: int | None,
+    shortlist_size: int | None = None,
 ) -> dict:
     """Run evaluation without Langfuse (local development).
 
@@ -172,6 +181,7 @@ async def _run_local_fallback(
         config: DatasetConfig
         llm: LangChain LLM instance
         question_num: Optional specific question to evaluate
+        shortlist_size: Optional number of shortlisted themes to compare against
 
     Returns:
         Dict containing evaluation scores
@@ -196,38 +206,61 @@ async def _run_local_fallback(
         topics_df = pd.DataFrame(item["input"]["topics"])
         expected_mappings = item["expected_output"]["mappings"]
 
-        result, unprocessable_df = await theme_mapping(
-            responses_df=responses_df[["response_id", "response"]],
-            llm=llm,
-            question=question,
-            refined_themes_df=topics_df[["topic_id", "topic"]],
-        )
-        if not unprocessable_df.empty:
-            print(
-                f"  Warning: {len(unprocessable_df)} responses could not be processed"
-            )
-
-        # Merge for comparison
         responses_df["topics"] = (
             responses_df["response_id"].astype(str).map(expected_mappings)
         )
-        responses_df = responses_df.merge(
-            result[["response_id", "labels"]], "inner", on="response_id"
-        )
+        runs = {"": {}}
+        if shortlist_size is not None:
+            runs["shortlist_"] = {
+                "embedder": _gateway_embedder(),
+                "shortlist_size": shortlist_size,
+            }
+
+        for prefix, shortlist_kwargs in runs.items():
+            counting_llm = CountingLLM(llm)
+            result, unprocessable_df = await theme_mapping(
+                responses_df=responses_df[["response_id", "response"]],
+                llm=counting_llm,
+                question=question,
+                refined_themes_df=topics_df[["topic_id", "topic"]],
+                **shortlist_kwargs,
+            )
+            if not unprocessable_df.empty:
+                print(
+                    f"  Warning: {len(unprocessable_df)} responses could not be processed"
+                )
 
-        mapping_metrics = calculate_mapping_metrics(
-            df=responses_df, column_one="topics", column_two="labels"
-        )
-        print(f"Theme Mapping ({question_part}): \n {mapping_metrics}")
+            # Merge for comparison
+            merged_df = responses_df.merge(
+                result[["response_id", "labels"]], "inner", on="response_id"
+            )
+
+            mapping_metrics = calculate_mapping_metrics(
+                df=merged_df, column_one="topics", column_two="labels"
+            )
+            mapping_metrics["prompt_tokens"] = counting_llm.prompt_tokens
+            # Shortlisting varies the theme table, so less of each prompt is cached
+            mapping_metrics["cached_tokens"] = counting_llm.cached_tokens
+            label = f"{question_part}, shortlisted" if prefix else question_part
+            print(f"Theme Mapping ({label}): \n {mapping_metrics}")
 
-        # Collect scores with question prefix
-        for key, value in mapping_metrics.items():
-            if isinstance(value, (int, float)):
-                all_scores[f"{question_part}_{key}"] = value
+            # Collect scores with question prefix
+            for key, value in mapping_metrics.items():
+                if isinstance(value, (int, float)):
+                    all_scores[f"{question_part}_{prefix}{key}"] = value
 
     return all_scores
 
 
+def _gateway_embedder() -> OpenAIEmbedder:
+    base_url, api_key = utils_gateway.gateway_credentials()
+    return OpenAIEmbedder(
+        model=os.getenv("EVAL_EMBEDDING_MODEL", "text-embedding-3-large"),
+        base_url=base_url,
+        api_key=api_key,
+    )
+
+
 if __name__ == "__main__":
     import nest_asyncio
 
@@ -242,6 +275,18 @@ if __name__ == "__main__":
     parser.add_argument(
         "--question", type=int, default=None, help="Specific question number (1-3)"
     )
+    parser.add_argument(
+        "--shortlist-size",
+        type=int,
+        default=None,
+        help="Also evaluate mapping against this many shortlisted themes",
+    )
     args = parser.parse_args()
 
-    asyncio.run(evaluate_mapping(dataset=args.dataset, question_num=args.question))
+    asyncio.run(
+        evaluate_mapping(
+            dataset=args.dataset,
+            question_num=args.question,
+            shortlist_size=args.shortlist_size,
+        )
+    )
@@ -0,0 +1,167 @@
+"""Evaluation of the fused theme mapping, detail detection and position task.
+
+Runs theme_mapping_with_detail and the separate theme_mapping and detail_detection
+stages over the same responses, and compares their quality against the dataset's
+expected outputs alongside the LLM calls and prompt tokens each approach uses.
+
+Expected detail and position labels only exist in the local datasets, so this
+eval always runs on local data.
+"""
+
+import argparse
+import asyncio
+import os
+
+import dotenv
+import langfuse_utils
+import pandas as pd
+import utils_gateway
+from datasets import DatasetConfig, load_local_data
+from metrics import calculate_mapping_metrics
+from themefinder.llm import OpenAILLM
+from utils import CountingLLM
+
+from themefinder import detail_detection, theme_mapping, theme_mapping_with_detail
+
+# Local datasets record positions as AGREE/DISAGREE, themefinder as AGREEMENT/...
+EXPECTED_POSITIONS = {"AGREE": "AGREEMENT", "DISAGREE": "DISAGREEMENT"}
+
+
+async def evaluate_mapping_with_detail(
+    dataset: str = "gambling_XS",
+    question_num: int | None = None,
+    llm: OpenAILLM | None = None,
+    langfuse_ctx: langfuse_utils.LangfuseContext | None = None,
+) -> dict:
+    """Run the fused versus separate mapping evaluation.
+
+    Args:
+        dataset: Dataset identifier (e.g., "gambling_XS")
+        question_num: Optional specific question number (1-3) to evaluate
+        llm: Optional pre-configured LLM instance (for benchmark runs)
+        langfuse_ctx: Accepted for benchmark runs; scores are computed locally
+
+    Returns:
+        Dict containing evaluation scores and usage for both approaches
+    """
+    dotenv.load_dotenv()
+
+    if llm is None:
+        base_url, api_key = utils_gateway.gateway_credentials()
+        llm = OpenAILLM(
+            model=os.getenv("AUTO_EVAL_4_1_SWEDEN_DEPLOYMENT"),
+            request_kwargs={"temperature": 0},
+            base_url=base_url,
+            api_key=api_key,
+        )
+
+    data_items = load_local_data(DatasetConfig(dataset=dataset, stage="mapping"))
+    if question_num is not None:
+        data_items = [
+            item
+            for item in data_items
+            if f"part_{question_num}"
+            in item.get("metadata", {}).get("question_part", "")
+        ]
+
+    all_scores = {}
+    for item in data_items:
+        question_part = item.get("metadata", {}).get("question_part", "unknown")
+        responses_df = pd.DataFrame(item["input"]["responses"])[
+            ["response_id", "response"]
+        ]
+        question = item["input"]["question"]
+        topics_df = pd.DataFrame(item["input"]["topics"])[["topic_id", "topic"]]
+        expected = item["expected_output"]
+
+        separate_llm = CountingLLM(llm)
+        mapping_df, _ = await theme_mapping(
+            responses_df, separate_llm, question=question, refined_themes_df=topics_df
+        )
+        detail_df, _ = await detail_detection(
+            responses_df, separate_llm, question=question
+        )
+        separate_df = mapping_df[["response_id", "labels"]].merge(
+            detail_df[["response_id", "evidence_rich"]], on="response_id"
+        )
+
+        fused_llm = CountingLLM(llm)
+        fused_df, _ = await theme_mapping_with_detail(
+            responses_df, fused_llm, question=question, refined_themes_df=topics_df
+        )
+
+        scores = {
+            "separate": _score(separate_df, expected)
+            | {
+                "calls": separate_llm.calls,
+                "prompt_tokens": separate_llm.prompt_tokens,
+            },
+            "fused": _score(fused_df, expected)
+            | {"calls": fused_llm.calls, "prompt_tokens": fused_llm.prompt_tokens},
+        }
+        print(
+            f"Mapping with detail ({question_part}):\n"
+            f"{pd.DataFrame(scores).to_string()}"
+        )
+        for approach, approach_scores in scores.items():
+            for key, value in approach_scores.items():
+                all_scores[f"{question_part}_{approach}_{key}"] = value
+
+    return all_scores
+
+
+def _score(result_df: pd.DataFrame, expected: dict) -> dict[str, float]:
+    """Mapping F1 and detail/position accuracy of one approach's output."""
+    result_df = result_df.assign(response_id=result_df["response_id"].astype(str))
+    result_df["topics"] = result_df["response_id"].map(expected["mappings"])
+    scores = {
+        "f1_score": calculate_mapping_metrics(
+            df=result_df.dropna(subset=["topics"]),
+            column_one="topics",
+            column_two="labels",
+        )["f1_score"]
+    }
+    if expected.get("evidence_rich"):
+        scores["evidence_rich_accuracy"] = _accuracy(
+            result_df, "evidence_rich", expected["evidence_rich"]
+        )
+    if expected.get("positions") and "position" in result_df:
+        positions = {
+            response_id: EXPECTED_POSITIONS.get(position, position)
+            for response_id, position in expected["positions"].items()
+        }
+        scores["position_accuracy"] = _accuracy(result_df, "position", positions)
+    return scores
+
+
+def _accuracy(result_df: pd.DataFrame, column: str, expected: dict[str, str]) -> float:
+    """Share of responses whose value in column matches the expected value."""
+    expected_values = result_df["response_id"].map(expected)
+    has_expected = expected_values.notna()
+    actual = result_df.loc[has_expected, column].map(
+        lambda value: getattr(value, "value", value)
+    )
+    return float((actual == expected_values[has_expected]).mean())
+
+
+if __name__ == "__main__":
+    import nest_asyncio
+
+    nest_asyncio.apply()
+
+    parser = argparse.ArgumentParser(
+        description="Compare fused mapping and detail detection with separate stages"
+    )
+    parser.add_argument(
+        "--dataset",
+        default="gambling_XS",
+        help="Dataset identifier (e.g., gambling_XS)",
+    )
+    parser.add_argument(
+        "--question", type=int, default=None, help="Specific question number (1-3)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(
+        evaluate_mapping_with_detail(dataset=args.dataset, question_num=args.question)
+    )
@@ -1,5 +1,7 @@
 from typing import Any
 
+from themefinder.llm_batch_processor import get_encoding
+
 
 def read_and_render(prompt_template: str, kwargs: Any = None) -> str:
     """Render a prompt template with provided variables.
@@ -14,3 +16,30 @@ def read_and_render(prompt_template: str, kwargs: Any = None) -> str:
     if kwargs:
         return prompt_template.format(**kwargs)
     return prompt_template
+
+
+class CountingLLM:
+    """LLM wrapper counting the calls made and the prompt tokens sent.
+
+    cached_tokens sums the prompt tokens the LLM reports as served from its
+    prompt cache.
+    """
+
+    def __init__(self, llm):
+        self.llm = llm
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self._encoding = get_encoding(getattr(llm, "model", None))
+
+    def __getattr__(self, name):
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    async def ainvoke(self, prompt, output_model=None):
+        self.calls += 1
+        self.prompt_tokens += len(self._encoding.encode_ordinary(prompt))
+        response = await self.llm.ainvoke(prompt, output_model=output_model)
+        self.cached_tokens += getattr(response, "cached_tokens", None) or 0
+        return response
@@ -1,11 +1,19 @@
+from .checkpoint import BatchCheckpoint
+from .concurrency import AdaptiveConcurrencyLimiter
+from .embeddings import Embedder, OpenAIEmbedder
 from .llm import LLM, LLMResponse, OpenAILLM
+from .llm_batch_processor import pack_batches
+from .llm_cache import CachedLLM, RedisLLMCache, SQLiteLLMCache
+from .run_report import RunReport
 from .tasks import (
     detail_detection,
     find_themes,
+    plan_find_themes,
     theme_clustering,
     theme_condensation,
     theme_generation,
     theme_mapping,
+    theme_mapping_with_detail,
     theme_refinement,
 )
 from .themeset_rules import (
@@ -19,11 +27,22 @@ __all__ = [
     "LLM",
     "LLMResponse",
     "OpenAILLM",
+    "AdaptiveConcurrencyLimiter",
+    "BatchCheckpoint",
+    "CachedLLM",
+    "Embedder",
+    "OpenAIEmbedder",
+    "RedisLLMCache",
+    "RunReport",
+    "SQLiteLLMCache",
     "find_themes",
+    "plan_find_themes",
+    "pack_batches",
     "theme_clustering",
     "theme_condensation",
     "theme_generation",
     "theme_mapping",
+    "theme_mapping_with_detail",
     "theme_refinement",
     "detail_detection",
     "rule_1_total_theme_number_less_than_70_slack",
@@ -0,0 +1,104 @@
+"""Durable checkpoints of completed LLM batches.
+
+Each batch's results are appended to a JSONL file as soon as the batch completes,
+keyed by a hash of its prompt, so a run that is interrupted can be restarted and
+only pay for the batches it had not finished. Only batches whose every row
+succeeded are recorded, so a batch that failed, e.g. on a timeout or a malformed
+output, is sent to the LLM again on restart rather than failing for good.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Callable
+from pathlib import Path
+from time import monotonic
+
+from pydantic import BaseModel
+
+from themefinder.themefinder_logging import logger
+
+
+class BatchCheckpoint:
+    """Append-only record of successfully completed batches and their rows.
+
+    Args:
+        path: Local JSONL file to append to; existing entries are loaded on open.
+        sync: Optional function copying the file somewhere durable (e.g. S3), called
+            at most every sync_interval seconds and on close.
+        sync_interval: Minimum seconds between syncs.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        sync: Callable[[Path], None] | None = None,
+        sync_interval: float = 30.0,
+    ):
+        self.path = Path(path)
+        self.sync = sync
+        self.sync_interval = sync_interval
+        self.completed = self._load()
+        self._last_sync = monotonic()
+        self._unsynced = False
+        self._file = None
+        if self.completed:
+            logger.info(
+                f"Resuming from {len(self.completed)} completed batches in {self.path}"
+            )
+
+    @staticmethod
+    def batch_key(prompt: str, output_model: type[BaseModel]) -> str:
+        """Hash identifying a batch by its prompt and expected output."""
+        return hashlib.sha256(f"{output_model.__name__}\n{prompt}".encode()).hexdigest()
+
+    def get(self, key: str) -> list[dict] | None:
+        return self.completed.get(key)
+
+    def record(self, key: str, rows: list[dict]) -> None:
+        """Durably append the rows of a batch that fully succeeded."""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a")
+            if self._file.tell() and not self._ends_with_newline():
+                # Don't append to a line the previous run didn't finish writing
+                self._file.write("\n")
+        line = json.dumps({"batch": key, "rows": rows}, default=str)
+        self._file.write(line + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.completed[key] = rows
+        self._unsynced = True
+        if self.sync and monotonic() - self._last_sync >= self.sync_interval:
+            self._sync()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.sync and self._unsynced:
+            self._sync()
+
+    def _sync(self) -> None:
+        self.sync(self.path)
+        self._last_sync = monotonic()
+        self._unsynced = False
+
+    def _ends_with_newline(self) -> bool:
+        with self.path.open("rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _load(self) -> dict[str, list[dict]]:
+        completed = {}
+        if not self.path.exists():
+            return completed
+        with self.path.open() as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A line cut short by the previous run being killed mid-write
+                    continue
+                completed[entry["batch"]] = entry["rows"]
+        return completed
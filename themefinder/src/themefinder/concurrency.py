@@ -0,0 +1,153 @@
+"""Adaptive concurrency limiting for LLM calls.
+
+AdaptiveConcurrencyLimiter raises the number of concurrent LLM calls while they
+succeed quickly, and cuts it (and pauses every caller) when the LLM gateway
+signals it is overloaded. Share one limiter between stages by passing it as the
+`concurrency` argument of any task.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from time import monotonic
+
+import openai
+
+from themefinder.themefinder_logging import logger
+
+# asyncio.wait_for raises asyncio.TimeoutError, which is only TimeoutError from 3.11
+TIMEOUT_ERRORS = (asyncio.TimeoutError, TimeoutError)
+
+# Errors meaning the gateway is overloaded, rather than that the request was bad
+THROTTLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, *TIMEOUT_ERRORS)
+
+
+class AdaptiveConcurrencyLimiter:
+    """Additive-increase/multiplicative-decrease (AIMD) limit on concurrent calls.
+
+    The limit rises by one after each round of `limit` successful calls within the
+    latency target. A rate-limit or timeout error multiplies the
+    limit by decrease_factor and pauses all new calls for backoff_seconds (or the
+    server's Retry-After), so callers back off together rather than retrying into
+    the same overload. Throttles within one backoff window only cut the limit once.
+
+    Args:
+        initial_limit: Concurrent calls allowed to begin with.
+        min_limit: Lowest the limit will be cut to.
+        max_limit: Highest the limit will be raised to.
+        decrease_factor: Multiplier applied to the limit on a throttle.
+        latency_target: Seconds above which a successful call doesn't raise the limit.
+        backoff_seconds: Pause after a throttle without a Retry-After header.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        decrease_factor: float = 0.5,
+        latency_target: float | None = None,
+        backoff_seconds: float = 5.0,
+    ):
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.backoff_seconds = backoff_seconds
+        self.in_flight = 0
+        self.peak_limit = initial_limit
+        self.successes = 0
+        self.throttles = 0
+        self._round_successes = 0
+        self._backoff_until = 0.0
+        self._condition: asyncio.Condition | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def metrics(self) -> dict[str, int]:
+        """Current state of the limiter, for logging and run reports."""
+        return {
+            "concurrency_limit": self.limit,
+            "peak_concurrency_limit": self.peak_limit,
+            "in_flight": self.in_flight,
+            "successes": self.successes,
+            "throttles": self.throttles,
+        }
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Wait for a free slot, then time the call made within it."""
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                backoff = self._backoff_until - monotonic()
+                if backoff > 0:
+                    try:
+                        await asyncio.wait_for(condition.wait(), backoff)
+                    except TIMEOUT_ERRORS:
+                        pass
+                elif self.in_flight < self.limit:
+                    break
+                else:
+                    await condition.wait()
+            self.in_flight += 1
+
+        start = monotonic()
+        try:
+            yield
+        except THROTTLE_ERRORS as e:
+            self._on_throttle(e)
+            raise
+        else:
+            self._on_success(monotonic() - start)
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify(max(1, self.limit - self.in_flight))
+
+    def _get_condition(self) -> asyncio.Condition:
+        # asyncio primitives belong to one event loop, and a limiter may outlive it
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def _on_success(self, latency: float) -> None:
+        self.successes += 1
+        if self.latency_target is not None and latency > self.latency_target:
+            return
+        self._round_successes += 1
+        if self._round_successes >= self.limit and self.limit < self.max_limit:
+            self._round_successes = 0
+            self.limit += 1
+            self.peak_limit = max(self.peak_limit, self.limit)
+            logger.debug(f"LLM concurrency limit raised to {self.limit}")
+
+    def _on_throttle(self, error: Exception) -> None:
+        self.throttles += 1
+        now = monotonic()
+        if now < self._backoff_until:
+            # Already backing off for this burst of throttling
+            return
+        self.limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        self._round_successes = 0
+        self._backoff_until = now + _retry_after(error, self.backoff_seconds)
+        logger.warning(
+            f"LLM gateway throttled ({type(error).__name__}), concurrency limit cut to "
+            f"{self.limit}"
+        )
+
+
+def _retry_after(error: Exception, default: float) -> float:
+    """Seconds the server asked us to wait, if it said."""
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return default
+
+
+# What tasks accept as their concurrency argument: a fixed limit, or a limit shared
+# with other calls
+Concurrency = int | asyncio.Semaphore | AdaptiveConcurrencyLimiter
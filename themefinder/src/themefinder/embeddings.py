@@ -0,0 +1,166 @@
+"""Text embeddings for grouping semantically similar inputs into the same LLM batch.
+
+Provides a Protocol-based interface for embedding models, an OpenAI implementation,
+greedy nearest-neighbour packing of embedded items into batches, and k-means
+grouping that scales that packing to hundreds of thousands of items.
+"""
+
+from collections.abc import Callable
+from typing import Protocol, runtime_checkable
+
+import numpy as np
+import openai
+from sklearn.cluster import MiniBatchKMeans
+
+
+@runtime_checkable
+class Embedder(Protocol):
+    """Protocol defining the embedding model interface for themefinder."""
+
+    async def aembed(self, texts: list[str]) -> np.ndarray: ...
+
+
+class OpenAIEmbedder:
+    """OpenAI SDK implementation of the Embedder protocol.
+
+    Args:
+        model: Embedding model name.
+        batch_size: Texts to send in each embeddings request.
+        **client_kwargs: Passed to openai.AsyncOpenAI, e.g. base_url and api_key.
+    """
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-large",
+        batch_size: int = 1000,
+        **client_kwargs,
+    ):
+        self.model = model
+        self.batch_size = batch_size
+        self.client = openai.AsyncOpenAI(**client_kwargs)
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            response = await self.client.embeddings.create(
+                input=texts[start : start + self.batch_size], model=self.model
+            )
+            embeddings.extend(item.embedding for item in response.data)
+        return np.array(embeddings, dtype=np.float32)
+
+
+async def embed(
+    embedder: Embedder, texts: list[str], cache: dict[str, np.ndarray] | None = None
+) -> np.ndarray:
+    """Embed texts as unit vectors, so dot products are cosine similarities.
+
+    Args:
+        embedder: Embedding model to use.
+        texts: Texts to embed.
+        cache: Optional dict of previously embedded texts, updated with new ones so
+            texts repeated across calls are only embedded once.
+
+    Returns:
+        Array with one row per text.
+    """
+    cache = {} if cache is None else cache
+    missing = list(dict.fromkeys(text for text in texts if text not in cache))
+    if missing:
+        embeddings = np.asarray(await embedder.aembed(missing), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / np.where(norms == 0, 1, norms)
+        cache.update(zip(missing, embeddings, strict=True))
+    return np.stack([cache[text] for text in texts])
+
+
+def similarity_batches(embeddings: np.ndarray, batch_size: int) -> list[list[int]]:
+    """Pack items into batches of their nearest neighbours.
+
+    Each batch starts from the first item not yet batched and takes the
+    batch_size - 1 unbatched items most similar to it.
+
+    Args:
+        embeddings: Unit vectors, one row per item.
+        batch_size: Maximum items per batch.
+
+    Returns:
+        Row indices of each batch; every row appears in exactly one batch.
+    """
+    remaining = np.arange(len(embeddings))
+    batches = []
+    while len(remaining):
+        similarity = embeddings[remaining] @ embeddings[remaining[0]]
+        # The seed is always most similar to itself, so is always taken
+        nearest = np.argsort(-similarity, kind="stable")[:batch_size]
+        batches.append(remaining[np.sort(nearest)].tolist())
+        remaining = np.delete(remaining, nearest)
+    return batches
+
+
+def random_projection(
+    dimensions: int, reduced_dimensions: int, seed: int = 0
+) -> Callable[[np.ndarray], np.ndarray]:
+    """A function projecting unit vectors down to reduced_dimensions, as unit vectors.
+
+    A random Gaussian projection approximately preserves the similarities between
+    vectors, so grouping can run on a fraction of the memory of full embeddings.
+    Vectors with no more than reduced_dimensions are returned unchanged.
+
+    Args:
+        dimensions: Dimensions of the vectors to project.
+        reduced_dimensions: Dimensions to project them to.
+        seed: Seed of the projection, which must be shared by vectors compared.
+
+    Returns:
+        Function mapping an array of vectors, one per row, to their projections.
+    """
+    if dimensions <= reduced_dimensions:
+        return lambda embeddings: embeddings
+    projection = np.random.default_rng(seed).normal(
+        size=(dimensions, reduced_dimensions)
+    )
+    projection = projection.astype(np.float32)
+
+    def project(embeddings: np.ndarray) -> np.ndarray:
+        projected = embeddings @ projection
+        norms = np.linalg.norm(projected, axis=1, keepdims=True)
+        return projected / np.where(norms == 0, 1, norms)
+
+    return project
+
+
+def similarity_groups(
+    embeddings: np.ndarray, group_size: int, chunk_size: int = 1000, seed: int = 0
+) -> list[list[int]]:
+    """Pack items into groups of similar items, in time linear in the items.
+
+    Items are clustered with k-means into clusters of about chunk_size items, and
+    each cluster is split into chunks of at most chunk_size items that are packed
+    with similarity_batches. This costs O(n * chunk_size * d) rather than
+    similarity_batches' O(n^2 * d) over all items.
+
+    Args:
+        embeddings: Unit vectors, one row per item, e.g. from random_projection.
+        group_size: Maximum items per group.
+        chunk_size: Items packed together at a time.
+        seed: Seed of the k-means clustering.
+
+    Returns:
+        Row indices of each group; every row appears in exactly one group.
+    """
+    n_clusters = -(-len(embeddings) // chunk_size)
+    if n_clusters <= 1:
+        return similarity_batches(embeddings, group_size)
+    labels = MiniBatchKMeans(
+        n_clusters=n_clusters, random_state=seed, n_init=1, batch_size=4096
+    ).fit_predict(embeddings)
+    groups = []
+    for cluster in range(n_clusters):
+        rows = np.flatnonzero(labels == cluster)
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start : start + chunk_size]
+            groups.extend(
+                chunk[batch].tolist()
+                for batch in similarity_batches(embeddings[chunk], group_size)
+            )
+    return groups
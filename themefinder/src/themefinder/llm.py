@@ -6,18 +6,40 @@ and an OpenAI implementation. Designed for easy extension to other providers.
 
 import asyncio
 import concurrent.futures
+import time
 from dataclasses import dataclass
 from typing import Protocol, runtime_checkable
 
 import openai
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 
 
 @dataclass
 class LLMResponse:
-    """Wraps an LLM call result."""
+    """Wraps an LLM call result.
+
+    Usage is None when the LLM doesn't report it. cached_tokens is the part of
+    prompt_tokens served from the provider's prompt cache, and latency is the time
+    the request took in seconds.
+    """
 
     parsed: BaseModel | str
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cached_tokens: int | None = None
+    latency: float | None = None
+
+
+class StructuredOutputError(ValueError):
+    """The LLM's output didn't validate against the requested output model.
+
+    Keeps the raw output so that the items which are valid can still be used.
+    """
+
+    def __init__(self, content: str, error: ValidationError):
+        super().__init__(str(error))
+        self.content = content
+        self.error = error
 
 
 @runtime_checkable
@@ -54,13 +76,30 @@ class OpenAILLM:
             "messages": [{"role": "user", "content": prompt}],
             **self.request_kwargs,
         }
+        start = time.perf_counter()
         if output_model:
             kwargs["response_format"] = output_model
-            response = await self.client.chat.completions.parse(**kwargs)
-            return LLMResponse(parsed=response.choices[0].message.parsed)
+            raw_response = await self.client.chat.completions.with_raw_response.parse(
+                **kwargs
+            )
+            latency = time.perf_counter() - start
+            try:
+                response = raw_response.parse()
+            except ValidationError as e:
+                content = raw_response.http_response.json()["choices"][0]["message"]
+                raise StructuredOutputError(content["content"], e) from e
+            return LLMResponse(
+                parsed=response.choices[0].message.parsed,
+                latency=latency,
+                **_token_counts(response),
+            )
         else:
             response = await self.client.chat.completions.create(**kwargs)
-            return LLMResponse(parsed=response.choices[0].message.content)
+            return LLMResponse(
+                parsed=response.choices[0].message.content,
+                latency=time.perf_counter() - start,
+                **_token_counts(response),
+            )
 
     def invoke(
         self, prompt: str, output_model: type[BaseModel] | None = None
@@ -76,3 +115,15 @@ class OpenAILLM:
                     asyncio.run, self.ainvoke(prompt, output_model)
                 ).result()
         return asyncio.run(self.ainvoke(prompt, output_model))
+
+
+def _token_counts(response) -> dict[str, int | None]:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return {}
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", None),
+    }
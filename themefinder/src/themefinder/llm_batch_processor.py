@@ -1,11 +1,16 @@
 import asyncio
+import json
 import logging
 import os
+from collections.abc import Callable
 from dataclasses import dataclass
-from typing import Any, Optional
+from functools import cache, lru_cache
+from typing import Any, Optional, get_args
 
+import numpy as np
 import openai
 import pandas as pd
+import pyarrow as pa
 import tiktoken
 from pydantic import BaseModel, ValidationError
 from tenacity import (
@@ -16,9 +21,45 @@ from tenacity import (
     wait_random_exponential,
 )
 
-from themefinder.llm import LLM, LLMResponse
+from themefinder.checkpoint import BatchCheckpoint
+from themefinder.concurrency import AdaptiveConcurrencyLimiter, Concurrency
+from themefinder.llm import LLM, LLMResponse, StructuredOutputError
+from themefinder.run_report import RunReport, StageUsage
 from themefinder.themefinder_logging import logger
 
+# Per-row token lengths are stored in this column while a DataFrame is being batched,
+# so they're only counted once per call to batch_and_run, including retries
+TOKEN_LENGTH_COLUMN = "_token_length"
+
+# Number of rows whose token lengths are remembered, so stages that see the same
+# responses (e.g. mapping and detail detection) don't re-encode them
+ROW_TOKEN_LENGTH_CACHE_SIZE = 100_000
+
+# Rows are batched within the groups in this column, and each group's prompts are
+# formatted with its own group_kwargs, e.g. the themes shortlisted for the group
+GROUP_COLUMN = "_group"
+
+# Each row's position in the input is carried in this column through the batch
+# planner, so prompts can be built from slices of the input's Arrow table
+ROW_POSITION_COLUMN = "_row_position"
+
+# Columns batch_and_run uses for its own bookkeeping, kept out of prompts and outputs
+HIDDEN_COLUMNS = [TOKEN_LENGTH_COLUMN, GROUP_COLUMN, ROW_POSITION_COLUMN]
+
+# Arrow types whose values to_pylist gives exactly as pandas' to_dict does, so
+# prompts built from an Arrow table match those built from a DataFrame
+_PROMPT_SAFE_TYPES = (
+    pa.types.is_integer,
+    pa.types.is_floating,
+    pa.types.is_boolean,
+    pa.types.is_string,
+    pa.types.is_large_string,
+)
+
+
+# Splits a DataFrame into batches: (df, allowed_tokens, batch_size, partition_key) -> batches
+BatchPlanner = Callable[[pd.DataFrame, int, int, str | None], list[pd.DataFrame]]
+
 
 @dataclass
 class BatchPrompt:
@@ -26,6 +67,15 @@ class BatchPrompt:
     response_ids: list[int]
 
 
+@dataclass
+class BatchPlanReport:
+    rows: int
+    batched_rows: int
+    calls: int
+    prompt_tokens: int
+    max_prompt_tokens: int
+
+
 async def batch_and_run(
     input_df: pd.DataFrame,
     prompt_template: str,
@@ -34,7 +84,12 @@ async def batch_and_run(
     batch_size: int = 10,
     partition_key: str | None = None,
     integrity_check: bool = False,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+    stage: str | None = None,
+    group_kwargs: dict[Any, dict] | None = None,
     **kwargs: Any,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Process a DataFrame of responses in batches using an LLM.
@@ -47,7 +102,19 @@ async def batch_and_run(
         batch_size: Number of input rows to process in each batch. Defaults to 10.
         partition_key: Optional column name to group input rows before batching.
         integrity_check: If True, verifies that all input response IDs are present in LLM output.
-        concurrency: Maximum number of simultaneous LLM calls allowed. Defaults to 10.
+        concurrency: Maximum number of simultaneous LLM calls allowed, or an
+            asyncio.Semaphore or AdaptiveConcurrencyLimiter shared between stages.
+            Defaults to 10.
+        batch_planner: Function splitting the input into batches, e.g. pack_batches.
+            Defaults to batch_task_input_df.
+        checkpoint: Optional BatchCheckpoint recording completed batches, so a
+            restarted run skips them.
+        run_report: Optional RunReport to record the usage of the LLM calls into.
+        stage: Name of the stage to record the usage under. Defaults to the name
+            of the output model.
+        group_kwargs: Optional prompt template arguments for each group of the
+            GROUP_COLUMN. Rows are only batched with rows of the same group, and
+            each batch's prompt is formatted with its group's arguments.
         **kwargs: Additional keyword arguments to pass to the prompt template.
 
     Returns:
@@ -57,12 +124,16 @@ async def batch_and_run(
     """
 
     logger.info(f"Running batch and run with batch size {batch_size}")
+    usage = run_report.stage(stage or output_model.__name__) if run_report else None
+    input_df = with_token_lengths(input_df)
     template_str = prompt_template
     batch_prompts = generate_prompts(
         template_str,
         input_df,
         batch_size=batch_size,
         partition_key=partition_key,
+        batch_planner=batch_planner,
+        group_kwargs=group_kwargs,
         **kwargs,
     )
     processed_rows, failed_ids = await call_llm(
@@ -71,27 +142,120 @@ async def batch_and_run(
         output_model=output_model,
         integrity_check=integrity_check,
         concurrency=concurrency,
+        checkpoint=checkpoint,
+        usage=usage,
     )
     processed_results = process_llm_responses(processed_rows, input_df)
 
     if failed_ids:
         retry_df = input_df[input_df["response_id"].isin(failed_ids)]
-        retry_prompts = generate_prompts(
-            prompt_template, retry_df, batch_size=1, **kwargs
-        )
-        retry_results, unprocessable_ids = await call_llm(
-            batch_prompts=retry_prompts,
+        # Regroup the failed rows by the batch they were sent in
+        batch_of_response = {
+            response_id: i
+            for i, batch_prompt in enumerate(batch_prompts)
+            for response_id in batch_prompt.response_ids
+        }
+        failed_batches = [
+            batch
+            for _, batch in retry_df.groupby(
+                retry_df["response_id"].map(batch_of_response)
+            )
+        ]
+        retry_results, unprocessable_ids = await retry_by_bisection(
+            failed_batches,
+            prompt_template,
             llm=llm,
             output_model=output_model,
             integrity_check=integrity_check,
             concurrency=concurrency,
+            checkpoint=checkpoint,
+            usage=usage,
+            group_kwargs=group_kwargs,
+            **kwargs,
         )
         retry_processed_results = process_llm_responses(retry_results, retry_df)
         unprocessable_df = retry_df.loc[retry_df["response_id"].isin(unprocessable_ids)]
         processed_results = pd.concat([processed_results, retry_processed_results])
     else:
         unprocessable_df = pd.DataFrame()
-    return processed_results, unprocessable_df
+    return (
+        processed_results.drop(columns=HIDDEN_COLUMNS, errors="ignore"),
+        unprocessable_df.drop(columns=HIDDEN_COLUMNS, errors="ignore"),
+    )
+
+
+async def retry_by_bisection(
+    failed_batches: list[pd.DataFrame],
+    prompt_template: str,
+    llm: LLM,
+    output_model: type[BaseModel],
+    integrity_check: bool = False,
+    concurrency: Concurrency = 10,
+    checkpoint: BatchCheckpoint | None = None,
+    usage: StageUsage | None = None,
+    group_kwargs: dict[Any, dict] | None = None,
+    **kwargs: Any,
+) -> tuple[list[dict], list[int]]:
+    """Retry the failed rows of each batch in halves, until the rows that keep failing
+    are isolated.
+
+    Each round sends every failed batch to the LLM as two halves. The rows that fail
+    again are split again, so one bad row among n costs about 2 * log2(n) calls
+    rather than n. A row that fails on its own is unprocessable.
+
+    Args:
+        failed_batches: The failed rows of each batch, with a 'response_id' column.
+        prompt_template: Prompt template string.
+        llm: LLM instance that will process the prompts.
+        output_model: Pydantic model class for structured LLM output.
+        integrity_check: If True, verifies that all input response IDs are present in LLM output.
+        concurrency: Maximum number of simultaneous LLM calls allowed, or an
+            asyncio.Semaphore or AdaptiveConcurrencyLimiter shared between stages.
+        checkpoint: Optional BatchCheckpoint recording completed batches.
+        usage: Optional StageUsage to record the LLM calls into.
+        group_kwargs: Optional prompt template arguments for each group of the
+            GROUP_COLUMN, as in batch_and_run.
+        **kwargs: Additional keyword arguments to pass to the prompt template.
+
+    Returns:
+        Tuple of (processed_rows, unprocessable_ids).
+    """
+    processed_rows: list[dict] = []
+    unprocessable_ids: list[int] = []
+    while failed_batches:
+        halves = [half for batch in failed_batches for half in _halve(batch)]
+        rows, failed_ids = await call_llm(
+            batch_prompts=[
+                build_prompt(
+                    prompt_template, half, **_prompt_kwargs(half, group_kwargs, kwargs)
+                )
+                for half in halves
+            ],
+            llm=llm,
+            output_model=output_model,
+            integrity_check=integrity_check,
+            concurrency=concurrency,
+            checkpoint=checkpoint,
+            usage=usage,
+        )
+        processed_rows.extend(rows)
+        failed_batches = []
+        for half in halves:
+            failed = half[half["response_id"].isin(failed_ids)]
+            if failed.empty:
+                continue
+            if len(half) == 1:
+                unprocessable_ids.extend(failed["response_id"].astype(int))
+            else:
+                failed_batches.append(failed)
+    return processed_rows, unprocessable_ids
+
+
+def _halve(batch: pd.DataFrame) -> list[pd.DataFrame]:
+    if len(batch) == 1:
+        return [batch]
+    middle = (len(batch) + 1) // 2
+    return [batch.iloc[:middle], batch.iloc[middle:]]
 
 
 def partition_dataframe(
@@ -110,6 +274,9 @@ def split_overflowing_batch(
     Splits a DataFrame batch into smaller sub-batches such that each sub-batch's total token count
     does not exceed the allowed token limit.
 
+    Row token counts are read from the TOKEN_LENGTH_COLUMN if present, otherwise
+    each row is counted individually.
+
     Args:
         batch: The input DataFrame to split.
         allowed_tokens: The maximum allowed number of tokens per sub-batch.
@@ -120,9 +287,12 @@ def split_overflowing_batch(
     sub_batches = []
     current_indices = []
     current_token_sum = 0
-    token_counts = batch.apply(
-        lambda row: calculate_string_token_length(row.to_json()), axis=1
-    ).tolist()
+    if TOKEN_LENGTH_COLUMN in batch.columns:
+        token_counts = batch[TOKEN_LENGTH_COLUMN].tolist()
+    else:
+        token_counts = batch.apply(
+            lambda row: calculate_string_token_length(row.to_json()), axis=1
+        ).tolist()
 
     for i, token_count in enumerate(token_counts):
         if token_count > allowed_tokens:
@@ -177,7 +347,10 @@ def batch_task_input_df(
             for i in range(0, len(partition), batch_size)
         ]
         for batch in partition_batches:
-            batch_length = calculate_string_token_length(batch.to_json())
+            if TOKEN_LENGTH_COLUMN in batch.columns:
+                batch_length = int(batch[TOKEN_LENGTH_COLUMN].sum())
+            else:
+                batch_length = calculate_string_token_length(batch.to_json())
             if batch_length <= allowed_tokens:
                 batches.append(batch)
             else:
@@ -186,12 +359,89 @@ def batch_task_input_df(
     return batches
 
 
+def pack_batches(
+    df: pd.DataFrame,
+    allowed_tokens: int,
+    batch_size: int,
+    partition_key: str | None = None,
+) -> list[pd.DataFrame]:
+    """
+    Packs a DataFrame into as few batches as possible using first-fit-decreasing
+    on each row's token length, so short responses fill each prompt's token budget
+    rather than being sliced into fixed-size chunks.
+
+    Rows keep their original order within each batch, and rows from different
+    partitions are never batched together.
+
+    Args:
+        df: The input DataFrame to batch.
+        allowed_tokens: Maximum allowed tokens per batch.
+        batch_size: Maximum number of rows per batch.
+        partition_key: Column name to partition the DataFrame by.
+
+    Returns:
+        A list of batches, each within the specified token and size limits.
+    """
+    batches = []
+    for partition in partition_dataframe(with_token_lengths(df), partition_key):
+        token_counts = partition[TOKEN_LENGTH_COLUMN].to_numpy()
+        oversized = token_counts > allowed_tokens
+        for i in np.flatnonzero(oversized):
+            logger.warning(
+                f"Row at index {partition.index[i]} exceeds allowed token limit ({token_counts[i]} > {allowed_tokens}). Skipping row."
+            )
+
+        order = np.flatnonzero(~oversized)
+        order = order[np.argsort(-token_counts[order], kind="stable")]
+        bins = _first_fit(token_counts[order].tolist(), allowed_tokens, batch_size)
+        for rows in bins:
+            batches.append(partition.iloc[np.sort(order[rows])].reset_index(drop=True))
+    return batches
+
+
+def _first_fit(sizes: list[int], capacity: int, max_items: int) -> list[list[int]]:
+    """
+    Assigns each item to the first bin with room for it, returning the item
+    positions in each bin.
+
+    A max-tree over the bins' remaining capacity finds the first fit in
+    O(log n) rather than scanning every open bin. Full bins have capacity -1.
+    """
+    leaves = 1
+    while leaves < len(sizes):
+        leaves *= 2
+    tree = [-1] * (2 * leaves)
+    for leaf in range(len(sizes)):
+        tree[leaves + leaf] = capacity
+    for node in range(leaves - 1, 0, -1):
+        tree[node] = max(tree[2 * node], tree[2 * node + 1])
+
+    bins: list[list[int]] = []
+    for position, size in enumerate(sizes):
+        node = 1
+        while node < leaves:
+            node = 2 * node if tree[2 * node] >= size else 2 * node + 1
+        leaf = node - leaves
+        if leaf == len(bins):
+            bins.append([])
+        bins[leaf].append(position)
+
+        tree[node] = tree[node] - size if len(bins[leaf]) < max_items else -1
+        node //= 2
+        while node:
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+    return bins
+
+
 def generate_prompts(
     template_str: str,
     input_data: pd.DataFrame,
     batch_size: int = 50,
     max_prompt_length: int = 50_000,
     partition_key: str | None = None,
+    batch_planner: BatchPlanner | None = None,
+    group_kwargs: dict[Any, dict] | None = None,
     **kwargs,
 ) -> list[BatchPrompt]:
     """
@@ -204,47 +454,152 @@ def generate_prompts(
         batch_size: Maximum number of rows to include in each batch. Defaults to 50.
         max_prompt_length: The maximum total token length allowed for the prompt. Defaults to 50,000.
         partition_key: Column name used to partition the DataFrame before batching.
+        batch_planner: Function splitting the input into batches. Defaults to batch_task_input_df.
+        group_kwargs: Optional template arguments for each group of the GROUP_COLUMN,
+            which the input is then partitioned by.
         **kwargs: Additional keyword arguments to pass to the template's format method.
 
     Returns:
         A list of BatchPrompt objects.
     """
+    if group_kwargs is not None:
+        if partition_key not in (None, GROUP_COLUMN):
+            raise ValueError("group_kwargs can't be combined with a partition_key")
+        partition_key = GROUP_COLUMN
+    batch_planner = batch_planner or batch_task_input_df
     prompt_token_length = calculate_string_token_length(template_str)
     allowed_tokens_for_data = max_prompt_length - prompt_token_length
-    batches = batch_task_input_df(
+    input_data = with_token_lengths(input_data)
+    table = response_table(input_data)
+    if table is not None:
+        input_data = input_data.assign(
+            **{ROW_POSITION_COLUMN: np.arange(len(input_data))}
+        )
+    batches = batch_planner(
         input_data, allowed_tokens_for_data, batch_size, partition_key
     )
-    prompts = [build_prompt(template_str, batch, **kwargs) for batch in batches]
+    prompts = [
+        build_prompt_from_table(
+            template_str,
+            table,
+            batch[ROW_POSITION_COLUMN].to_numpy(),
+            **_prompt_kwargs(batch, group_kwargs, kwargs),
+        )
+        if table is not None and ROW_POSITION_COLUMN in batch.columns
+        else build_prompt(
+            template_str, batch, **_prompt_kwargs(batch, group_kwargs, kwargs)
+        )
+        for batch in batches
+    ]
     return prompts
 
 
+def _prompt_kwargs(
+    batch: pd.DataFrame, group_kwargs: dict[Any, dict] | None, kwargs: dict
+) -> dict:
+    """The template arguments of a batch, including those of its group."""
+    if not group_kwargs or batch.empty:
+        return kwargs
+    return {**kwargs, **group_kwargs[batch[GROUP_COLUMN].iloc[0]]}
+
+
+def plan_batch_and_run(
+    input_df: pd.DataFrame,
+    prompt_template: str,
+    batch_size: int = 10,
+    partition_key: str | None = None,
+    batch_planner: BatchPlanner | None = None,
+    **kwargs: Any,
+) -> BatchPlanReport:
+    """Report the LLM calls batch_and_run would make for an input, without making them.
+
+    Args:
+        input_df: DataFrame containing input to be processed. Must include a 'response_id' column.
+        prompt_template: Prompt template string.
+        batch_size: Number of input rows to process in each batch. Defaults to 10.
+        partition_key: Optional column name to group input rows before batching.
+        batch_planner: Function splitting the input into batches. Defaults to batch_task_input_df.
+        **kwargs: Additional keyword arguments to pass to the prompt template.
+
+    Returns:
+        BatchPlanReport with the number of calls and prompt tokens, excluding retries.
+    """
+    batch_prompts = generate_prompts(
+        prompt_template,
+        input_df,
+        batch_size=batch_size,
+        partition_key=partition_key,
+        batch_planner=batch_planner,
+        **kwargs,
+    )
+    encoding = get_encoding()
+    prompt_tokens = [
+        len(encoding.encode_ordinary(batch_prompt.prompt_string))
+        for batch_prompt in batch_prompts
+    ]
+    return BatchPlanReport(
+        rows=len(input_df),
+        batched_rows=sum(len(prompt.response_ids) for prompt in batch_prompts),
+        calls=len(batch_prompts),
+        prompt_tokens=sum(prompt_tokens),
+        max_prompt_tokens=max(prompt_tokens, default=0),
+    )
+
+
 async def call_llm(
     batch_prompts: list[BatchPrompt],
     llm: LLM,
     output_model: type[BaseModel],
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
     integrity_check: bool = False,
+    checkpoint: BatchCheckpoint | None = None,
+    usage: StageUsage | None = None,
 ) -> tuple[list[dict], list[int]]:
     """Process multiple batches of prompts concurrently through an LLM with retry logic.
 
+    Args:
+        concurrency: Maximum number of simultaneous LLM calls, or an asyncio.Semaphore
+            or AdaptiveConcurrencyLimiter to share a limit between calls.
+        checkpoint: Optional BatchCheckpoint. Batches already in it aren't sent to
+            the LLM, and each batch is recorded in it as soon as all its rows succeed.
+        usage: Optional StageUsage to record the LLM calls, retries and failures into.
+
     Returns:
         Tuple of (processed_rows, failed_ids).
     """
-    semaphore = asyncio.Semaphore(concurrency)
+    if isinstance(concurrency, AdaptiveConcurrencyLimiter):
+        slot = concurrency.slot
+    else:
+        semaphore = (
+            concurrency
+            if isinstance(concurrency, asyncio.Semaphore)
+            else asyncio.Semaphore(concurrency)
+        )
+
+        def slot():
+            return semaphore
+
+    calls_usage = StageUsage()
+    log_retry = before_sleep_log(logger, logging.ERROR)
+
+    def before_retry(retry_state) -> None:
+        calls_usage.retries += 1
+        log_retry(retry_state)
 
     @retry(
         wait=wait_random_exponential(min=1, max=20),
         stop=stop_after_attempt(6),
         before=before.before_log(logger=logger, log_level=logging.DEBUG),
-        before_sleep=before_sleep_log(logger, logging.ERROR),
+        before_sleep=before_retry,
         reraise=True,
     )
     async def async_llm_call(batch_prompt) -> tuple[list[dict], list[int]]:
-        async with semaphore:
+        async with slot():
             try:
                 llm_response: LLMResponse = await llm.ainvoke(
                     batch_prompt.prompt_string, output_model=output_model
                 )
+                calls_usage.record(llm_response)
                 all_results = (
                     llm_response.parsed.model_dump()
                     if hasattr(llm_response.parsed, "model_dump")
@@ -255,11 +610,19 @@ async def call_llm(
                     if isinstance(all_results, dict)
                     else all_results.responses
                 )
+            except StructuredOutputError as e:
+                logger.warning(e)
+                calls_usage.record_failure()
+                return salvage_valid_rows(
+                    e.content, output_model, batch_prompt.response_ids
+                )
             except (openai.BadRequestError, ValueError) as e:
                 logger.warning(e)
+                calls_usage.record_failure()
                 return [], batch_prompt.response_ids
             except ValidationError as e:
                 logger.warning(e)
+                calls_usage.record_failure()
                 return [], batch_prompt.response_ids
 
             if integrity_check:
@@ -270,9 +633,29 @@ async def call_llm(
             else:
                 return responses, []
 
+    async def checkpointed_llm_call(batch_prompt) -> tuple[list[dict], list[int]]:
+        key = checkpoint.batch_key(batch_prompt.prompt_string, output_model)
+        if (completed := checkpoint.get(key)) is not None:
+            return completed, []
+        rows, failed_ids = await async_llm_call(batch_prompt)
+        # Failed batches aren't recorded, so they're retried rather than replayed
+        if not failed_ids:
+            checkpoint.record(key, rows)
+        return rows, failed_ids
+
+    llm_call = checkpointed_llm_call if checkpoint else async_llm_call
     results = await asyncio.gather(
-        *[async_llm_call(batch_prompt) for batch_prompt in batch_prompts]
+        *[llm_call(batch_prompt) for batch_prompt in batch_prompts]
     )
+    if calls_usage.prompt_tokens:
+        logger.info(
+            f"Prompt cache: {calls_usage.cached_tokens} of "
+            f"{calls_usage.prompt_tokens} prompt tokens cached "
+            f"({calls_usage.cached_tokens / calls_usage.prompt_tokens:.0%}) "
+            f"over {calls_usage.calls} calls"
+        )
+    if usage is not None:
+        usage.merge(calls_usage)
     valid_inputs = [row for result, _ in results for row in result]
     failed_response_ids = [
         failed_response_id
@@ -283,6 +666,45 @@ async def call_llm(
     return valid_inputs, failed_response_ids
 
 
+def salvage_valid_rows(
+    content: str, output_model: type[BaseModel], response_ids: list[int]
+) -> tuple[list[dict], list[int]]:
+    """Keep the items of an LLM output that validate, when the output as a whole doesn't.
+
+    Only outputs whose items are keyed by response_id can be salvaged, as otherwise
+    there's no telling which inputs the invalid items were for.
+
+    Args:
+        content: The LLM's raw JSON output.
+        output_model: Pydantic model the output failed to validate against.
+        response_ids: Response IDs that were included in the prompt.
+
+    Returns:
+        Tuple of (valid_rows, failed_ids).
+    """
+    field = output_model.model_fields.get("responses")
+    item_models = get_args(field.annotation) if field else ()
+    if not item_models or "response_id" not in item_models[0].model_fields:
+        return [], response_ids
+    try:
+        items = json.loads(content)["responses"]
+    except (json.JSONDecodeError, KeyError, TypeError):
+        return [], response_ids
+
+    expected_ids = set(response_ids)
+    valid_rows = {}
+    for item in items:
+        try:
+            row = item_models[0].model_validate(item).model_dump()
+        except ValidationError:
+            continue
+        if row["response_id"] in expected_ids:
+            valid_rows.setdefault(row["response_id"], row)
+    failed_ids = [i for i in response_ids if i not in valid_rows]
+    logger.info(f"Salvaged {len(valid_rows)} of {len(response_ids)} rows from output")
+    return list(valid_rows.values()), failed_ids
+
+
 def get_missing_response_ids(
     input_response_ids: list[int], parsed_response: dict
 ) -> list[int]:
@@ -314,19 +736,38 @@ def process_llm_responses(
 ) -> pd.DataFrame:
     """Process and merge LLM responses with the original DataFrame.
 
+    Responses are joined to their LLM output by looking up each output's row
+    position, so only the matched rows of each column are copied, rather than
+    hashing and merging both DataFrames. Inputs whose response IDs repeat, or
+    which share a column with the output, are merged as before.
+
     Args:
         llm_responses: List of LLM response dictionaries.
         responses: Original DataFrame containing the input responses.
 
     Returns:
-        A merged DataFrame.
+        A merged DataFrame, in the order of the input responses.
     """
-    responses.loc[:, "response_id"] = responses["response_id"].astype(int)
     task_responses = pd.DataFrame(llm_responses)
-    if "response_id" in task_responses.columns:
-        task_responses["response_id"] = task_responses["response_id"].astype(int)
+    if "response_id" not in task_responses.columns:
+        return task_responses
+    task_responses["response_id"] = task_responses["response_id"].astype(int)
+    responses = responses.assign(response_id=responses["response_id"].astype(int))
+    response_ids = pd.Index(responses["response_id"])
+    output_columns = task_responses.columns.drop("response_id")
+    if not response_ids.is_unique or output_columns.isin(responses.columns).any():
         return responses.merge(task_responses, how="inner", on="response_id")
-    return task_responses
+
+    positions = response_ids.get_indexer(task_responses["response_id"])
+    matched = np.flatnonzero(positions >= 0)
+    matched = matched[np.argsort(positions[matched], kind="stable")]
+    return pd.concat(
+        [
+            responses.iloc[positions[matched]].reset_index(drop=True),
+            task_responses[output_columns].iloc[matched].reset_index(drop=True),
+        ],
+        axis=1,
+    )
 
 
 def calculate_string_token_length(input_text: str, model: str = None) -> int:
@@ -340,13 +781,133 @@ def calculate_string_token_length(input_text: str, model: str = None) -> int:
     Returns:
         The number of tokens in the input string.
     """
-    # Use the MODEL_NAME env var if no model is provided; otherwise default to "gpt-4o"
-    model = model or os.environ.get("MODEL_NAME", "gpt-4o")
-    tokenizer_encoding = tiktoken.encoding_for_model(model)
+    tokenizer_encoding = get_encoding(model)
     number_of_tokens = len(tokenizer_encoding.encode(input_text))
     return number_of_tokens
 
 
+def get_encoding(model: str | None = None) -> tiktoken.Encoding:
+    """
+    Returns the tokenizer encoding for a model, loading it only once per model.
+
+    Args:
+        model: The model name used for tokenization. Defaults to MODEL_NAME env var or "gpt-4o".
+
+    Returns:
+        The tiktoken encoding for the model.
+    """
+    # Use the MODEL_NAME env var if no model is provided; otherwise default to "gpt-4o"
+    return _encoding_for_model(model or os.environ.get("MODEL_NAME", "gpt-4o"))
+
+
+@cache
+def _encoding_for_model(model: str) -> tiktoken.Encoding:
+    return tiktoken.encoding_for_model(model)
+
+
+def calculate_row_token_lengths(
+    df: pd.DataFrame, model: str | None = None
+) -> list[int]:
+    """
+    Calculates the number of tokens in each row of a DataFrame, serialised as JSON.
+
+    Lengths of the most recently counted rows are remembered across calls, so the
+    same responses are only encoded once per process.
+
+    Args:
+        df: The DataFrame whose rows to count.
+        model: The model name used for tokenization. Defaults to MODEL_NAME env var or "gpt-4o".
+
+    Returns:
+        The number of tokens in each row, in row order.
+    """
+    if df.empty:
+        return []
+    model = model or os.environ.get("MODEL_NAME", "gpt-4o")
+    rows = (
+        df.drop(columns=HIDDEN_COLUMNS, errors="ignore")
+        .to_json(orient="records", lines=True)
+        .splitlines()
+    )
+    return [_row_token_length(model, row) for row in rows]
+
+
+@lru_cache(maxsize=ROW_TOKEN_LENGTH_CACHE_SIZE)
+def _row_token_length(model: str, row: str) -> int:
+    return len(_encoding_for_model(model).encode_ordinary(row))
+
+
+def with_token_lengths(df: pd.DataFrame, model: str | None = None) -> pd.DataFrame:
+    """
+    Returns a copy of the DataFrame with each row's token length in TOKEN_LENGTH_COLUMN,
+    or the DataFrame itself if the lengths have already been calculated.
+
+    Args:
+        df: The input DataFrame.
+        model: The model name used for tokenization. Defaults to MODEL_NAME env var or "gpt-4o".
+
+    Returns:
+        A DataFrame with a TOKEN_LENGTH_COLUMN.
+    """
+    if TOKEN_LENGTH_COLUMN in df.columns:
+        return df
+    return df.assign(**{TOKEN_LENGTH_COLUMN: calculate_row_token_lengths(df, model)})
+
+
+def response_table(df: pd.DataFrame) -> pa.Table | None:
+    """
+    Converts a DataFrame of responses to an Arrow table to build prompts from, so
+    each batch is a zero-copy slice of one table rather than a DataFrame of its own.
+    The table is itself a copy of the responses, so this saves the time spent
+    building each batch's records rather than memory.
+
+    Args:
+        df: The input DataFrame.
+
+    Returns:
+        The DataFrame as an Arrow table, without the HIDDEN_COLUMNS, or None if
+        its columns have missing values or types whose prompts could differ from
+        build_prompt's, e.g. lists or timestamps.
+    """
+    df = df.drop(columns=HIDDEN_COLUMNS, errors="ignore")
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return None
+    for column in table.columns:
+        if column.null_count or not any(
+            is_type(column.type) for is_type in _PROMPT_SAFE_TYPES
+        ):
+            return None
+    return table
+
+
+def build_prompt_from_table(
+    template_str: str, table: pa.Table, rows: np.ndarray, **kwargs
+) -> BatchPrompt:
+    """
+    Constructs a BatchPrompt from rows of an Arrow table, as build_prompt does from a
+    DataFrame.
+
+    Args:
+        template_str: The prompt template string with {variable} placeholders.
+        table: The Arrow table of all responses, from response_table.
+        rows: Positions of the batch's rows in the table.
+        **kwargs: Additional keyword arguments to pass to the format method.
+
+    Returns:
+        A BatchPrompt containing the formatted prompt string and response IDs.
+    """
+    if len(rows) and np.all(np.diff(rows) == 1):
+        batch = table.slice(rows[0], len(rows))
+    else:
+        batch = table.take(rows)
+    responses = batch.to_pylist()
+    prompt = template_str.format(responses=responses, **kwargs)
+    response_ids = [int(response["response_id"]) for response in responses]
+    return BatchPrompt(prompt_string=prompt, response_ids=response_ids)
+
+
 def build_prompt(template_str: str, input_batch: pd.DataFrame, **kwargs) -> BatchPrompt:
     """
     Constructs a BatchPrompt by formatting a template string with a batch of responses.
@@ -359,6 +920,7 @@ def build_prompt(template_str: str, input_batch: pd.DataFrame, **kwargs) -> Batc
     Returns:
         A BatchPrompt containing the formatted prompt string and response IDs.
     """
+    input_batch = input_batch.drop(columns=HIDDEN_COLUMNS, errors="ignore")
     prompt = template_str.format(
         responses=input_batch.to_dict(orient="records"), **kwargs
     )
@@ -0,0 +1,227 @@
+"""Persistent response cache for the LLM protocol.
+
+CachedLLM wraps any LLM and stores each response under a hash of the model, request
+kwargs, output schema and prompt, so replaying the same prompts (re-running a crashed
+job, or an eval) is served locally rather than paid for again.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Protocol
+
+from pydantic import BaseModel
+
+from themefinder.llm import LLM, LLMResponse
+from themefinder.themefinder_logging import logger
+
+try:
+    from redis import RedisError
+except ImportError:  # redis is only needed for RedisLLMCache
+    CACHE_ERRORS: tuple[type[Exception], ...] = (sqlite3.Error, OSError)
+else:
+    CACHE_ERRORS = (sqlite3.Error, OSError, RedisError)
+
+
+class LLMCache(Protocol):
+    """Key-value store for serialised LLM responses."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def set(self, key: str, value: str) -> None: ...
+
+
+class SQLiteLLMCache:
+    """LLM cache in a local SQLite file, evicting least recently used entries.
+
+    Args:
+        path: Path to the SQLite database file, created if missing.
+        max_size_bytes: Total size of cached responses to keep. Defaults to 1GB.
+    """
+
+    def __init__(self, path: str | Path, max_size_bytes: int = 1_000_000_000):
+        self.max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS llm_cache_accessed_at "
+                "ON llm_cache (accessed_at)"
+            )
+
+    def get(self, key: str) -> str | None:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE llm_cache SET accessed_at = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        size = len(value.encode())
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, value, size, time.time()),
+            )
+            (total,) = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM llm_cache"
+            ).fetchone()
+            if total <= self.max_size_bytes:
+                return
+            # Drop the least recently used entries until back under the limit
+            excess = total - self.max_size_bytes
+            evicted = 0
+            keys = []
+            for old_key, old_size in self._connection.execute(
+                "SELECT key, size FROM llm_cache ORDER BY accessed_at"
+            ):
+                if evicted >= excess:
+                    break
+                keys.append((old_key,))
+                evicted += old_size
+            self._connection.executemany("DELETE FROM llm_cache WHERE key = ?", keys)
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class RedisLLMCache:
+    """LLM cache in Redis, for sharing responses between jobs.
+
+    Size is bounded by the Redis server's maxmemory policy (e.g. allkeys-lru) and
+    the optional TTL.
+
+    Args:
+        client: A redis.Redis client.
+        prefix: Prefix for cache keys.
+        ttl: Seconds to keep each response, or None to keep until evicted.
+    """
+
+    def __init__(
+        self, client, prefix: str = "themefinder:llm:", ttl: int | None = None
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key: str) -> str | None:
+        value = self.client.get(self.prefix + key)
+        return value.decode() if isinstance(value, bytes) else value
+
+    def set(self, key: str, value: str) -> None:
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+
+class CachedLLM:
+    """LLM wrapper serving repeated prompts from a cache.
+
+    Only deterministic calls are cached: a wrapped LLM with a non-zero (or unset)
+    temperature in its request_kwargs is called every time unless
+    cache_nondeterministic is set. Cache errors are logged and fall back to the LLM.
+
+    Args:
+        llm: The LLM to wrap.
+        cache: Where to store responses, e.g. SQLiteLLMCache or RedisLLMCache.
+        cache_nondeterministic: Cache responses even when temperature isn't 0.
+    """
+
+    def __init__(self, llm: LLM, cache: LLMCache, cache_nondeterministic: bool = False):
+        self.llm = llm
+        self.cache = cache
+        self.cache_nondeterministic = cache_nondeterministic
+        self.hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Expose the wrapped LLM's attributes, e.g. model and request_kwargs
+        if name == "llm":
+            raise AttributeError(name)
+        return getattr(self.llm, name)
+
+    @property
+    def enabled(self) -> bool:
+        request_kwargs = getattr(self.llm, "request_kwargs", {}) or {}
+        return self.cache_nondeterministic or request_kwargs.get("temperature") == 0
+
+    def cache_key(
+        self, prompt: str, output_model: type[BaseModel] | None = None
+    ) -> str:
+        """Hash of everything that determines the LLM's response."""
+        request = {
+            "model": getattr(self.llm, "model", type(self.llm).__name__),
+            "request_kwargs": getattr(self.llm, "request_kwargs", {}),
+            "output_schema": output_model.model_json_schema() if output_model else None,
+            "prompt": hashlib.sha256(prompt.encode()).hexdigest(),
+        }
+        return hashlib.sha256(
+            json.dumps(request, sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    async def ainvoke(
+        self, prompt: str, output_model: type[BaseModel] | None = None
+    ) -> LLMResponse:
+        if not self.enabled:
+            return await self.llm.ainvoke(prompt, output_model)
+        key = self.cache_key(prompt, output_model)
+        if (response := self._load(key, output_model)) is not None:
+            return response
+        response = await self.llm.ainvoke(prompt, output_model)
+        self._store(key, response, output_model)
+        return response
+
+    def invoke(
+        self, prompt: str, output_model: type[BaseModel] | None = None
+    ) -> LLMResponse:
+        if not self.enabled:
+            return self.llm.invoke(prompt, output_model)
+        key = self.cache_key(prompt, output_model)
+        if (response := self._load(key, output_model)) is not None:
+            return response
+        response = self.llm.invoke(prompt, output_model)
+        self._store(key, response, output_model)
+        return response
+
+    def _load(
+        self, key: str, output_model: type[BaseModel] | None
+    ) -> LLMResponse | None:
+        try:
+            value = self.cache.get(key)
+        except CACHE_ERRORS as e:  # a broken cache shouldn't stop the run
+            logger.warning(f"LLM cache lookup failed: {e}")
+            return None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if output_model:
+            return LLMResponse(parsed=output_model.model_validate_json(value))
+        return LLMResponse(parsed=json.loads(value))
+
+    def _store(
+        self, key: str, response: LLMResponse, output_model: type[BaseModel] | None
+    ) -> None:
+        parsed = response.parsed
+        if output_model and isinstance(parsed, output_model):
+            value = parsed.model_dump_json()
+        elif not output_model and isinstance(parsed, str):
+            value = json.dumps(parsed)
+        else:
+            return
+        try:
+            self.cache.set(key, value)
+        except CACHE_ERRORS as e:  # a broken cache shouldn't stop the run
+            logger.warning(f"LLM cache store failed: {e}")
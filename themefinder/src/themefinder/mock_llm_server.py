@@ -0,0 +1,458 @@
+"""Local OpenAI-compatible chat completions server for offline throughput benchmarks.
+
+Answers structured output requests for every themefinder output model with outputs
+that validate against it, one item per response_id in the prompt, after a
+configurable latency. Rate limits (429s), timeouts and a maximum number of
+concurrent requests can be injected, and token usage is reported as the API
+would, including prompt tokens served from a simulated prefix cache. Streamed
+completions aren't supported, and are answered with a 400.
+
+Usage:
+    config = MockLLMConfig(latency_median=0.5, rate_limit_rate=0.05)
+    with MockLLMServer(config) as server:
+        llm = OpenAILLM(model="mock", base_url=server.base_url, api_key="mock")
+        ...
+    print(server.stats)
+
+or from the command line:
+    python -m themefinder.mock_llm_server --port 8080 --latency-median 0.5
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, final
+
+from themefinder.llm_batch_processor import get_encoding
+
+# Prompts render each input row as a dict, e.g. {'response_id': 12, ...}
+RESPONSE_ID_PATTERN = re.compile(r"""['"]response_id['"]: (\d+)""")
+TOPIC_ID_PATTERN = re.compile(r'"topic_id": "([^"]+)"')
+
+# Prefix caching applies to prompts of at least 1024 tokens, in steps of 128
+CACHE_MIN_TOKENS = 1024
+CACHE_BLOCK_TOKENS = 128
+
+
+@dataclass
+class MockLLMConfig:
+    """Behaviour of the mock server.
+
+    Args:
+        latency_median: Median seconds before each response.
+        latency_sigma: Sigma of the lognormal latency distribution; 0 for a fixed
+            latency.
+        rate_limit_rate: Share of requests answered with a 429.
+        timeout_rate: Share of requests that hang for timeout_seconds before
+            answering, so clients with a shorter timeout give up.
+        timeout_seconds: How long timed out requests hang.
+        max_concurrency: Requests in flight above which further requests get a 429,
+            like a provider's concurrency quota. None for no limit.
+        seed: Seed for the latency and failure draws.
+    """
+
+    latency_median: float = 0.0
+    latency_sigma: float = 0.0
+    rate_limit_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 60.0
+    max_concurrency: int | None = None
+    seed: int = 0
+
+
+@dataclass
+class MockLLMStats:
+    """Totals of the requests the mock server has handled."""
+
+    requests: int = 0
+    completed: int = 0
+    rate_limited: int = 0
+    timed_out: int = 0
+    max_in_flight: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+
+
+@final
+class MockLLMServer:
+    """OpenAI-compatible server answering chat completions on a background thread.
+
+    Args:
+        config: Latency and failure injection settings.
+        host: Interface to listen on.
+        port: Port to listen on; 0 picks a free port.
+        model: Model name used to count tokens.
+    """
+
+    def __init__(
+        self,
+        config: MockLLMConfig | None = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        model: str = "gpt-4o",
+    ):
+        self.config = config or MockLLMConfig()
+        self.stats = MockLLMStats()
+        self._encoding = get_encoding(model)
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._cached_prefixes: set[int] = set()
+        self._httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def serve_forever(self, poll_interval: float = 0.5) -> None:
+        try:
+            self._httpd.serve_forever(poll_interval)
+        finally:
+            self._httpd.server_close()
+
+    def start(self) -> "MockLLMServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, args=(0.05,), daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._thread.join()
+
+    def __enter__(self) -> "MockLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def complete(self, request: dict) -> tuple[int, dict, dict[str, str]]:
+        """Answer one chat completions request: (status, body, headers)."""
+        if request.get("stream"):
+            return _error_response(400, "Streaming is not supported by the mock")
+        with self._lock:
+            self.stats.requests += 1
+            outcome = self._draw_outcome()
+            if outcome == "rate_limited":
+                self.stats.rate_limited += 1
+                return _rate_limit_response()
+            self._in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self._in_flight)
+        try:
+            if outcome == "timed_out":
+                with self._lock:
+                    self.stats.timed_out += 1
+                time.sleep(self.config.timeout_seconds)
+            else:
+                time.sleep(self._draw_latency())
+            body = self._completion(request)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        return 200, body, {}
+
+    def _draw_outcome(self) -> str:
+        if (
+            self.config.max_concurrency is not None
+            and self._in_flight >= self.config.max_concurrency
+        ):
+            return "rate_limited"
+        draw = self._random.random()
+        if draw < self.config.rate_limit_rate:
+            return "rate_limited"
+        if draw < self.config.rate_limit_rate + self.config.timeout_rate:
+            return "timed_out"
+        return "completed"
+
+    def _draw_latency(self) -> float:
+        with self._lock:
+            if self.config.latency_sigma:
+                return self._random.lognormvariate(0, self.config.latency_sigma) * (
+                    self.config.latency_median
+                )
+            return self.config.latency_median
+
+    def _completion(self, request: dict) -> dict:
+        prompt = "".join(
+            message["content"]
+            for message in request.get("messages", [])
+            if isinstance(message.get("content"), str)
+        )
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            json_schema = response_format["json_schema"]
+            content = json.dumps(
+                mock_structured_output(
+                    json_schema["name"], json_schema.get("schema", {}), prompt
+                )
+            )
+        else:
+            content = "This is a mock response."
+
+        prompt_tokens = self._encoding.encode_ordinary(prompt)
+        completion_tokens = len(self._encoding.encode_ordinary(content))
+        with self._lock:
+            cached_tokens = self._cache_prompt(prompt_tokens)
+            self.stats.completed += 1
+            self.stats.prompt_tokens += len(prompt_tokens)
+            self.stats.completion_tokens += completion_tokens
+            self.stats.cached_tokens += cached_tokens
+        return {
+            "id": f"chatcmpl-mock-{self.stats.completed}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": content},
+                }
+            ],
+            "usage": {
+                "prompt_tokens": len(prompt_tokens),
+                "completion_tokens": completion_tokens,
+                "total_tokens": len(prompt_tokens) + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    def _cache_prompt(self, tokens: list[int]) -> int:
+        """Tokens of the longest cached prefix, caching this prompt's prefixes."""
+        cached = 0
+        prefix_hash = 0
+        for end in range(CACHE_BLOCK_TOKENS, len(tokens) + 1, CACHE_BLOCK_TOKENS):
+            # Chained, so each hash identifies the whole prefix up to end
+            prefix_hash = hash((prefix_hash, *tokens[end - CACHE_BLOCK_TOKENS : end]))
+            if end < CACHE_MIN_TOKENS:
+                continue
+            if prefix_hash in self._cached_prefixes:
+                cached = end
+            self._cached_prefixes.add(prefix_hash)
+        return cached
+
+
+def mock_structured_output(name: str, schema: dict, prompt: str) -> dict:
+    """An output for the named themefinder output model, for the rows in the prompt.
+
+    Output models that aren't themefinder's get placeholder values for their schema.
+    """
+    response_ids = [int(i) for i in RESPONSE_ID_PATTERN.findall(prompt)]
+    ids = list(dict.fromkeys(response_ids)) or [1]
+    if name in MOCK_OUTPUTS:
+        return MOCK_OUTPUTS[name](ids, prompt)
+    return _placeholder(schema, schema.get("$defs", {}))
+
+
+def _theme_generation(ids: list[int], prompt: str) -> dict:
+    positions = ["AGREEMENT", "DISAGREEMENT", "UNCLEAR"]
+    return {
+        "responses": [
+            {
+                "topic_label": f"mock theme {i}",
+                "topic_description": f"Mock description of theme {i}.",
+                "position": positions[i % len(positions)],
+            }
+            # One theme for every five responses
+            for i in ids[::5]
+        ]
+    }
+
+
+def _theme_condensation(ids: list[int], prompt: str) -> dict:
+    # Merges each pair of themes
+    return {
+        "responses": [
+            {
+                "topic_label": f"mock condensed theme {i}",
+                "topic_description": f"Mock description of condensed theme {i}.",
+                "source_topic_count": len(ids[n : n + 2]),
+            }
+            for n, i in enumerate(ids)
+            if n % 2 == 0
+        ]
+    }
+
+
+def _theme_refinement(ids: list[int], prompt: str) -> dict:
+    return {
+        "responses": [
+            {
+                "topic": f"Mock theme {i}: Mock description of theme {i}.",
+                "source_topic_count": 1,
+            }
+            for i in ids
+        ]
+    }
+
+
+def _theme_mapping(ids: list[int], prompt: str) -> dict:
+    return {"responses": [{"response_id": i, "labels": ["A"]} for i in ids]}
+
+
+def _detail_detection(ids: list[int], prompt: str) -> dict:
+    return {
+        "responses": [
+            {"response_id": i, "evidence_rich": "YES" if i % 4 == 0 else "NO"}
+            for i in ids
+        ]
+    }
+
+
+def _theme_mapping_with_detail(ids: list[int], prompt: str) -> dict:
+    detail = _detail_detection(ids, prompt)["responses"]
+    return {
+        "responses": [
+            {**row, "labels": ["A"], "position": "AGREEMENT"} for row in detail
+        ]
+    }
+
+
+def _hierarchical_clustering(ids: list[int], prompt: str) -> dict:
+    # The agent only clusters while more than target_themes remain, so there are
+    # always at least two topics to merge
+    topic_ids = list(dict.fromkeys(TOPIC_ID_PATTERN.findall(prompt)))
+    return {
+        "parent_themes": [
+            {
+                "topic_id": "A",
+                "topic_label": "mock parent theme",
+                "topic_description": "Mock description of merged themes.",
+                "source_topic_count": 2,
+                "parent_id": None,
+                "children": topic_ids[:2],
+            }
+        ],
+        "should_terminate": len(topic_ids) <= 3,
+    }
+
+
+MOCK_OUTPUTS = {
+    "ThemeGenerationResponses": _theme_generation,
+    "ThemeCondensationResponses": _theme_condensation,
+    "ThemeRefinementResponses": _theme_refinement,
+    "ThemeMappingResponses": _theme_mapping,
+    "ThemeMappingWithDetailResponses": _theme_mapping_with_detail,
+    "DetailDetectionResponses": _detail_detection,
+    "HierarchicalClusteringResponse": _hierarchical_clustering,
+}
+
+
+def _placeholder(schema: dict, defs: dict) -> Any:
+    if "$ref" in schema:
+        return _placeholder(defs[schema["$ref"].split("/")[-1]], defs)
+    if "anyOf" in schema:
+        return _placeholder(schema["anyOf"][0], defs)
+    if "enum" in schema:
+        return schema["enum"][0]
+    schema_type = schema.get("type")
+    if schema_type == "object":
+        return {
+            name: _placeholder(property_schema, defs)
+            for name, property_schema in schema.get("properties", {}).items()
+        }
+    if schema_type == "array":
+        return [_placeholder(schema.get("items", {}), defs)]
+    if schema_type == "integer":
+        return 1
+    if schema_type == "number":
+        return 1.0
+    if schema_type == "boolean":
+        return True
+    if schema_type == "null":
+        return None
+    return "mock"
+
+
+def _rate_limit_response() -> tuple[int, dict, dict[str, str]]:
+    body = {
+        "error": {
+            "message": "Rate limit exceeded (mock)",
+            "type": "rate_limit_error",
+            "code": "rate_limit_exceeded",
+        }
+    }
+    return 429, body, {"retry-after-ms": "100"}
+
+
+def _error_response(status: int, message: str) -> tuple[int, dict, dict[str, str]]:
+    return status, {"error": {"message": message}}, {}
+
+
+def _handler(server: MockLLMServer) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send(*_error_response(404, f"Unknown path {self.path}"))
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            self._send(*server.complete(request))
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send(200, asdict(server.stats))
+            else:
+                self._send(*_error_response(404, f"Unknown path {self.path}"))
+
+        def _send(self, status: int, body: dict, headers: dict | None = None):
+            payload = json.dumps(body).encode()
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up, e.g. after its timeout
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a mock OpenAI-compatible LLM")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-median", type=float, default=0.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-seconds", type=float, default=60.0)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        latency_median=args.latency_median,
+        latency_sigma=args.latency_sigma,
+        rate_limit_rate=args.rate_limit_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds,
+        max_concurrency=args.max_concurrency,
+        seed=args.seed,
+    )
+    server = MockLLMServer(config, host=args.host, port=args.port)
+    print(f"Mock LLM listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -327,6 +327,26 @@ class ThemeMappingResponses(ValidatedModel):
         return self
 
 
+class ThemeMappingWithDetailOutput(ThemeMappingOutput):
+    """Model for combined theme mapping, detail detection and position output"""
+
+    evidence_rich: EvidenceRich = Field(
+        ..., description="Whether the response is evidence-rich (YES or NO)"
+    )
+    position: Position = Field(
+        ...,
+        description="Position the response takes (AGREEMENT, DISAGREEMENT, UNCLEAR)",
+    )
+
+
+class ThemeMappingWithDetailResponses(ThemeMappingResponses):
+    """Container for all combined theme mapping and detail detection responses"""
+
+    responses: list[ThemeMappingWithDetailOutput] = Field(
+        ..., description="List of combined theme mapping and detail detection outputs"
+    )
+
+
 class DetailDetectionOutput(ValidatedModel):
     """Model for detail detection output"""
 
@@ -1,4 +1,9 @@
-"""Prompt templates for themefinder tasks."""
+"""Prompt templates for themefinder tasks.
+
+Each template puts the input that changes from one call to the next last, after the
+instructions, question and themes. Every prompt of a task then shares a
+byte-identical prefix, which providers cache between calls.
+"""
 
 from typing import Any, TypedDict
 
@@ -6,13 +11,10 @@ CONSULTATION_SYSTEM_PROMPT = "You are an AI evaluation tool analyzing responses
 
 AGENTIC_THEME_CLUSTERING = """{system_prompt}
 
-Analyze these topics and identify which ones should be merged based on semantic similarity.
+Analyze the TOPICS below and identify which ones should be merged based on semantic similarity.
 Your goal is to significantly reduce the number of topics by creating meaningful parent topics.
 Be aggressive in finding opportunities to merge topics that share any semantic relationship.
 
-TOPICS:
-{themes_json}
-
 For each group of similar topics that should be merged, create a new parent topic.
 
 Guidelines:
@@ -37,7 +39,10 @@ Guidelines:
 If no topics should be merged in this iteration but future iterations might still yield meaningful merges, set should_terminate to false with an empty parent_themes list.
 If no topics should be merged and the termination conditions are met, set should_terminate to true with an empty parent_themes list.
 
-N.B. Under no circumstances should you create a parent theme with a single child. You do not need to return all of the original themes, if they don't belong to a newly created parent feel free to omit them."""
+N.B. Under no circumstances should you create a parent theme with a single child. You do not need to return all of the original themes, if they don't belong to a newly created parent feel free to omit them.
+
+TOPICS:
+{themes_json}"""
 
 DETAIL_DETECTION = """{system_prompt}
 
@@ -170,6 +175,55 @@ You MUST return an entry with the correct response ID for each input object.
 You must only return the alphabetic topic_ids in the labels section.
 
 
+QUESTION:
+
+{question}
+
+TOPIC LIST:
+
+{refined_themes}
+
+FREE_TEXT_RESPONSES:
+
+{responses}
+"""
+
+THEME_MAPPING_WITH_DETAIL = """{system_prompt}
+
+Your job is to help identify which topics come up in free_text_responses to a question, whether each response contains rich evidence, and the position each response takes.
+
+You will be given:
+    - a QUESTION that has been asked
+    - a TOPIC LIST of topics that are known to be present in free_text_responses to this question. These will be structured as follows:
+        {{'topic_id': 'topic_description}}
+    - a list of FREE_TEXT_RESPONSES to the question. These will be structured as follows:
+        {{'response_id': 'free text response'}}
+
+For each response, determine:
+
+LABELS - which topics are present. Guidelines:
+    - You can only assign to a response to a topic in the provided TOPIC LIST
+    - A response doesn't need to exactly match the language used in the TOPIC LIST, it should be considered a match if it expresses a similar sentiment.
+    - You must use the alphabetic 'topic_id' to indicate which topic you have assigned. Do not use the full topic description
+    - Each response can be assigned to multiple topics if it matches more than one topic from the TOPIC LIST.
+    - Each topic can only be assigned once per response.
+    - There is no limit on how many topics can be assigned to a response.
+    - If none of the themes are relevant to the response then use the most appropriate of the fallback themes provided at the end of the list: either No Reason Given or Other
+
+EVIDENCE_RICH - does the response contain significant evidence? A response is evidence-rich only if it:
+    - clearly answers the question AND provides insights that go beyond generic opinion, such as nuanced reasoning, contextual explanation, or argumentation that could inform decision-making
+    - AND includes at least one of: specific, verifiable facts or data; concrete, illustrative examples that clearly support a broader claim; detailed personal or professional experiences that include contextual information
+    Vague or general language, commonly known points and anecdotes without context or a clear takeaway are not evidence-rich.
+    Choose one from ['YES', 'NO']
+
+POSITION - the position the response takes on the question.
+    Choose one from ['AGREEMENT', 'DISAGREEMENT', 'UNCLEAR']
+
+You MUST include every response ID in the output.
+You MUST return an entry with the correct response ID for each input object.
+You must only return the alphabetic topic_ids in the labels section.
+
+
 QUESTION:
 
 {question}
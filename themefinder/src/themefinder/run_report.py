@@ -0,0 +1,95 @@
+"""Usage and latency accounting of the LLM calls made by each stage of a run.
+
+batch_and_run records every LLM call of a stage into a StageUsage, and a RunReport
+collects the stages of a run so that the stages dominating its cost and latency
+can be seen, e.g. in the run_report.json the pipeline jobs write with their outputs.
+"""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from themefinder.llm import LLMResponse
+
+
+@dataclass
+class StageUsage:
+    """Totals of the LLM calls made by one stage.
+
+    Token counts and latencies are only summed over the calls whose LLM reports
+    them. Retries are calls repeated after an error, and failures are calls whose
+    output couldn't be used, whether or not their rows were later retried.
+    Latencies are in seconds.
+    """
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    retries: int = 0
+    failures: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    def record(self, response: LLMResponse) -> None:
+        self.calls += 1
+        self.prompt_tokens += response.prompt_tokens or 0
+        self.completion_tokens += response.completion_tokens or 0
+        self.cached_tokens += response.cached_tokens or 0
+        if response.latency is not None:
+            self.latencies.append(response.latency)
+
+    def record_failure(self) -> None:
+        self.calls += 1
+        self.failures += 1
+
+    def merge(self, other: "StageUsage") -> None:
+        self.calls += other.calls
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.retries += other.retries
+        self.failures += other.failures
+        self.latencies.extend(other.latencies)
+
+    def summary(self) -> dict[str, int | float | None]:
+        """Totals, with latency as the p50 and p95 of the calls in seconds."""
+        p50, p95 = (
+            np.percentile(self.latencies, [50, 95]).round(3).tolist()
+            if self.latencies
+            else (None, None)
+        )
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "latency_p50": p50,
+            "latency_p95": p95,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+
+class RunReport:
+    """The StageUsage of each stage of a run, by stage name."""
+
+    def __init__(self):
+        self.stages: dict[str, StageUsage] = {}
+
+    def stage(self, name: str) -> StageUsage:
+        """The usage of a stage, recorded into by every batch_and_run of that stage."""
+        return self.stages.setdefault(name, StageUsage())
+
+    def to_dict(self) -> dict[str, dict]:
+        total = StageUsage()
+        for usage in self.stages.values():
+            total.merge(usage)
+        return {
+            "stages": {name: usage.summary() for name, usage in self.stages.items()},
+            "total": total.summary(),
+        }
+
+    def write(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
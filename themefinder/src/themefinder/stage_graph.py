@@ -0,0 +1,80 @@
+"""Concurrent execution of pipeline stages that depend on each other's results."""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class Stage:
+    """A pipeline stage.
+
+    Args:
+        run: Coroutine function called with the result of each dependency as a keyword
+            argument named after that stage.
+        depends_on: Names of the stages whose results this stage needs.
+    """
+
+    run: Callable[..., Awaitable[Any]]
+    depends_on: tuple[str, ...] = ()
+
+
+async def run_stages(stages: dict[str, Stage]) -> dict[str, Any]:
+    """Run stages as soon as their dependencies finish, independent stages concurrently.
+
+    If any stage fails, the stages still running are cancelled and the error raised.
+
+    Args:
+        stages: Stages by name.
+
+    Returns:
+        The result of each stage, by name.
+
+    Raises:
+        ValueError: If a stage depends on an unknown stage or the dependencies form a cycle.
+    """
+    order = _topological_order(stages)
+    tasks: dict[str, asyncio.Task] = {}
+
+    async def run_stage(name: str) -> Any:
+        stage = stages[name]
+        inputs = {
+            dependency: await tasks[dependency] for dependency in stage.depends_on
+        }
+        return await stage.run(**inputs)
+
+    for name in order:
+        tasks[name] = asyncio.ensure_future(run_stage(name))
+    try:
+        await asyncio.gather(*tasks.values())
+    except BaseException:
+        for task in tasks.values():
+            task.cancel()
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+        raise
+    return {name: task.result() for name, task in tasks.items()}
+
+
+def _topological_order(stages: dict[str, Stage]) -> list[str]:
+    order: list[str] = []
+    visiting: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Stage dependencies form a cycle through '{name}'")
+        visiting.add(name)
+        for dependency in stages[name].depends_on:
+            if dependency not in stages:
+                raise ValueError(
+                    f"Stage '{name}' depends on unknown stage '{dependency}'"
+                )
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in stages:
+        visit(name)
+    return order
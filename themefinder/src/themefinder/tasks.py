@@ -1,15 +1,34 @@
+import asyncio
+import inspect
 import logging
 
+import numpy as np
 import pandas as pd
 
 from themefinder.advanced_tasks.theme_clustering_agent import ThemeClusteringAgent
+from themefinder.checkpoint import BatchCheckpoint
+from themefinder.concurrency import AdaptiveConcurrencyLimiter, Concurrency
+from themefinder.embeddings import (
+    Embedder,
+    embed,
+    random_projection,
+    similarity_batches,
+    similarity_groups,
+)
 from themefinder.llm import LLM
-from themefinder.llm_batch_processor import batch_and_run
+from themefinder.llm_batch_processor import (
+    GROUP_COLUMN,
+    BatchPlanner,
+    BatchPlanReport,
+    batch_and_run,
+    plan_batch_and_run,
+)
 from themefinder.models import (
     DetailDetectionResponses,
     ThemeCondensationResponses,
     ThemeGenerationResponses,
     ThemeMappingResponses,
+    ThemeMappingWithDetailResponses,
     ThemeNode,
     ThemeRefinementResponses,
 )
@@ -19,10 +38,21 @@ from themefinder.prompts import (
     THEME_CONDENSATION,
     THEME_GENERATION,
     THEME_MAPPING,
+    THEME_MAPPING_WITH_DETAIL,
     THEME_REFINEMENT,
 )
+from themefinder.run_report import RunReport
+from themefinder.stage_graph import Stage, run_stages
 from themefinder.themefinder_logging import logger
 
+# Themes every response may be mapped to, whatever it's about
+FALLBACK_THEME_NAMES = ("Other", "No Reason Given")
+
+# Responses embedded at a time when shortlisting themes, and the dimensions their
+# embeddings are projected to for grouping, bounding memory at any scale
+SHORTLIST_CHUNK_SIZE = 10_000
+SHORTLIST_DIMENSIONS = 64
+
 
 async def find_themes(
     responses_df: pd.DataFrame,
@@ -30,16 +60,20 @@ async def find_themes(
     question: str,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
     verbose: bool = True,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+    embedder: Embedder | None = None,
 ) -> dict[str, str | pd.DataFrame]:
     """Process survey responses through a multi-stage theme analysis pipeline.
 
-    This pipeline performs sequential analysis steps:
+    This pipeline performs the analysis steps:
     1. Initial theme generation
     2. Theme condensation (combining similar themes)
     3. Theme refinement
     4. Mapping responses to refined themes
-    5. Detail detection
+    5. Detail detection, which runs concurrently with steps 1-4
 
     Args:
         responses_df: DataFrame containing survey responses
@@ -47,7 +81,13 @@ async def find_themes(
         question: The survey question
         system_prompt: System prompt to guide the LLM's behaviour.
         verbose: Whether to show information messages during processing.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make across all stages, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of each stage into.
+        embedder: Optional Embedder used to batch similar themes for condensation
+            and to shortlist the themes sent with each mapping batch.
 
     Returns:
         Dictionary containing results from each pipeline stage:
@@ -58,46 +98,63 @@ async def find_themes(
             - unprocessables: DataFrame containing inputs that could not be processed
     """
     logger.setLevel(logging.INFO if verbose else logging.CRITICAL)
+    if isinstance(concurrency, int):
+        # One budget for every stage, as independent stages run at the same time
+        concurrency = asyncio.Semaphore(concurrency)
+    stage_kwargs = {
+        "question": question,
+        "system_prompt": system_prompt,
+        "concurrency": concurrency,
+        "batch_planner": batch_planner,
+        "checkpoint": checkpoint,
+        "run_report": run_report,
+    }
+    responses = responses_df[["response_id", "response"]]
 
-    theme_df, _ = await theme_generation(
-        responses_df,
-        llm,
-        question=question,
-        system_prompt=system_prompt,
-        concurrency=concurrency,
-    )
-    condensed_theme_df, _ = await theme_condensation(
-        theme_df,
-        llm,
-        question=question,
-        system_prompt=system_prompt,
-        concurrency=concurrency,
-    )
-    refined_theme_df, _ = await theme_refinement(
-        condensed_theme_df,
-        llm,
-        question=question,
-        system_prompt=system_prompt,
-        concurrency=concurrency,
-    )
+    async def generate():
+        theme_df, _ = await theme_generation(responses_df, llm, **stage_kwargs)
+        return theme_df
 
-    mapping_df, mapping_unprocessables = await theme_mapping(
-        responses_df[["response_id", "response"]],
-        llm,
-        question=question,
-        refined_themes_df=refined_theme_df,
-        system_prompt=system_prompt,
-        concurrency=concurrency,
-    )
-    detailed_df, _ = await detail_detection(
-        responses_df[["response_id", "response"]],
-        llm,
-        question=question,
-        system_prompt=system_prompt,
-        concurrency=concurrency,
+    async def condense(generation):
+        condensed_theme_df, _ = await theme_condensation(
+            generation, llm, embedder=embedder, **stage_kwargs
+        )
+        return condensed_theme_df
+
+    async def refine(condensation):
+        refined_theme_df, _ = await theme_refinement(condensation, llm, **stage_kwargs)
+        return refined_theme_df
+
+    async def map_responses(refinement):
+        return await theme_mapping(
+            responses,
+            llm,
+            refined_themes_df=refinement,
+            embedder=embedder,
+            **stage_kwargs,
+        )
+
+    async def detect_detail():
+        detailed_df, _ = await detail_detection(responses, llm, **stage_kwargs)
+        return detailed_df
+
+    # Detail detection only needs the responses, so runs alongside the theme stages
+    results = await run_stages(
+        {
+            "generation": Stage(generate),
+            "detail_detection": Stage(detect_detail),
+            "condensation": Stage(condense, depends_on=("generation",)),
+            "refinement": Stage(refine, depends_on=("condensation",)),
+            "mapping": Stage(map_responses, depends_on=("refinement",)),
+        }
     )
+    refined_theme_df = results["refinement"]
+    mapping_df, mapping_unprocessables = results["mapping"]
+    detailed_df = results["detail_detection"]
 
     logger.info("Finished finding themes")
+    if isinstance(concurrency, AdaptiveConcurrencyLimiter):
+        logger.info(f"LLM concurrency: {concurrency.metrics()}")
     logger.info("Provide feedback or report bugs: packages@cabinetoffice.gov.uk")
     return {
         "question": question,
@@ -108,6 +165,163 @@ async def find_themes(
     }
 
 
+def plan_find_themes(
+    responses_df: pd.DataFrame,
+    question: str,
+    refined_themes_df: pd.DataFrame | None = None,
+    system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
+    batch_planner: BatchPlanner | None = None,
+) -> pd.DataFrame:
+    """Report the LLM calls and prompt tokens find_themes would use, without calling the LLM.
+
+    Only the stages whose input is the responses themselves can be planned up front:
+    theme generation, theme mapping and detail detection. Condensation and refinement
+    work on themes generated by the LLM, so aren't included.
+
+    Args:
+        responses_df: DataFrame containing survey responses
+        question: The survey question
+        refined_themes_df: Themes to map responses to, if known. Without them the
+            mapping prompts are planned with an empty theme list.
+        system_prompt: System prompt to guide the LLM's behaviour.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+
+    Returns:
+        DataFrame with one row per stage: rows, batched_rows, calls, prompt_tokens
+        and max_prompt_tokens
+    """
+    refined_themes = (
+        []
+        if refined_themes_df is None
+        else _transpose_refined_themes(refined_themes_df)
+    )
+    responses = responses_df[["response_id", "response"]]
+    stages: dict[str, BatchPlanReport] = {
+        "theme_generation": plan_batch_and_run(
+            responses_df,
+            THEME_GENERATION,
+            batch_size=_default(theme_generation, "batch_size"),
+            batch_planner=batch_planner,
+            question=question,
+            system_prompt=system_prompt,
+        ),
+        "theme_mapping": plan_batch_and_run(
+            responses,
+            THEME_MAPPING,
+            batch_size=_default(theme_mapping, "batch_size"),
+            batch_planner=batch_planner,
+            question=question,
+            refined_themes=refined_themes,
+            system_prompt=system_prompt,
+        ),
+        "detail_detection": plan_batch_and_run(
+            responses,
+            DETAIL_DETECTION,
+            batch_size=_default(detail_detection, "batch_size"),
+            batch_planner=batch_planner,
+            question=question,
+            system_prompt=system_prompt,
+        ),
+    }
+    return pd.DataFrame(
+        [{"stage": stage, **vars(report)} for stage, report in stages.items()]
+    )
+
+
+def _default(task, parameter: str):
+    """The default value of a task's parameter, so plans match what the task would run."""
+    return inspect.signature(task).parameters[parameter].default
+
+
+async def _group_similar_themes(
+    themes_df: pd.DataFrame,
+    embedder: Embedder,
+    batch_size: int,
+    embeddings: dict[str, np.ndarray],
+) -> pd.DataFrame:
+    """Label themes with a GROUP_COLUMN of up to batch_size similar themes.
+
+    Each group starts from the first theme not yet grouped, so shuffling the themes
+    between rounds gives different groups.
+    """
+    texts = (themes_df["topic_label"] + ": " + themes_df["topic_description"]).tolist()
+    batches = similarity_batches(await embed(embedder, texts, embeddings), batch_size)
+    group_of_row = np.empty(len(themes_df), dtype=int)
+    for group, rows in enumerate(batches):
+        group_of_row[rows] = group
+    return themes_df.assign(**{GROUP_COLUMN: group_of_row})
+
+
+async def _map_to_shortlisted_themes(
+    responses_df: pd.DataFrame,
+    llm: LLM,
+    prompt_template: str,
+    refined_themes_df: pd.DataFrame,
+    embedder: Embedder,
+    shortlist_size: int,
+    batch_size: int,
+    concurrency: Concurrency,
+    **kwargs,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Map each group of similar responses to the union of their shortlisted themes.
+
+    Responses are embedded SHORTLIST_CHUNK_SIZE at a time, and only their shortlists
+    and a SHORTLIST_DIMENSIONS projection of each embedding are kept, so memory
+    doesn't grow with the full embeddings of every response. All groups are then
+    mapped in one batch_and_run, sharing its concurrency.
+    """
+    refined_themes_df = refined_themes_df.reset_index(drop=True)
+    responses_df = responses_df.reset_index(drop=True)
+    theme_embeddings = await embed(embedder, refined_themes_df["topic"].tolist())
+    project = random_projection(theme_embeddings.shape[1], SHORTLIST_DIMENSIONS)
+    texts = responses_df["response"].astype(str).tolist()
+    shortlists, projections = [], []
+    for start in range(0, len(texts), SHORTLIST_CHUNK_SIZE):
+        embeddings = await embed(embedder, texts[start : start + SHORTLIST_CHUNK_SIZE])
+        similarity = embeddings @ theme_embeddings.T
+        shortlists.append(
+            np.argsort(-similarity, axis=1, kind="stable")[:, :shortlist_size]
+        )
+        projections.append(project(embeddings))
+    shortlists = np.concatenate(shortlists)
+    theme_names = refined_themes_df["topic"].str.split(":").str[0].str.strip()
+    fallbacks = np.flatnonzero(theme_names.isin(FALLBACK_THEME_NAMES))
+
+    groups = similarity_groups(np.concatenate(projections), batch_size)
+    group_of_row = np.empty(len(responses_df), dtype=int)
+    group_kwargs = {}
+    theme_counts = []
+    for group, rows in enumerate(groups):
+        group_of_row[rows] = group
+        themes = np.union1d(shortlists[rows].ravel(), fallbacks)
+        theme_counts.append(len(themes))
+        group_kwargs[group] = {
+            "refined_themes": _transpose_refined_themes(refined_themes_df.iloc[themes])
+        }
+    logger.info(
+        f"Mapping {len(groups)} groups of similar responses to an average of "
+        f"{np.mean(theme_counts):.1f} of {len(refined_themes_df)} themes"
+    )
+    return await batch_and_run(
+        responses_df.assign(**{GROUP_COLUMN: group_of_row}),
+        prompt_template,
+        llm,
+        output_model=ThemeMappingResponses,
+        batch_size=batch_size,
+        integrity_check=True,
+        concurrency=concurrency,
+        group_kwargs=group_kwargs,
+        **kwargs,
+    )
+
+
+def _transpose_refined_themes(refined_themes_df: pd.DataFrame) -> list[dict]:
+    """Transpose topics for increased legibility."""
+    return pd.DataFrame(
+        [refined_themes_df["topic"].to_numpy()], columns=refined_themes_df["topic_id"]
+    ).to_dict(orient="records")
+
+
 async def theme_generation(
     responses_df: pd.DataFrame,
     llm: LLM,
@@ -116,7 +330,10 @@ async def theme_generation(
     partition_key: str | None = None,
     prompt_template: str = THEME_GENERATION,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Generate themes from survey responses using an LLM.
 
@@ -128,7 +345,11 @@ async def theme_generation(
         partition_key: Column name to use for batching related responses together.
         prompt_template: Prompt template string.
         system_prompt: System prompt to guide the LLM's behavior.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (processed results, unprocessable rows)
@@ -144,6 +365,10 @@ async def theme_generation(
         question=question,
         system_prompt=system_prompt,
         concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="theme_generation",
     )
 
 
@@ -154,13 +379,20 @@ async def theme_condensation(
     batch_size: int = 75,
     prompt_template: str = THEME_CONDENSATION,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+    embedder: Embedder | None = None,
     **kwargs,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Condense and combine similar themes identified from survey responses.
 
     When the theme count exceeds the batch size, a first pass condenses within
-    each batch independently, then a second pass merges across batches.
+    each batch independently, then a second pass merges across batches. Between
+    passes themes are shuffled, and with an embedder then grouped so that each batch
+    holds semantically similar themes that can be merged. Batches are packed within
+    each group, and the shuffle varies the groups of a round that is retried.
 
     Args:
         themes_df: DataFrame containing the initial themes.
@@ -169,7 +401,12 @@ async def theme_condensation(
         batch_size: Number of themes to process in each batch.
         prompt_template: Prompt template string.
         system_prompt: System prompt to guide the LLM's behavior.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
+        embedder: Optional Embedder used to batch similar themes together.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (processed results, unprocessable rows)
@@ -179,11 +416,18 @@ async def theme_condensation(
 
     target = 30
     retry = 0
+    rounds = 0
+    embeddings: dict[str, np.ndarray] = {}
     while len(themes_df) > target:
         original_theme_count = len(themes_df)
+        rounds += 1
         logger.info(
             f"{len(themes_df)} larger than {target}, using recursive theme condensation"
         )
+        if embedder is not None:
+            themes_df = await _group_similar_themes(
+                themes_df, embedder, batch_size, embeddings
+            )
         themes_df, _ = await batch_and_run(
             themes_df,
             prompt_template,
@@ -193,6 +437,11 @@ async def theme_condensation(
             question=question,
             system_prompt=system_prompt,
             concurrency=concurrency,
+            batch_planner=batch_planner,
+            checkpoint=checkpoint,
+            run_report=run_report,
+            stage="theme_condensation",
+            partition_key=GROUP_COLUMN if embedder is not None else None,
             **kwargs,
         )
         themes_df = themes_df.sample(frac=1).reset_index(drop=True)
@@ -215,10 +464,17 @@ async def theme_condensation(
         question=question,
         system_prompt=system_prompt,
         concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="theme_condensation",
         **kwargs,
     )
 
-    logger.info(f"Final number of condensed themes: {themes_df.shape[0]}")
+    logger.info(
+        f"Final number of condensed themes: {themes_df.shape[0]} "
+        f"after {rounds} recursive rounds"
+    )
     return themes_df, _
 
 
@@ -299,7 +555,10 @@ async def theme_refinement(
     batch_size: int = 10000,
     prompt_template: str = THEME_REFINEMENT,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Refine and standardise condensed themes using an LLM.
 
@@ -310,7 +569,11 @@ async def theme_refinement(
         batch_size: Number of themes to process in each batch.
         prompt_template: Prompt template string.
         system_prompt: System prompt to guide the LLM's behavior.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (processed results, unprocessable rows)
@@ -327,6 +590,10 @@ async def theme_refinement(
         question=question,
         system_prompt=system_prompt,
         concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="theme_refinement",
     )
 
     def assign_sequential_topic_ids(df: pd.DataFrame) -> pd.DataFrame:
@@ -363,10 +630,20 @@ async def theme_mapping(
     batch_size: int = 20,
     prompt_template: str = THEME_MAPPING,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+    embedder: Embedder | None = None,
+    shortlist_size: int = 10,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Map survey responses to refined themes using an LLM.
 
+    By default every batch is sent the full theme list. With an embedder, responses
+    are batched with similar responses and each batch is only sent the themes most
+    similar to its responses (plus the Other and No Reason Given fallbacks), which
+    keeps prompts short when there are many themes.
+
     Args:
         responses_df: DataFrame containing survey responses.
         llm: LLM instance to use for theme mapping.
@@ -375,7 +652,13 @@ async def theme_mapping(
         batch_size: Number of responses to process in each batch.
         prompt_template: Prompt template string.
         system_prompt: System prompt to guide the LLM's behavior.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
+        embedder: Optional Embedder used to shortlist themes for each batch.
+        shortlist_size: Most similar themes shortlisted for each response.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (processed results, unprocessable rows)
@@ -384,12 +667,23 @@ async def theme_mapping(
         f"Running theme mapping on {len(responses_df)} responses using {len(refined_themes_df)} themes"
     )
 
-    def transpose_refined_themes(refined_themes: pd.DataFrame):
-        """Transpose topics for increased legibility."""
-        transposed_df = pd.DataFrame(
-            [refined_themes["topic"].to_numpy()], columns=refined_themes["topic_id"]
+    if embedder is not None and shortlist_size < len(refined_themes_df):
+        return await _map_to_shortlisted_themes(
+            responses_df,
+            llm,
+            prompt_template,
+            refined_themes_df,
+            embedder,
+            shortlist_size,
+            batch_size=batch_size,
+            question=question,
+            system_prompt=system_prompt,
+            concurrency=concurrency,
+            batch_planner=batch_planner,
+            checkpoint=checkpoint,
+            run_report=run_report,
+            stage="theme_mapping",
         )
-        return transposed_df
 
     return await batch_and_run(
         responses_df,
@@ -398,12 +692,72 @@ async def theme_mapping(
         output_model=ThemeMappingResponses,
         batch_size=batch_size,
         question=question,
-        refined_themes=transpose_refined_themes(refined_themes_df).to_dict(
-            orient="records"
-        ),
+        refined_themes=_transpose_refined_themes(refined_themes_df),
+        integrity_check=True,
+        system_prompt=system_prompt,
+        concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="theme_mapping",
+    )
+
+
+async def theme_mapping_with_detail(
+    responses_df: pd.DataFrame,
+    llm: LLM,
+    question: str,
+    refined_themes_df: pd.DataFrame,
+    batch_size: int = 20,
+    prompt_template: str = THEME_MAPPING_WITH_DETAIL,
+    system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Map responses to refined themes, detect detail and classify position in one pass.
+
+    Does the work of theme_mapping and detail_detection (plus a position for each
+    response) with one LLM call per batch, so each response is only sent once.
+
+    Args:
+        responses_df: DataFrame containing survey responses.
+        llm: LLM instance to use.
+        question: The survey question.
+        refined_themes_df: DataFrame of refined themes.
+        batch_size: Number of responses to process in each batch.
+        prompt_template: Prompt template string.
+        system_prompt: System prompt to guide the LLM's behavior.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: (processed results with labels,
+        evidence_rich and position columns, unprocessable rows)
+    """
+    logger.info(
+        f"Running theme mapping with detail detection on {len(responses_df)} "
+        f"responses using {len(refined_themes_df)} themes"
+    )
+    return await batch_and_run(
+        responses_df,
+        prompt_template,
+        llm,
+        output_model=ThemeMappingWithDetailResponses,
+        batch_size=batch_size,
+        question=question,
+        refined_themes=_transpose_refined_themes(refined_themes_df),
         integrity_check=True,
         system_prompt=system_prompt,
         concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="theme_mapping_with_detail",
     )
 
 
@@ -414,7 +768,10 @@ async def detail_detection(
     batch_size: int = 20,
     prompt_template: str = DETAIL_DETECTION,
     system_prompt: str = CONSULTATION_SYSTEM_PROMPT,
-    concurrency: int = 10,
+    concurrency: Concurrency = 10,
+    batch_planner: BatchPlanner | None = None,
+    checkpoint: BatchCheckpoint | None = None,
+    run_report: RunReport | None = None,
 ) -> tuple[pd.DataFrame, pd.DataFrame]:
     """Identify responses that provide high-value detailed evidence.
 
@@ -425,7 +782,11 @@ async def detail_detection(
         batch_size: Number of responses to process in each batch.
         prompt_template: Prompt template string.
         system_prompt: System prompt to guide the LLM's behavior.
-        concurrency: Number of concurrent API calls to make.
+        concurrency: Number of concurrent API calls to make, or an
+            AdaptiveConcurrencyLimiter or asyncio.Semaphore shared between stages.
+        batch_planner: Function splitting inputs into batches, e.g. pack_batches.
+        checkpoint: Optional BatchCheckpoint so a restarted run skips completed batches.
+        run_report: Optional RunReport to record the LLM usage of the stage into.
 
     Returns:
         tuple[pd.DataFrame, pd.DataFrame]: (processed results, unprocessable rows)
@@ -441,4 +802,8 @@ async def detail_detection(
         integrity_check=True,
         system_prompt=system_prompt,
         concurrency=concurrency,
+        batch_planner=batch_planner,
+        checkpoint=checkpoint,
+        run_report=run_report,
+        stage="detail_detection",
     )
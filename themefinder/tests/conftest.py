@@ -3,6 +3,18 @@ from unittest.mock import AsyncMock, MagicMock
 import pandas as pd
 import pytest
 
+from themefinder import llm_batch_processor
+
+
+@pytest.fixture(autouse=True)
+def clear_token_length_caches():
+    """Tests patch the tokenizer, so don't let encodings or lengths leak between them."""
+    llm_batch_processor._encoding_for_model.cache_clear()
+    llm_batch_processor._row_token_length.cache_clear()
+    yield
+    llm_batch_processor._encoding_for_model.cache_clear()
+    llm_batch_processor._row_token_length.cache_clear()
+
 
 @pytest.fixture()
 def mock_llm():
@@ -0,0 +1,138 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+from themefinder.checkpoint import BatchCheckpoint
+from themefinder.llm import LLMResponse
+from themefinder.llm_batch_processor import BatchPrompt, call_llm
+from themefinder.models import (
+    DetailDetectionOutput,
+    DetailDetectionResponses,
+    EvidenceRich,
+)
+
+
+def _detail_response(*response_ids: int) -> LLMResponse:
+    return LLMResponse(
+        parsed=DetailDetectionResponses(
+            responses=[
+                DetailDetectionOutput(response_id=i, evidence_rich=EvidenceRich.YES)
+                for i in response_ids
+            ]
+        )
+    )
+
+
+BATCH_PROMPTS = [
+    BatchPrompt(prompt_string="batch 1", response_ids=[1]),
+    BatchPrompt(prompt_string="batch 2", response_ids=[2]),
+]
+
+
+@pytest.mark.asyncio
+async def test_restart_skips_completed_batches(mock_llm, tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+
+    # The first run is cancelled after completing one batch
+    mock_llm.ainvoke.side_effect = [_detail_response(1), asyncio.CancelledError()]
+    with pytest.raises(asyncio.CancelledError):
+        await call_llm(
+            BATCH_PROMPTS,
+            mock_llm,
+            output_model=DetailDetectionResponses,
+            concurrency=1,
+            checkpoint=BatchCheckpoint(path),
+        )
+
+    mock_llm.ainvoke.reset_mock()
+    mock_llm.ainvoke.side_effect = [_detail_response(2)]
+    results, failed_ids = await call_llm(
+        BATCH_PROMPTS,
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        concurrency=1,
+        checkpoint=BatchCheckpoint(path),
+    )
+
+    mock_llm.ainvoke.assert_awaited_once()
+    assert mock_llm.ainvoke.await_args.args[0] == "batch 2"
+    assert [row["response_id"] for row in results] == [1, 2]
+    assert results[0]["evidence_rich"] == EvidenceRich.YES
+    assert failed_ids == []
+
+
+@pytest.mark.asyncio
+async def test_restart_retries_failed_batches(mock_llm, tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+
+    # Batch 2 times out, and batch 1 leaves out one of its rows
+    mock_llm.ainvoke.side_effect = [_detail_response(1), ValueError("timed out")]
+    prompts = [
+        BatchPrompt(prompt_string="batch 1", response_ids=[1, 3]),
+        BatchPrompt(prompt_string="batch 2", response_ids=[2]),
+    ]
+    _, failed_ids = await call_llm(
+        prompts,
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        concurrency=1,
+        integrity_check=True,
+        checkpoint=BatchCheckpoint(path),
+    )
+    assert sorted(failed_ids) == [2, 3]
+
+    mock_llm.ainvoke.reset_mock()
+    mock_llm.ainvoke.side_effect = [_detail_response(1, 3), _detail_response(2)]
+    results, failed_ids = await call_llm(
+        prompts,
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        concurrency=1,
+        integrity_check=True,
+        checkpoint=BatchCheckpoint(path),
+    )
+
+    assert [call.args[0] for call in mock_llm.ainvoke.await_args_list] == [
+        "batch 1",
+        "batch 2",
+    ]
+    assert [row["response_id"] for row in results] == [1, 3, 2]
+    assert failed_ids == []
+
+
+def test_checkpoint_ignores_a_partly_written_line(tmp_path):
+    path = tmp_path / "checkpoint.jsonl"
+    checkpoint = BatchCheckpoint(path)
+    checkpoint.record("a", [{"response_id": 1}])
+    checkpoint.close()
+    with path.open("a") as f:
+        f.write('{"batch": "b", "rows": [{"resp')
+
+    resumed = BatchCheckpoint(path)
+    resumed.record("c", [{"response_id": 3}])
+    resumed.close()
+
+    assert BatchCheckpoint(path).completed == {
+        "a": [{"response_id": 1}],
+        "c": [{"response_id": 3}],
+    }
+
+
+def test_checkpoint_syncs_at_interval_and_on_close(tmp_path):
+    sync = MagicMock()
+    checkpoint = BatchCheckpoint(tmp_path / "checkpoint.jsonl", sync=sync)
+
+    checkpoint.record("a", [])
+    checkpoint.record("b", [])
+    sync.assert_not_called()
+
+    checkpoint.close()
+    sync.assert_called_once_with(tmp_path / "checkpoint.jsonl")
+
+
+def test_batch_key_depends_on_prompt_and_output_model():
+    key = BatchCheckpoint.batch_key("prompt", DetailDetectionResponses)
+
+    assert BatchCheckpoint.batch_key("prompt", DetailDetectionResponses) == key
+    assert BatchCheckpoint.batch_key("other", DetailDetectionResponses) != key
+    assert BatchCheckpoint.batch_key("prompt", DetailDetectionOutput) != key
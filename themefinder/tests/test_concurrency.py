@@ -0,0 +1,126 @@
+import asyncio
+
+import httpx
+import openai
+import pytest
+from themefinder.concurrency import AdaptiveConcurrencyLimiter
+from themefinder.llm import LLMResponse
+from themefinder.llm_batch_processor import BatchPrompt, call_llm
+from themefinder.models import (
+    DetailDetectionOutput,
+    DetailDetectionResponses,
+    EvidenceRich,
+)
+
+
+def _rate_limit_error(retry_after: str | None = None) -> openai.RateLimitError:
+    headers = {"retry-after": retry_after} if retry_after else {}
+    response = httpx.Response(
+        429, headers=headers, request=httpx.Request("POST", "http://llm")
+    )
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+@pytest.mark.asyncio
+async def test_limit_rises_by_one_per_round_of_successes():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=3)
+
+    for _ in range(2):
+        async with limiter.slot():
+            pass
+    assert limiter.limit == 3
+
+    for _ in range(10):
+        async with limiter.slot():
+            pass
+    assert limiter.limit == 3
+    assert limiter.metrics()["peak_concurrency_limit"] == 3
+
+
+@pytest.mark.asyncio
+async def test_slow_calls_do_not_raise_limit(monkeypatch):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=2, latency_target=1.0)
+    clock = iter([0.0, 0.0, 5.0, 5.0, 5.0, 10.0, 10.0])
+    monkeypatch.setattr("themefinder.concurrency.monotonic", lambda: next(clock))
+
+    for _ in range(2):
+        async with limiter.slot():
+            pass
+
+    assert limiter.limit == 2
+    assert limiter.successes == 2
+
+
+@pytest.mark.asyncio
+async def test_throttle_cuts_limit_once_per_backoff_window():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial_limit=8, min_limit=2, backoff_seconds=0.05
+    )
+
+    async def throttled_call():
+        async with limiter.slot():
+            await asyncio.sleep(0.01)
+            raise _rate_limit_error()
+
+    # A burst of concurrent throttles is one congestion signal
+    await asyncio.gather(*[throttled_call() for _ in range(3)], return_exceptions=True)
+    assert limiter.limit == 4
+
+    # Once the backoff has passed, a new throttle cuts again, down to min_limit
+    for _ in range(2):
+        with pytest.raises(openai.RateLimitError):
+            await throttled_call()
+    assert limiter.limit == 2
+    assert limiter.throttles == 5
+
+
+@pytest.mark.asyncio
+async def test_throttle_honours_retry_after_for_every_caller():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, backoff_seconds=10)
+    with pytest.raises(openai.RateLimitError):
+        async with limiter.slot():
+            raise _rate_limit_error(retry_after="0.2")
+
+    start = asyncio.get_running_loop().time()
+    async with limiter.slot():
+        pass
+
+    assert asyncio.get_running_loop().time() - start >= 0.15
+
+
+@pytest.mark.asyncio
+async def test_in_flight_calls_never_exceed_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=3, max_limit=3)
+    peak = 0
+
+    async def call():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[call() for _ in range(20)])
+
+    assert peak == 3
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_call_llm_shares_limiter_and_backs_off_on_rate_limit(mock_llm):
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, backoff_seconds=0.01)
+    parsed = DetailDetectionResponses(
+        responses=[DetailDetectionOutput(response_id=1, evidence_rich=EvidenceRich.NO)]
+    )
+    mock_llm.ainvoke.side_effect = [_rate_limit_error(), LLMResponse(parsed=parsed)]
+
+    results, failed_ids = await call_llm(
+        [BatchPrompt(prompt_string="prompt", response_ids=[1])],
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        concurrency=limiter,
+    )
+
+    assert [row["response_id"] for row in results] == [1]
+    assert failed_ids == []
+    assert limiter.metrics()["throttles"] == 1
+    assert limiter.metrics()["concurrency_limit"] == 2
@@ -0,0 +1,77 @@
+from unittest.mock import AsyncMock
+
+import numpy as np
+from themefinder.embeddings import (
+    embed,
+    random_projection,
+    similarity_batches,
+    similarity_groups,
+)
+
+
+async def test_embed_normalises_and_caches_texts():
+    embedder = AsyncMock()
+    embedder.aembed.side_effect = [
+        np.array([[3.0, 4.0], [0.0, 2.0]]),
+        np.array([[1.0, 0.0]]),
+    ]
+    cache = {}
+
+    first = await embed(embedder, ["a", "b", "a"], cache)
+    second = await embed(embedder, ["b", "c"], cache)
+
+    np.testing.assert_allclose(first, [[0.6, 0.8], [0.0, 1.0], [0.6, 0.8]])
+    np.testing.assert_allclose(second, [[0.0, 1.0], [1.0, 0.0]])
+    assert [call.args[0] for call in embedder.aembed.await_args_list] == [
+        ["a", "b"],
+        ["c"],
+    ]
+
+
+def test_similarity_batches_groups_nearest_neighbours():
+    # Alternating items from two directions
+    embeddings = np.array([[1.0, 0.0], [0.0, 1.0]] * 3)
+    embeddings[2] = [0.9, 0.1]
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    batches = similarity_batches(embeddings, batch_size=3)
+
+    assert batches == [[0, 2, 4], [1, 3, 5]]
+
+
+def test_similarity_batches_covers_every_row_once():
+    embeddings = np.random.default_rng(0).normal(size=(23, 8))
+
+    batches = similarity_batches(embeddings, batch_size=5)
+
+    assert [len(batch) for batch in batches] == [5, 5, 5, 5, 3]
+    assert sorted(i for batch in batches for i in batch) == list(range(23))
+
+
+def test_random_projection_keeps_similar_vectors_similar():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(2, 512)).astype(np.float32)
+    embeddings = np.vstack([embeddings, embeddings[0] + 0.1 * rng.normal(size=512)])
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    projected = random_projection(512, 64)(embeddings)
+
+    assert projected.shape == (3, 64)
+    np.testing.assert_allclose(np.linalg.norm(projected, axis=1), 1, rtol=1e-5)
+    assert projected[0] @ projected[2] > 0.9
+    assert abs(projected[0] @ projected[1]) < 0.5
+    assert random_projection(64, 64)(embeddings) is embeddings
+
+
+def test_similarity_groups_clusters_then_packs_similar_items():
+    rng = np.random.default_rng(0)
+    centres = np.eye(4)
+    labels = rng.integers(0, 4, 400)
+    embeddings = centres[labels] + 0.05 * rng.normal(size=(400, 4))
+    embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+    groups = similarity_groups(embeddings, group_size=10, chunk_size=100)
+
+    assert sorted(i for group in groups for i in group) == list(range(400))
+    assert all(len(group) <= 10 for group in groups)
+    assert all(len(set(labels[group])) == 1 for group in groups)
@@ -0,0 +1,74 @@
+import json
+
+import httpx
+import openai
+import pytest
+from themefinder.llm import OpenAILLM, StructuredOutputError
+from themefinder.models import DetailDetectionResponses
+
+
+def _llm_returning(content, usage=None):
+    def handler(request):
+        return httpx.Response(
+            200,
+            json={
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "gpt-4o",
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": content},
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    llm = OpenAILLM(model="gpt-4o", api_key="test")
+    llm.client = openai.AsyncOpenAI(
+        api_key="test",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    return llm
+
+
+async def test_openai_llm_reports_cached_tokens():
+    llm = _llm_returning(
+        json.dumps({"responses": [{"response_id": 1, "evidence_rich": "YES"}]}),
+        usage={
+            "prompt_tokens": 2000,
+            "completion_tokens": 10,
+            "total_tokens": 2010,
+            "prompt_tokens_details": {"cached_tokens": 1536},
+        },
+    )
+
+    response = await llm.ainvoke("prompt", output_model=DetailDetectionResponses)
+
+    assert response.parsed.responses[0].response_id == 1
+    assert response.prompt_tokens == 2000
+    assert response.completion_tokens == 10
+    assert response.cached_tokens == 1536
+    assert response.latency >= 0
+
+
+async def test_openai_llm_without_usage():
+    response = await _llm_returning("hello").ainvoke("prompt")
+
+    assert response.parsed == "hello"
+    assert response.prompt_tokens is None
+    assert response.cached_tokens is None
+
+
+async def test_openai_llm_raises_structured_output_error_with_content():
+    content = json.dumps({"responses": [{"response_id": 1, "evidence_rich": "MAYBE"}]})
+
+    with pytest.raises(StructuredOutputError) as error:
+        await _llm_returning(content).ainvoke(
+            "prompt", output_model=DetailDetectionResponses
+        )
+
+    assert error.value.content == content
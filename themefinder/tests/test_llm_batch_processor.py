@@ -1,3 +1,6 @@
+import json
+import re
+import string
 from unittest.mock import MagicMock, patch
 
 import httpx
@@ -5,25 +8,37 @@ import openai
 import pandas as pd
 import pytest
 import tiktoken
+from pydantic import ValidationError
 
-from themefinder import detail_detection
+from themefinder import detail_detection, prompts
+from themefinder.llm import LLMResponse, StructuredOutputError
+from themefinder.run_report import RunReport
 from themefinder.models import (
     DetailDetectionOutput,
     DetailDetectionResponses,
     EvidenceRich,
 )
 from themefinder.llm_batch_processor import (
+    GROUP_COLUMN,
+    ROW_POSITION_COLUMN,
+    TOKEN_LENGTH_COLUMN,
     BatchPrompt,
     batch_and_run,
     batch_task_input_df,
     build_prompt,
+    calculate_row_token_lengths,
     calculate_string_token_length,
     call_llm,
     generate_prompts,
     get_missing_response_ids,
+    pack_batches,
     partition_dataframe,
+    plan_batch_and_run,
     process_llm_responses,
+    response_table,
+    salvage_valid_rows,
     split_overflowing_batch,
+    with_token_lengths,
 )
 
 
@@ -105,6 +120,65 @@ def test_calls_encoding_for_model(monkeypatch):
     assert token_length == 3
 
 
+def test_encoding_is_loaded_once_per_model(monkeypatch):
+    fake_encoding = MagicMock()
+    fake_encoding.encode.return_value = ["token"]
+    fake_encoding_for_model = MagicMock(return_value=fake_encoding)
+    monkeypatch.setattr(tiktoken, "encoding_for_model", fake_encoding_for_model)
+
+    calculate_string_token_length("first", model="custom-model")
+    calculate_string_token_length("second", model="custom-model")
+
+    fake_encoding_for_model.assert_called_once_with("custom-model")
+
+
+def test_calculate_row_token_lengths_matches_per_row_count():
+    df = pd.DataFrame(
+        {"response_id": [1, 2], "response": ["I agree", "Not sure / maybe — ok"]}
+    )
+
+    lengths = calculate_row_token_lengths(df, model="gpt-4o")
+
+    assert lengths == [
+        calculate_string_token_length(row.to_json(), model="gpt-4o")
+        for _, row in df.iterrows()
+    ]
+
+
+def test_calculate_row_token_lengths_reuses_counted_rows(monkeypatch):
+    fake_encoding = MagicMock()
+    fake_encoding.encode_ordinary.side_effect = str.split
+    monkeypatch.setattr(tiktoken, "encoding_for_model", lambda model: fake_encoding)
+    df = pd.DataFrame({"response_id": [1, 2], "response": ["a", "b"]})
+
+    first = calculate_row_token_lengths(df, model="test-model")
+    # A later stage seeing an overlapping set of rows only encodes the new ones
+    second = calculate_row_token_lengths(
+        pd.DataFrame({"response_id": [2, 3], "response": ["b", "c"]}),
+        model="test-model",
+    )
+
+    assert second[0] == first[1]
+    assert fake_encoding.encode_ordinary.call_count == 3
+
+
+def test_token_lengths_are_used_for_batching_but_not_prompts():
+    df = with_token_lengths(
+        pd.DataFrame({"response_id": [1, 2, 3], "response": ["a", "b", "c"]})
+    )
+    df[TOKEN_LENGTH_COLUMN] = [30, 30, 20]
+
+    # Precomputed lengths are kept rather than recounted
+    assert with_token_lengths(df) is df
+    assert [
+        batch["response_id"].tolist()
+        for batch in batch_task_input_df(df, allowed_tokens=50, batch_size=3)
+    ] == [[1], [2, 3]]
+
+    prompt = build_prompt("{responses}", df)
+    assert TOKEN_LENGTH_COLUMN not in prompt.prompt_string
+
+
 def test_build_prompt():
     data = {"response_id": [1, 2], "text": ["response1", "response2"]}
     df = pd.DataFrame(data)
@@ -131,6 +205,39 @@ def test_build_prompt_with_simple_template():
     assert result.response_ids == [101, 202]
 
 
+@pytest.mark.parametrize(
+    "template, varying",
+    [
+        (prompts.AGENTIC_THEME_CLUSTERING, "themes_json"),
+        (prompts.DETAIL_DETECTION, "responses"),
+        (prompts.THEME_CONDENSATION, "responses"),
+        (prompts.THEME_GENERATION, "responses"),
+        (prompts.THEME_MAPPING, "responses"),
+        (prompts.THEME_MAPPING_WITH_DETAIL, "responses"),
+        (prompts.THEME_REFINEMENT, "responses"),
+    ],
+)
+def test_prompt_templates_put_varying_input_last(template, varying):
+    fields = [field for _, field, _, _ in string.Formatter().parse(template) if field]
+    assert fields[-1] == varying
+
+
+def test_build_prompt_batches_share_prefix():
+    df = pd.DataFrame({"response_id": [1, 2], "response": ["foo", "bar"]})
+    kwargs = {
+        "system_prompt": "system",
+        "question": "question?",
+        "refined_themes": [{"A": "theme"}],
+    }
+
+    first = build_prompt(prompts.THEME_MAPPING, df.iloc[:1], **kwargs)
+    second = build_prompt(prompts.THEME_MAPPING, df.iloc[1:], **kwargs)
+
+    prefix = prompts.THEME_MAPPING.split("{responses}")[0].format(**kwargs)
+    assert first.prompt_string.startswith(prefix)
+    assert second.prompt_string.startswith(prefix)
+
+
 def dummy_token_length_low(input_text: str, model="gpt-4o"):
     """
     Simulate a tokenizer that always returns a low token count.
@@ -756,6 +863,198 @@ async def test_batch_and_run_with_unprocessable_rows(monkeypatch, mock_llm):
     assert set(unprocessable_df["response_id"]) == {3}
 
 
+def _structured_output_error(items):
+    content = json.dumps({"responses": items})
+    try:
+        DetailDetectionResponses.model_validate_json(content)
+    except ValidationError as e:
+        return StructuredOutputError(content, e)
+    raise AssertionError("Expected the output to fail validation")
+
+
+def test_salvage_valid_rows():
+    error = _structured_output_error(
+        [
+            {"response_id": 1, "evidence_rich": "YES"},
+            {"response_id": 2, "evidence_rich": "MAYBE"},
+            {"response_id": 3, "evidence_rich": "NO"},
+            # Not in the batch, so not trusted
+            {"response_id": 99, "evidence_rich": "NO"},
+        ]
+    )
+
+    rows, failed_ids = salvage_valid_rows(
+        error.content, DetailDetectionResponses, [1, 2, 3, 4]
+    )
+
+    assert [row["response_id"] for row in rows] == [1, 3]
+    assert failed_ids == [2, 4]
+
+
+def test_salvage_valid_rows_unparseable_output():
+    rows, failed_ids = salvage_valid_rows(
+        '{"responses": [', DetailDetectionResponses, [1, 2]
+    )
+
+    assert rows == []
+    assert failed_ids == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_call_llm_salvages_valid_rows(mock_llm):
+    mock_llm.ainvoke.side_effect = _structured_output_error(
+        [
+            {"response_id": 1, "evidence_rich": "YES"},
+            {"response_id": 2, "evidence_rich": "MAYBE"},
+        ]
+    )
+
+    results, failed_ids = await call_llm(
+        [BatchPrompt(prompt_string="prompt", response_ids=[1, 2])],
+        mock_llm,
+        output_model=DetailDetectionResponses,
+    )
+
+    assert [result["response_id"] for result in results] == [1]
+    assert failed_ids == [2]
+
+
+@pytest.mark.asyncio
+async def test_batch_and_run_bisects_failed_batches(mock_llm):
+    prompts = []
+
+    async def ainvoke(prompt, output_model=None):
+        prompts.append(prompt)
+        response_ids = [int(i) for i in re.findall(r"'response_id': (\d+)", prompt)]
+        if 5 in response_ids:
+            raise ValueError("Invalid output")
+        return LLMResponse(
+            parsed=DetailDetectionResponses(
+                responses=[
+                    DetailDetectionOutput(response_id=i, evidence_rich=EvidenceRich.YES)
+                    for i in response_ids
+                ]
+            )
+        )
+
+    mock_llm.ainvoke.side_effect = ainvoke
+    responses_df = pd.DataFrame(
+        {"response_id": range(1, 9), "response": [f"r{i}" for i in range(1, 9)]}
+    )
+
+    result_df, unprocessable_df = await batch_and_run(
+        responses_df,
+        "Responses: {responses}",
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        batch_size=8,
+    )
+
+    assert sorted(result_df["response_id"]) == [1, 2, 3, 4, 6, 7, 8]
+    assert list(unprocessable_df["response_id"]) == [5]
+    # The batch, then halves of 4, 2 and 1 rows rather than a call per row
+    assert len(prompts) == 7
+
+
+@pytest.mark.asyncio
+async def test_batch_and_run_formats_each_group_with_its_kwargs(mock_llm):
+    prompts = []
+
+    async def ainvoke(prompt, output_model=None):
+        prompts.append(prompt)
+        response_ids = [int(i) for i in re.findall(r"'response_id': (\d+)", prompt)]
+        if 3 in response_ids and len(response_ids) > 1:
+            raise ValueError("Invalid output")
+        return LLMResponse(
+            parsed=DetailDetectionResponses(
+                responses=[
+                    DetailDetectionOutput(response_id=i, evidence_rich=EvidenceRich.YES)
+                    for i in response_ids
+                ]
+            )
+        )
+
+    mock_llm.ainvoke.side_effect = ainvoke
+    responses_df = pd.DataFrame(
+        {
+            "response_id": [1, 2, 3, 4],
+            "response": ["a", "b", "c", "d"],
+            GROUP_COLUMN: [0, 1, 1, 0],
+        }
+    )
+
+    result_df, unprocessable_df = await batch_and_run(
+        responses_df,
+        "{theme} {responses}",
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        batch_size=10,
+        group_kwargs={0: {"theme": "rail"}, 1: {"theme": "buses"}},
+    )
+
+    assert sorted(result_df["response_id"]) == [1, 2, 3, 4]
+    assert unprocessable_df.empty
+    assert GROUP_COLUMN not in result_df.columns
+    # Groups are batched apart, and retried halves keep their group's kwargs
+    assert [prompt.split(" ")[0] for prompt in prompts] == [
+        "rail",
+        "buses",
+        "buses",
+        "buses",
+    ]
+    assert all(GROUP_COLUMN not in prompt for prompt in prompts)
+
+
+def test_generate_prompts_group_kwargs_exclude_partition_key():
+    df = pd.DataFrame({"response_id": [1], "response": ["a"], GROUP_COLUMN: [0]})
+
+    with pytest.raises(ValueError):
+        generate_prompts(
+            "{responses}", df, partition_key="response", group_kwargs={0: {}}
+        )
+
+
+@pytest.mark.asyncio
+async def test_batch_and_run_records_usage(mock_llm):
+    async def ainvoke(prompt, output_model=None):
+        response_ids = [int(i) for i in re.findall(r"'response_id': (\d+)", prompt)]
+        if response_ids == [2]:
+            raise ValueError("Invalid output")
+        return LLMResponse(
+            parsed=DetailDetectionResponses(
+                responses=[
+                    DetailDetectionOutput(response_id=i, evidence_rich=EvidenceRich.NO)
+                    for i in response_ids
+                ]
+            ),
+            prompt_tokens=100,
+            completion_tokens=10,
+            cached_tokens=80,
+            latency=0.5,
+        )
+
+    mock_llm.ainvoke.side_effect = ainvoke
+    run_report = RunReport()
+
+    await batch_and_run(
+        pd.DataFrame({"response_id": [1, 2], "response": ["a", "b"]}),
+        "Responses: {responses}",
+        mock_llm,
+        output_model=DetailDetectionResponses,
+        batch_size=1,
+        run_report=run_report,
+        stage="detail_detection",
+    )
+
+    usage = run_report.stage("detail_detection").summary()
+    # The failing row is tried once in its batch and once when retried
+    assert usage["calls"] == 3
+    assert usage["failures"] == 2
+    assert usage["prompt_tokens"] == 100
+    assert usage["cached_tokens"] == 80
+    assert usage["latency_p50"] == 0.5
+
+
 def test_get_missing_response_ids():
     """
     Test get_missing_response_ids function.
@@ -798,3 +1097,161 @@ def test_partition_dataframe():
     partitions = partition_dataframe(df, partition_key=None)
     assert len(partitions) == 1
     assert len(partitions[0]) == 4
+
+
+def test_pack_batches_fills_token_budget():
+    """Rows are packed largest first into the first batch with room for them."""
+    df = pd.DataFrame({"response_id": [1, 2, 3, 4, 5, 6], "text": list("abcdef")})
+    df[TOKEN_LENGTH_COLUMN] = [10, 40, 20, 30, 50, 10]
+
+    batches = pack_batches(df, allowed_tokens=60, batch_size=10)
+
+    # Fixed slicing needs four batches for 160 tokens; first-fit-decreasing needs three
+    assert [batch["response_id"].tolist() for batch in batches] == [
+        [1, 5],
+        [2, 3],
+        [4, 6],
+    ]
+    assert all(batch[TOKEN_LENGTH_COLUMN].sum() <= 60 for batch in batches)
+
+
+def test_pack_batches_honours_batch_size_and_partitions():
+    df = pd.DataFrame(
+        {
+            "response_id": [1, 2, 3, 4, 5],
+            "text": list("abcde"),
+            "group": ["x", "y", "x", "x", "y"],
+        }
+    )
+    df[TOKEN_LENGTH_COLUMN] = 1
+
+    batches = pack_batches(df, allowed_tokens=100, batch_size=2, partition_key="group")
+
+    assert [batch["response_id"].tolist() for batch in batches] == [
+        [1, 3],
+        [4],
+        [2, 5],
+    ]
+
+
+def test_pack_batches_skips_oversized_rows():
+    df = pd.DataFrame({"response_id": [1, 2, 3], "text": list("abc")})
+    df[TOKEN_LENGTH_COLUMN] = [10, 100, 10]
+
+    batches = pack_batches(df, allowed_tokens=50, batch_size=10)
+
+    assert [batch["response_id"].tolist() for batch in batches] == [[1, 3]]
+
+
+@pytest.mark.parametrize("batch_planner", [batch_task_input_df, pack_batches])
+def test_generate_prompts_from_table_match_build_prompt(batch_planner):
+    df = pd.DataFrame(
+        {
+            "response_id": [1, 2, 3, 4, 5],
+            "response": ["a", "b's", 'c"', "d", "e"],
+            "score": [0.5, 1.0, 2.25, 3.0, 4.0],
+            "flag": [True, False, True, True, False],
+            "group": ["x", "y", "x", "y", "x"],
+        }
+    )
+    df[TOKEN_LENGTH_COLUMN] = [10, 40, 20, 30, 10]
+    kwargs = {"question": "question?"}
+
+    prompts_ = generate_prompts(
+        "{question} {responses}",
+        df,
+        batch_size=2,
+        partition_key="group",
+        batch_planner=batch_planner,
+        **kwargs,
+    )
+
+    expected = [
+        build_prompt("{question} {responses}", batch, **kwargs)
+        for batch in batch_planner(df, 50_000, 2, "group")
+    ]
+    assert prompts_ == expected
+
+
+def test_response_table_only_converts_prompt_safe_columns():
+    df = pd.DataFrame({"response_id": [1, 2], "response": ["a", "b"]})
+    df[TOKEN_LENGTH_COLUMN] = [1, 1]
+
+    assert response_table(df).column_names == ["response_id", "response"]
+    # Missing values and lists would be formatted differently by Arrow
+    assert response_table(df.assign(response=["a", None])) is None
+    assert response_table(df.assign(labels=[["A"], ["B"]])) is None
+
+
+def test_row_positions_are_kept_out_of_prompts_and_token_counts():
+    df = pd.DataFrame({"response_id": [1, 2], "response": ["a", "b"]})
+    positioned = df.assign(**{ROW_POSITION_COLUMN: [0, 1]})
+
+    prompt = build_prompt("{responses}", positioned)
+
+    assert ROW_POSITION_COLUMN not in prompt.prompt_string
+    assert calculate_row_token_lengths(positioned) == calculate_row_token_lengths(df)
+
+
+def test_generate_prompts_falls_back_to_dataframe_batches():
+    df = pd.DataFrame({"response_id": [1, 2], "labels": [["A"], ["B", "C"]]})
+
+    prompts_ = generate_prompts("{responses}", df, batch_size=1)
+
+    assert [prompt.prompt_string for prompt in prompts_] == [
+        "[{'response_id': 1, 'labels': ['A']}]",
+        "[{'response_id': 2, 'labels': ['B', 'C']}]",
+    ]
+
+
+def test_process_llm_responses_joins_in_input_order():
+    responses = pd.DataFrame({"response_id": ["3", "1", "2"], "text": list("cab")})
+    llm_responses = [
+        {"response_id": 1, "labels": ["A"]},
+        {"response_id": 2, "labels": ["B"]},
+        {"response_id": 3, "labels": ["C"]},
+        # Not an input response, so dropped
+        {"response_id": 4, "labels": ["D"]},
+    ]
+
+    processed = process_llm_responses(llm_responses, responses)
+
+    assert processed.to_dict(orient="records") == [
+        {"response_id": 3, "text": "c", "labels": ["C"]},
+        {"response_id": 1, "text": "a", "labels": ["A"]},
+        {"response_id": 2, "text": "b", "labels": ["B"]},
+    ]
+    # The input isn't modified
+    assert responses["response_id"].tolist() == ["3", "1", "2"]
+    pd.testing.assert_frame_equal(
+        processed,
+        responses.astype({"response_id": int}).merge(
+            pd.DataFrame(llm_responses), how="inner", on="response_id"
+        ),
+    )
+
+
+def test_process_llm_responses_merges_shared_columns():
+    responses = pd.DataFrame({"response_id": [1, 2], "labels": ["x", "y"]})
+
+    processed = process_llm_responses([{"response_id": 2, "labels": ["B"]}], responses)
+
+    assert processed.columns.tolist() == ["response_id", "labels_x", "labels_y"]
+    assert processed["labels_y"].tolist() == [["B"]]
+
+
+def test_plan_batch_and_run_reports_calls_and_tokens():
+    df = pd.DataFrame({"response_id": range(1, 11), "response": ["yes"] * 10})
+
+    fixed = plan_batch_and_run(df, "Responses: {responses}", batch_size=4)
+    packed = plan_batch_and_run(
+        df, "Responses: {responses}", batch_size=4, batch_planner=pack_batches
+    )
+
+    assert fixed.rows == fixed.batched_rows == 10
+    assert fixed.calls == packed.calls == 3
+    assert fixed.prompt_tokens == sum(
+        calculate_string_token_length(prompt.prompt_string)
+        for prompt in generate_prompts("Responses: {responses}", df, batch_size=4)
+    )
+    assert 0 < fixed.max_prompt_tokens < fixed.prompt_tokens
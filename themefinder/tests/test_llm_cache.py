@@ -0,0 +1,168 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from themefinder.llm import LLMResponse
+from themefinder.llm_batch_processor import BatchPrompt, call_llm
+from themefinder.llm_cache import CachedLLM, RedisLLMCache, SQLiteLLMCache
+from themefinder.models import (
+    DetailDetectionOutput,
+    DetailDetectionResponses,
+    EvidenceRich,
+    ThemeMappingResponses,
+)
+
+PARSED = DetailDetectionResponses(
+    responses=[DetailDetectionOutput(response_id=1, evidence_rich=EvidenceRich.YES)]
+)
+
+
+@pytest.fixture
+def llm():
+    mock = MagicMock()
+    mock.model = "gpt-4o"
+    mock.request_kwargs = {"temperature": 0}
+    mock.ainvoke = AsyncMock(return_value=LLMResponse(parsed=PARSED))
+    return mock
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    yield cache
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_replayed_prompt_is_served_from_cache(llm, sqlite_cache):
+    cached_llm = CachedLLM(llm, sqlite_cache)
+
+    first = await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+    second = await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+    llm.ainvoke.assert_awaited_once()
+    assert second.parsed == first.parsed == PARSED
+    assert (cached_llm.hits, cached_llm.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_cache_persists_across_instances(llm, tmp_path):
+    path = tmp_path / "llm_cache.sqlite"
+    await CachedLLM(llm, SQLiteLLMCache(path)).ainvoke(
+        "prompt", DetailDetectionResponses
+    )
+
+    replay = CachedLLM(llm, SQLiteLLMCache(path))
+    await replay.ainvoke("prompt", DetailDetectionResponses)
+
+    llm.ainvoke.assert_awaited_once()
+    assert replay.hits == 1
+
+
+def test_cache_key_covers_model_kwargs_schema_and_prompt(llm, sqlite_cache):
+    cached_llm = CachedLLM(llm, sqlite_cache)
+    key = cached_llm.cache_key("prompt", DetailDetectionResponses)
+
+    assert cached_llm.cache_key("prompt", DetailDetectionResponses) == key
+    assert cached_llm.cache_key("other prompt", DetailDetectionResponses) != key
+    assert cached_llm.cache_key("prompt", ThemeMappingResponses) != key
+    llm.request_kwargs = {"temperature": 0, "seed": 1}
+    assert cached_llm.cache_key("prompt", DetailDetectionResponses) != key
+    llm.model = "gpt-4.1"
+    assert cached_llm.cache_key("prompt", DetailDetectionResponses) != key
+
+
+@pytest.mark.asyncio
+async def test_nonzero_temperature_is_not_cached(llm, sqlite_cache):
+    llm.request_kwargs = {"temperature": 0.7}
+    cached_llm = CachedLLM(llm, sqlite_cache)
+
+    await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+    await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+    assert llm.ainvoke.await_count == 2
+
+
+def test_sqlite_cache_evicts_least_recently_used(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite", max_size_bytes=10)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.get("a")
+    cache.set("c", "cccc")
+
+    assert cache.get("a") == "aaaa"
+    assert cache.get("b") is None
+    assert cache.get("c") == "cccc"
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_round_trip(llm):
+    store = {}
+    client = MagicMock()
+    client.get.side_effect = lambda key: store.get(key)
+    client.set.side_effect = lambda key, value, ex: store.__setitem__(
+        key, value.encode()
+    )
+    cached_llm = CachedLLM(llm, RedisLLMCache(client, ttl=60))
+
+    await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+    response = await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+    llm.ainvoke.assert_awaited_once()
+    assert response.parsed == PARSED
+    assert client.set.call_args.kwargs["ex"] == 60
+    assert all(key.startswith("themefinder:llm:") for key in store)
+
+
+@pytest.mark.asyncio
+async def test_broken_cache_falls_back_to_llm(llm):
+    cache = MagicMock()
+    cache.get.side_effect = ConnectionError("cache down")
+    cache.set.side_effect = ConnectionError("cache down")
+    cached_llm = CachedLLM(llm, cache)
+
+    response = await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+    assert response.parsed == PARSED
+
+
+@pytest.mark.asyncio
+async def test_closed_sqlite_cache_falls_back_to_llm(llm, tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    cache.close()
+    cached_llm = CachedLLM(llm, cache)
+
+    response = await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+    assert response.parsed == PARSED
+
+
+@pytest.mark.asyncio
+async def test_unexpected_cache_errors_are_raised(llm):
+    cache = MagicMock()
+    cache.get.side_effect = TypeError("bug")
+    cached_llm = CachedLLM(llm, cache)
+
+    with pytest.raises(TypeError):
+        await cached_llm.ainvoke("prompt", DetailDetectionResponses)
+
+
+@pytest.mark.asyncio
+async def test_incomplete_responses_are_replayed_like_the_llm(llm, sqlite_cache):
+    """A deterministic LLM would repeat an incomplete response, so the cache does too."""
+    cached_llm = CachedLLM(llm, sqlite_cache)
+    # The LLM only ever returns response 1
+    complete = BatchPrompt(prompt_string="complete", response_ids=[1])
+    incomplete = BatchPrompt(prompt_string="incomplete", response_ids=[1, 2])
+
+    for _ in range(2):
+        _, failed_ids = await call_llm(
+            [complete, incomplete],
+            cached_llm,
+            DetailDetectionResponses,
+            integrity_check=True,
+        )
+        assert failed_ids == [2]
+
+    # The second run is served entirely from the cache
+    assert llm.ainvoke.await_count == 2
+    assert cached_llm.hits == 2
@@ -0,0 +1,218 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pandas as pd
+import pytest
+from themefinder.llm import OpenAILLM
+from themefinder.mock_llm_server import (
+    MockLLMConfig,
+    MockLLMServer,
+    mock_structured_output,
+)
+from themefinder.models import DetailDetectionResponses, HierarchicalClusteringResponse
+from themefinder.run_report import RunReport
+from themefinder.tasks import (
+    detail_detection,
+    theme_condensation,
+    theme_generation,
+    theme_mapping,
+    theme_mapping_with_detail,
+    theme_refinement,
+)
+
+
+@pytest.fixture
+def mock_server():
+    with MockLLMServer() as server:
+        yield server
+
+
+def _llm(server, **client_kwargs):
+    return OpenAILLM(
+        model="mock", base_url=server.base_url, api_key="mock", **client_kwargs
+    )
+
+
+async def test_mock_server_answers_every_task(mock_server):
+    llm = _llm(mock_server)
+    responses_df = pd.DataFrame(
+        {"response_id": range(1, 41), "response": [f"r{i}" for i in range(1, 41)]}
+    )
+    themes_df = pd.DataFrame(
+        {"topic_id": ["A", "B"], "topic": ["One: first", "Two: second"]}
+    )
+
+    generated, _ = await theme_generation(responses_df, llm, question="q?")
+    condensed, _ = await theme_condensation(generated, llm, question="q?")
+    refined, unrefined = await theme_refinement(condensed, llm, question="q?")
+    mapped, unmapped = await theme_mapping(
+        responses_df, llm, question="q?", refined_themes_df=themes_df
+    )
+    fused, _ = await theme_mapping_with_detail(
+        responses_df, llm, question="q?", refined_themes_df=themes_df
+    )
+    detailed, undetailed = await detail_detection(responses_df, llm, question="q?")
+
+    assert len(generated) > 0 and len(condensed) > 0 and len(refined) > 0
+    assert unrefined.empty
+    assert sorted(mapped["response_id"]) == list(range(1, 41))
+    assert unmapped.empty
+    assert sorted(fused["response_id"]) == list(range(1, 41))
+    assert sorted(detailed["response_id"]) == list(range(1, 41))
+    assert undetailed.empty
+
+
+async def test_mock_server_answers_clustering(mock_server):
+    response = await _llm(mock_server).ainvoke(
+        'TOPICS: [{"topic_id": "A"}, {"topic_id": "B"}, {"topic_id": "C"}]',
+        output_model=HierarchicalClusteringResponse,
+    )
+
+    assert response.parsed.parent_themes[0].children == ["A", "B"]
+
+
+async def test_mock_server_reports_usage_and_cached_prefixes(mock_server):
+    llm = _llm(mock_server)
+    prefix = "instructions " * 2000
+
+    first = await llm.ainvoke(prefix + "first batch")
+    second = await llm.ainvoke(prefix + "second batch")
+
+    assert first.prompt_tokens > 2000
+    assert first.cached_tokens == 0
+    assert 1024 <= second.cached_tokens <= second.prompt_tokens
+    assert mock_server.stats.completed == 2
+    assert mock_server.stats.prompt_tokens == first.prompt_tokens + second.prompt_tokens
+
+
+async def test_mock_server_injects_rate_limits():
+    config = MockLLMConfig(rate_limit_rate=1.0)
+    with MockLLMServer(config) as server, pytest.raises(openai.RateLimitError):
+        await _llm(server, max_retries=0).ainvoke("prompt")
+
+    assert server.stats.rate_limited == 1
+
+
+async def test_mock_server_injects_timeouts():
+    config = MockLLMConfig(timeout_rate=1.0, timeout_seconds=1.0)
+    with MockLLMServer(config) as server, pytest.raises(openai.APITimeoutError):
+        await _llm(server, max_retries=0, timeout=0.1).ainvoke("prompt")
+
+    assert server.stats.timed_out == 1
+
+
+async def test_mock_server_limits_concurrency():
+    config = MockLLMConfig(latency_median=0.2, max_concurrency=2)
+    with MockLLMServer(config) as server:
+        llm = _llm(server, max_retries=0)
+        results = await asyncio.gather(
+            *(llm.ainvoke("prompt") for _ in range(4)), return_exceptions=True
+        )
+
+    rate_limited = [r for r in results if isinstance(r, openai.RateLimitError)]
+    assert len(rate_limited) == 2
+    assert server.stats.max_in_flight == 2
+
+
+async def test_mock_server_usage_reaches_run_report(mock_server):
+    run_report = RunReport()
+    responses_df = pd.DataFrame({"response_id": [1, 2, 3], "response": ["a", "b", "c"]})
+
+    await detail_detection(
+        responses_df,
+        _llm(mock_server),
+        question="q?",
+        batch_size=1,
+        run_report=run_report,
+    )
+
+    usage = run_report.stage("detail_detection").summary()
+    assert usage["calls"] == 3
+    assert usage["prompt_tokens"] == mock_server.stats.prompt_tokens
+    assert usage["latency_p50"] is not None
+
+
+def test_mock_server_rejects_streamed_completions(mock_server):
+    response = httpx.post(
+        f"{mock_server.base_url}/chat/completions",
+        json={"model": "mock", "messages": [], "stream": True},
+    )
+
+    assert response.status_code == 400
+    assert "Streaming" in response.json()["error"]["message"]
+    assert mock_server.stats.requests == 0
+
+
+def test_mock_server_rejects_unknown_paths(mock_server):
+    assert httpx.post(f"{mock_server.base_url}/embeddings", json={}).status_code == 404
+    assert httpx.get(f"{mock_server.base_url}/models").status_code == 404
+
+
+def test_mock_server_serves_stats(mock_server):
+    httpx.post(f"{mock_server.base_url}/chat/completions", json={"messages": []})
+
+    stats = httpx.get(f"{mock_server.base_url}/stats").json()
+
+    assert stats["requests"] == stats["completed"] == 1
+
+
+async def test_mock_server_survives_clients_giving_up():
+    config = MockLLMConfig(timeout_rate=1.0, timeout_seconds=0.3)
+    with MockLLMServer(config) as server:
+        with pytest.raises(openai.APITimeoutError):
+            await _llm(server, max_retries=0, timeout=0.1).ainvoke("prompt")
+        # Let the hung request write its answer to the closed connection
+        await asyncio.sleep(0.4)
+        config.timeout_rate = 0.0
+        response = await _llm(server).ainvoke("prompt")
+
+    assert server.stats.timed_out == 1
+    assert response.parsed == "This is a mock response."
+
+
+def test_mock_server_draws_lognormal_latencies():
+    config = MockLLMConfig(latency_median=0.01, latency_sigma=0.5)
+    with MockLLMServer(config) as server:
+        latencies = {server._draw_latency() for _ in range(5)}
+
+    assert len(latencies) == 5
+    assert all(latency > 0 for latency in latencies)
+
+
+def test_mock_structured_output_validates_for_themefinder_models():
+    schema = DetailDetectionResponses.model_json_schema()
+
+    output = mock_structured_output(
+        "DetailDetectionResponses", schema, "[{'response_id': 4}, {'response_id': 5}]"
+    )
+
+    parsed = DetailDetectionResponses.model_validate(output)
+    assert [row.response_id for row in parsed.responses] == [4, 5]
+
+
+def test_mock_structured_output_fills_other_schemas_with_placeholders():
+    schema = {
+        "type": "object",
+        "properties": {
+            "kind": {"$ref": "#/$defs/Kind"},
+            "note": {"anyOf": [{"type": "string"}, {"type": "null"}]},
+            "scores": {"type": "array", "items": {"type": "number"}},
+            "count": {"type": "integer"},
+            "flag": {"type": "boolean"},
+            "nothing": {"type": "null"},
+        },
+        "$defs": {"Kind": {"enum": ["a", "b"]}},
+    }
+
+    output = mock_structured_output("Other", schema, "prompt")
+
+    assert json.loads(json.dumps(output)) == {
+        "kind": "a",
+        "note": "mock",
+        "scores": [1.0],
+        "count": 1,
+        "flag": True,
+        "nothing": None,
+    }
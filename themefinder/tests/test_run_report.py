@@ -0,0 +1,61 @@
+import json
+
+from themefinder.llm import LLMResponse
+from themefinder.run_report import RunReport, StageUsage
+
+
+def test_stage_usage_summary():
+    usage = StageUsage()
+    for latency in [1.0, 2.0, 3.0, 4.0]:
+        usage.record(
+            LLMResponse(
+                parsed="",
+                prompt_tokens=100,
+                completion_tokens=10,
+                cached_tokens=50,
+                latency=latency,
+            )
+        )
+    # LLMs that don't report usage still count as calls
+    usage.record(LLMResponse(parsed=""))
+    usage.record_failure()
+    usage.retries += 2
+
+    assert usage.summary() == {
+        "calls": 6,
+        "prompt_tokens": 400,
+        "completion_tokens": 40,
+        "cached_tokens": 200,
+        "latency_p50": 2.5,
+        "latency_p95": 3.85,
+        "retries": 2,
+        "failures": 1,
+    }
+
+
+def test_stage_usage_summary_without_latencies():
+    summary = StageUsage().summary()
+
+    assert summary["latency_p50"] is None
+    assert summary["latency_p95"] is None
+
+
+def test_run_report_writes_stages_and_total(tmp_path):
+    report = RunReport()
+    report.stage("theme_generation").record(
+        LLMResponse(parsed="", prompt_tokens=100, latency=1.0)
+    )
+    report.stage("theme_mapping").record(
+        LLMResponse(parsed="", prompt_tokens=300, latency=3.0)
+    )
+    report.stage("theme_mapping").record_failure()
+
+    report.write(tmp_path / "run_report.json")
+
+    written = json.loads((tmp_path / "run_report.json").read_text())
+    assert list(written["stages"]) == ["theme_generation", "theme_mapping"]
+    assert written["stages"]["theme_mapping"]["calls"] == 2
+    assert written["stages"]["theme_mapping"]["failures"] == 1
+    assert written["total"]["calls"] == 3
+    assert written["total"]["prompt_tokens"] == 400
+    assert written["total"]["latency_p50"] == 2.0
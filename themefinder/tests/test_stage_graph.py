@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from themefinder.stage_graph import Stage, run_stages
+
+
+async def test_run_stages_passes_dependency_results():
+    async def load():
+        return [1, 2, 3]
+
+    async def total(load):
+        return sum(load)
+
+    async def report(load, total):
+        return f"{len(load)} rows totalling {total}"
+
+    results = await run_stages(
+        {
+            "report": Stage(report, depends_on=("load", "total")),
+            "total": Stage(total, depends_on=("load",)),
+            "load": Stage(load),
+        }
+    )
+
+    assert results == {
+        "report": "3 rows totalling 6",
+        "total": 6,
+        "load": [1, 2, 3],
+    }
+
+
+async def test_run_stages_runs_independent_stages_concurrently():
+    started = []
+    both_started = asyncio.Event()
+
+    def stage(name):
+        async def run():
+            started.append(name)
+            if len(started) == 2:
+                both_started.set()
+            # Would time out if the other stage waited for this one to finish
+            await asyncio.wait_for(both_started.wait(), 1)
+            return name
+
+        return run
+
+    async def after_a(a):
+        started.append("after_a")
+
+    await run_stages(
+        {
+            "a": Stage(stage("a")),
+            "after_a": Stage(after_a, depends_on=("a",)),
+            "b": Stage(stage("b")),
+        }
+    )
+
+    assert started == ["a", "b", "after_a"]
+
+
+async def test_run_stages_cancels_remaining_stages_on_failure():
+    cancelled = asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def failing():
+        raise RuntimeError("LLM unavailable")
+
+    with pytest.raises(RuntimeError, match="LLM unavailable"):
+        await run_stages({"slow": Stage(slow), "failing": Stage(failing)})
+
+    assert cancelled.is_set()
+
+
+@pytest.mark.parametrize(
+    "stages, message",
+    [
+        (
+            {"a": Stage(None, depends_on=("b",)), "b": Stage(None, depends_on=("a",))},
+            "cycle",
+        ),
+        ({"a": Stage(None, depends_on=("missing",))}, "unknown stage 'missing'"),
+    ],
+)
+async def test_run_stages_rejects_invalid_dependencies(stages, message):
+    with pytest.raises(ValueError, match=message):
+        await run_stages(stages)
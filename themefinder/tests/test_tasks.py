@@ -1,13 +1,17 @@
 from unittest.mock import AsyncMock, Mock, patch
 
+import numpy as np
 import pandas as pd
 import pytest
 
 from themefinder import (
     find_themes,
+    pack_batches,
+    plan_find_themes,
     theme_condensation,
     theme_generation,
     theme_mapping,
+    theme_mapping_with_detail,
     theme_refinement,
 )
 from themefinder.llm import LLMResponse
@@ -23,6 +27,9 @@ from themefinder.models import (
     ThemeGenerationResponses,
     ThemeMappingOutput,
     ThemeMappingResponses,
+    ThemeMappingWithDetailOutput,
+    ThemeMappingWithDetailResponses,
+    ThemeRefinementResponses,
 )
 
 
@@ -204,6 +211,163 @@ async def test_theme_condensation_recursive(mock_llm):
         )  # while loop (100->50, 50->25) + final pass
 
 
+async def test_theme_condensation_batches_similar_themes_with_embedder(mock_llm):
+    """Test an embedder puts similar themes in the same condensation batch."""
+    animals = ["aardvark", "pangolin"] * 20
+    themes_df = pd.DataFrame(
+        {
+            "topic_label": [f"{animal} {i}" for i, animal in enumerate(animals)],
+            "topic_description": [f"About {animal}s" for animal in animals],
+            "source_topic_count": [1] * 40,
+        }
+    )
+    embedder = AsyncMock()
+    embedder.aembed.side_effect = lambda texts: np.array(
+        [[1.0, 0.0] if "aardvark" in text else [0.0, 1.0] for text in texts]
+    )
+    batch_animals = []
+
+    async def condense_batches(batch_prompts, **kwargs):
+        # Condense each batch to one theme per animal in it
+        rows = []
+        for batch_prompt in batch_prompts:
+            present = [
+                a for a in ("aardvark", "pangolin") if a in batch_prompt.prompt_string
+            ]
+            batch_animals.append(set(present))
+            rows.extend(
+                {
+                    "topic_label": animal,
+                    "topic_description": f"About {animal}s",
+                    "source_topic_count": 20,
+                }
+                for animal in present
+            )
+        return rows, []
+
+    with patch(
+        "themefinder.llm_batch_processor.call_llm", side_effect=condense_batches
+    ):
+        result_df, _ = await theme_condensation(
+            themes_df,
+            mock_llm,
+            question="test question",
+            batch_size=20,
+            embedder=embedder,
+        )
+
+    # Two single-animal batches in the recursive round, then the final pass
+    assert batch_animals[:2] == [{"aardvark"}, {"pangolin"}]
+    assert sorted(result_df["topic_label"]) == ["aardvark", "pangolin"]
+    embedder.aembed.assert_awaited_once()
+
+
+async def test_theme_condensation_packs_batches_within_similarity_groups(mock_llm):
+    """Test a batch planner packs within each group rather than across groups."""
+    animals = ["aardvark", "pangolin"] * 20
+    # Lengths alternate independently of the animal, so packing by length would mix them
+    lengths = [1, 1, 30, 30] * 10
+    themes_df = pd.DataFrame(
+        {
+            "topic_label": [f"{animal} {i}" for i, animal in enumerate(animals)],
+            "topic_description": [
+                f"About {animal}s" + " and more" * length
+                for animal, length in zip(animals, lengths, strict=True)
+            ],
+            "source_topic_count": [1] * 40,
+        }
+    )
+    embedder = AsyncMock()
+    embedder.aembed.side_effect = lambda texts: np.array(
+        [[1.0, 0.0] if "aardvark" in text else [0.0, 1.0] for text in texts]
+    )
+    batch_animals = []
+
+    async def condense_batches(batch_prompts, **kwargs):
+        rows = []
+        for batch_prompt in batch_prompts:
+            present = [
+                a for a in ("aardvark", "pangolin") if a in batch_prompt.prompt_string
+            ]
+            batch_animals.append(set(present))
+            rows.extend(
+                {
+                    "topic_label": animal,
+                    "topic_description": f"About {animal}s",
+                    "source_topic_count": 20,
+                }
+                for animal in present
+            )
+        return rows, []
+
+    with patch(
+        "themefinder.llm_batch_processor.call_llm", side_effect=condense_batches
+    ):
+        await theme_condensation(
+            themes_df,
+            mock_llm,
+            question="test question",
+            batch_size=20,
+            batch_planner=pack_batches,
+            embedder=embedder,
+        )
+
+    # pack_batches would otherwise reorder rows by length and mix the animals
+    assert batch_animals[:2] == [{"aardvark"}, {"pangolin"}]
+
+
+async def test_theme_condensation_varies_groups_between_rounds(mock_llm):
+    """Test a round that fails to condense is retried with different groups."""
+    rng = np.random.default_rng(0)
+    vectors = {f"t{i:02d}x": rng.normal(size=8) for i in range(40)}
+    themes_df = pd.DataFrame(
+        {
+            "topic_label": list(vectors),
+            "topic_description": ["A theme"] * 40,
+            "source_topic_count": [1] * 40,
+        }
+    )
+    embedder = AsyncMock()
+    embedder.aembed.side_effect = lambda texts: np.array(
+        [vectors[text.split(":")[0]] for text in texts]
+    )
+    rounds = []
+
+    async def keep_themes(batch_prompts, **kwargs):
+        # Condense nothing, so the recursive round is retried
+        batches = [
+            sorted(
+                (label for label in vectors if label in prompt.prompt_string),
+                key=prompt.prompt_string.index,
+            )
+            for prompt in batch_prompts
+        ]
+        rounds.append({frozenset(batch) for batch in batches})
+        return [
+            {
+                "topic_label": label,
+                "topic_description": "A theme",
+                "source_topic_count": 1,
+            }
+            for batch in batches
+            for label in batch
+        ], []
+
+    np.random.seed(0)
+    with patch("themefinder.llm_batch_processor.call_llm", side_effect=keep_themes):
+        await theme_condensation(
+            themes_df,
+            mock_llm,
+            question="test question",
+            batch_size=10,
+            embedder=embedder,
+        )
+
+    # Two recursive rounds before giving up, then the final pass
+    assert len(rounds) == 3
+    assert rounds[0] != rounds[1]
+
+
 @pytest.mark.asyncio
 async def test_theme_condensation_no_further_reduction(mock_llm):
     """Test when themes can't be condensed further."""
@@ -327,6 +491,105 @@ async def test_theme_mapping(mock_llm, sample_responses_df):
         assert mock_call_llm.await_count == 1
 
 
+async def test_theme_mapping_shortlists_themes_with_embedder(mock_llm):
+    """Test each batch is only sent the themes most similar to its responses."""
+    responses_df = pd.DataFrame(
+        {
+            "response_id": [1, 2, 3, 4],
+            "response": ["trains late", "bus fares", "trains full", "bus routes"],
+        }
+    )
+    refined_df = pd.DataFrame(
+        {
+            "topic_id": ["A", "B", "C"],
+            "topic": ["Rail: trains", "Buses: bus services", "Other: anything else"],
+        }
+    )
+    embedder = AsyncMock()
+    embedder.aembed.side_effect = lambda texts: np.array(
+        [
+            [1.0, 0.0] if "train" in text else [0.0, 1.0] if "bus" in text else [1, 1]
+            for text in texts
+        ]
+    )
+    batches = []
+
+    async def map_batches(batch_prompts, **kwargs):
+        rows = []
+        for batch_prompt in batch_prompts:
+            topics = [t for t in refined_df["topic"] if t in batch_prompt.prompt_string]
+            batches.append(topics)
+            rows.extend(
+                {"response_id": response_id, "labels": ["A"]}
+                for response_id in batch_prompt.response_ids
+            )
+        return rows, []
+
+    with patch(
+        "themefinder.llm_batch_processor.call_llm", side_effect=map_batches
+    ) as mock_call_llm:
+        result_df, unprocessables_df = await theme_mapping(
+            responses_df,
+            mock_llm,
+            question="test question",
+            refined_themes_df=refined_df,
+            batch_size=2,
+            embedder=embedder,
+            shortlist_size=1,
+        )
+
+    assert sorted(batches) == [
+        ["Buses: bus services", "Other: anything else"],
+        ["Rail: trains", "Other: anything else"],
+    ]
+    assert sorted(result_df["response_id"]) == [1, 2, 3, 4]
+    assert unprocessables_df.empty
+    # Every group's batches are sent together, sharing one concurrency limit
+    mock_call_llm.assert_awaited_once()
+
+
+async def test_theme_mapping_with_detail(mock_llm, sample_responses_df):
+    """Test one LLM call returns labels, evidence_rich and position per response."""
+    refined_df = pd.DataFrame({"topic_id": ["A", "B"], "topic": ["theme1", "theme2"]})
+    mock_llm.ainvoke.return_value = LLMResponse(
+        parsed=ThemeMappingWithDetailResponses(
+            responses=[
+                ThemeMappingWithDetailOutput(
+                    response_id=1,
+                    labels=["A"],
+                    evidence_rich=EvidenceRich.YES,
+                    position=Position.AGREEMENT,
+                ),
+                ThemeMappingWithDetailOutput(
+                    response_id=2,
+                    labels=["A", "B"],
+                    evidence_rich=EvidenceRich.NO,
+                    position=Position.UNCLEAR,
+                ),
+            ]
+        )
+    )
+
+    result_df, unprocessables_df = await theme_mapping_with_detail(
+        sample_responses_df,
+        mock_llm,
+        question="test question",
+        refined_themes_df=refined_df,
+    )
+
+    assert mock_llm.ainvoke.await_count == 1
+    prompt = mock_llm.ainvoke.await_args.args[0]
+    assert "theme1" in prompt
+    assert "response2" in prompt
+    assert result_df.set_index("response_id")[
+        ["labels", "evidence_rich", "position"]
+    ].to_dict(orient="index") == {
+        1: {"labels": ["A"], "evidence_rich": "YES", "position": "AGREEMENT"},
+        2: {"labels": ["A", "B"], "evidence_rich": "NO", "position": "UNCLEAR"},
+    }
+    assert unprocessables_df.empty
+
+
 @pytest.mark.asyncio
 async def test_find_themes(mock_llm, sample_df):
     """Test find_themes with mocked LLM responses."""
@@ -369,16 +632,23 @@ async def test_find_themes(mock_llm, sample_df):
         ).model_dump(),
     ]
 
+    # Detail detection runs alongside the theme stages, so respond by stage rather
+    # than by call order
+    stage_responses = {
+        ThemeGenerationResponses: theme_generation_responses,
+        ThemeCondensationResponses: theme_condensation_responses,
+        ThemeRefinementResponses: theme_refinement_responses,
+        ThemeMappingResponses: theme_mapping_responses,
+        DetailDetectionResponses: detail_detection_responses,
+    }
+
+    async def responses_by_output_model(*args, output_model, **kwargs):
+        return stage_responses[output_model], []
+
     with patch(
         "themefinder.llm_batch_processor.call_llm", new_callable=AsyncMock
     ) as mock_call_llm:
-        mock_call_llm.side_effect = [
-            (theme_generation_responses, []),
-            (theme_condensation_responses, []),
-            (theme_refinement_responses, []),
-            (theme_mapping_responses, []),
-            (detail_detection_responses, []),
-        ]
+        mock_call_llm.side_effect = responses_by_output_model
 
         result = await find_themes(
             input_df,
@@ -402,13 +672,7 @@ async def test_find_themes(mock_llm, sample_df):
 
         mock_call_llm.reset_mock()
 
-        mock_call_llm.side_effect = [
-            (theme_generation_responses, []),
-            (theme_condensation_responses, []),
-            (theme_refinement_responses, []),
-            (theme_mapping_responses, []),
-            (detail_detection_responses, []),
-        ]
+        mock_call_llm.side_effect = responses_by_output_model
 
         _ = await find_themes(
             input_df,
@@ -420,6 +684,62 @@ async def test_find_themes(mock_llm, sample_df):
         assert mock_call_llm.await_count == 5
 
 
+async def test_find_themes_runs_detail_detection_alongside_theme_stages(
+    mock_llm, sample_df
+):
+    calls = []
+
+    async def record_call(*args, output_model, concurrency, **kwargs):
+        calls.append((output_model, concurrency))
+        return [], []
+
+    with (
+        patch("themefinder.llm_batch_processor.call_llm", side_effect=record_call),
+        patch("themefinder.tasks.theme_condensation") as mock_condensation,
+        patch("themefinder.tasks.theme_refinement") as mock_refinement,
+    ):
+        refined_themes = pd.DataFrame({"topic_id": ["A"], "topic": ["Theme A"]})
+        mock_condensation.return_value = (refined_themes, pd.DataFrame())
+        mock_refinement.return_value = (refined_themes, pd.DataFrame())
+
+        await find_themes(
+            sample_df, mock_llm, question="test question", concurrency=3, verbose=False
+        )
+
+    output_models = [output_model for output_model, _ in calls]
+    assert output_models == [
+        ThemeGenerationResponses,
+        DetailDetectionResponses,
+        ThemeMappingResponses,
+    ]
+    # Every stage draws on one budget of 3 concurrent calls
+    budgets = {id(concurrency) for _, concurrency in calls}
+    assert len(budgets) == 1
+    assert calls[0][1]._value == 3
+
+
+def test_plan_find_themes(mock_llm):
+    responses_df = pd.DataFrame(
+        {"response_id": range(1, 101), "response": ["I agree"] * 100}
+    )
+
+    plan = plan_find_themes(responses_df, question="Do you agree?")
+    packed_plan = plan_find_themes(
+        responses_df, question="Do you agree?", batch_planner=pack_batches
+    )
+
+    assert plan["stage"].tolist() == [
+        "theme_generation",
+        "theme_mapping",
+        "detail_detection",
+    ]
+    # Default batch sizes are 50 for generation and 20 for mapping and detection
+    assert plan["calls"].tolist() == [2, 5, 5]
+    assert (plan["batched_rows"] == 100).all()
+    assert packed_plan["calls"].tolist() == plan["calls"].tolist()
+    mock_llm.ainvoke.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_theme_clustering():
     """Test theme_clustering function"""